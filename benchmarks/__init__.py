@@ -0,0 +1,6 @@
+# benchmarks/__init__.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Initialization module for the benchmarks package.
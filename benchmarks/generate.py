@@ -0,0 +1,371 @@
+# benchmarks/generate.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Generates synthetic databases following schema.sql, for benchmarking the engine
+# against data far larger than the stock airport.db.
+#
+#     python -m benchmarks.generate scale-10.db --scale 10
+#     python -m benchmarks.generate small.db --scale 0.01 --seed 7
+#
+# At scale 1, the database has roughly as many rows in each table as airport.db;
+# other scales multiply those counts.  The data is shaped like the real data:
+# most regions have a few airports and a few have very many, names vary in length
+# and sometimes carry accents, only some rows have keywords, and airports cluster
+# around the centers of their regions and countries.
+#
+# Rows are generated country by country and written in fixed-size batches, so the
+# memory used doesn't depend on the scale.
+
+import argparse
+import math
+import random
+import sqlite3
+from pathlib import Path
+
+
+
+_SCHEMA_PATH = Path(__file__).resolve().parent.parent / 'schema.sql'
+
+_DEFAULT_SEED = 33
+_DEFAULT_BATCH_SIZE = 10_000
+
+# Approximately the sizes of the tables in airport.db.
+_STOCK_COUNTRIES = 249
+_STOCK_REGIONS = 3_900
+_STOCK_AIRPORTS = 75_000
+_STOCK_RUNWAYS = 44_000
+_STOCK_FREQUENCIES = 30_000
+_STOCK_NAVIGATION_AIDS = 11_000
+
+_CONTINENTS = [
+    (1, 'AF', 'Africa', (5.0, 20.0)),
+    (2, 'AN', 'Antarctica', (-78.0, 0.0)),
+    (3, 'AS', 'Asia', (35.0, 95.0)),
+    (4, 'EU', 'Europe', (50.0, 10.0)),
+    (5, 'NA', 'North America', (45.0, -100.0)),
+    (6, 'OC', 'Oceania', (-25.0, 140.0)),
+    (7, 'SA', 'South America', (-15.0, -60.0))
+]
+
+_CONTINENT_WEIGHTS = [58, 1, 53, 52, 41, 27, 14]
+
+# The fraction of rows with keywords, and the mean number of keywords they have.
+_KEYWORD_DENSITY = {'country': (0.4, 2.0), 'region': (0.1, 1.5), 'airport': (0.2, 1.5)}
+
+# Occasionally, a navigation aid shares its ID with the one before it, as happens
+# in the original data.
+_DUPLICATE_NAVIGATION_AID_RATE = 0.001
+
+_SYLLABLES = [
+    'ba', 'be', 'bo', 'ca', 'da', 'de', 'do', 'el', 'en', 'fa', 'ga', 'ha', 'in', 'ka',
+    'ki', 'la', 'le', 'lo', 'ma', 'mi', 'na', 'ne', 'no', 'or', 'pa', 'ra', 're', 'ri',
+    'ro', 'sa', 'se', 'si', 'ta', 'te', 'to', 'tu', 'va', 'vi', 'wa', 'za', 'zu', 'ur',
+    'an', 'ar', 'ber', 'burg', 'ton', 'ville', 'stad', 'dorf', 'polis', 'grad', 'shi'
+]
+
+_ACCENTED = {'a': 'áàâã', 'e': 'éèê', 'i': 'íî', 'o': 'óôö', 'u': 'úüû', 'c': 'ç', 'n': 'ñ'}
+
+_AIRPORT_TYPES = [
+    ('small_airport', 'Airport', 55), ('heliport', 'Heliport', 20),
+    ('closed', 'Airfield', 8), ('medium_airport', 'Airport', 7),
+    ('seaplane_base', 'Seaplane Base', 2), ('large_airport', 'International Airport', 1),
+    ('small_airport', 'Airstrip', 7)
+]
+
+_RUNWAY_SURFACES = ['ASP', 'CON', 'GRS', 'GRE', 'TURF', 'DIRT', 'WATER', None]
+_FREQUENCY_TYPES = ['TWR', 'GND', 'ATIS', 'APP', 'UNIC', 'CTAF', 'DEP', 'CLD']
+_NAVIGATION_AID_TYPES = ['VOR', 'VOR-DME', 'VORTAC', 'NDB', 'DME', 'TACAN', 'NDB-DME']
+
+
+
+def _heavy_tailed_count(rng, mean, sigma = 1.0):
+    """Returns a non-negative count drawn from a log-normal distribution with the
+    given mean, so that most counts are small and a few are very large."""
+    if mean <= 0:
+        return 0
+
+    mu = math.log(mean) - sigma * sigma / 2
+    return int(rng.lognormvariate(mu, sigma) + 0.5)
+
+
+def _word(rng):
+    word = ''.join(rng.choice(_SYLLABLES) for _ in range(rng.choice([1, 2, 2, 2, 3, 3, 4])))
+
+    if rng.random() < 0.15:
+        positions = [i for i, ch in enumerate(word) if ch in _ACCENTED]
+
+        if positions:
+            i = rng.choice(positions)
+            word = word[:i] + rng.choice(_ACCENTED[word[i]]) + word[i + 1:]
+
+    return word.capitalize()
+
+
+def _name(rng, words):
+    return ' '.join(_word(rng) for _ in range(words))
+
+
+def _keywords(rng, table):
+    fraction, mean = _KEYWORD_DENSITY[table]
+
+    if rng.random() >= fraction:
+        return None
+
+    count = max(1, _heavy_tailed_count(rng, mean, 0.6))
+    return ', '.join(_name(rng, rng.choice([1, 1, 2])) for _ in range(count))
+
+
+def _code(number, width):
+    digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    result = ''
+
+    while number > 0 or len(result) < width:
+        number, digit = divmod(number, 36)
+        result = digits[digit] + result
+
+    return result
+
+
+def _clamp_latitude(latitude):
+    return max(-89.9, min(89.9, latitude))
+
+
+def _wrap_longitude(longitude):
+    return (longitude + 180.0) % 360.0 - 180.0
+
+
+
+class _BatchWriter:
+    def __init__(self, connection, batch_size):
+        self._connection = connection
+        self._batch_size = batch_size
+        self._batches = {}
+
+
+    def add(self, table, row):
+        batch = self._batches.setdefault(table, [])
+        batch.append(row)
+
+        if len(batch) >= self._batch_size:
+            self._flush(table)
+
+
+    def flush_all(self):
+        for table in list(self._batches):
+            self._flush(table)
+
+
+    def _flush(self, table):
+        batch = self._batches[table]
+
+        if batch:
+            placeholders = ', '.join('?' * len(batch[0]))
+            self._connection.executemany(f'INSERT INTO {table} VALUES ({placeholders});', batch)
+            batch.clear()
+
+
+
+class _Generator:
+    def __init__(self, rng, writer, scale):
+        self._rng = rng
+        self._writer = writer
+        self._country_count = max(1, round(_STOCK_COUNTRIES * scale))
+        self._regions_per_country = _STOCK_REGIONS / _STOCK_COUNTRIES
+        self._airports_per_region = _STOCK_AIRPORTS / _STOCK_REGIONS
+        self._runways_per_airport = _STOCK_RUNWAYS / _STOCK_AIRPORTS
+        self._frequencies_per_airport = _STOCK_FREQUENCIES / _STOCK_AIRPORTS
+        self._navigation_aids_per_airport = _STOCK_NAVIGATION_AIDS / _STOCK_AIRPORTS
+        self._next_region_id = 1
+        self._next_airport_id = 1
+        self._next_runway_id = 1
+        self._next_frequency_id = 1
+        self._next_navigation_aid_id = 1
+
+
+    def generate(self):
+        for continent_id, continent_code, name, _ in _CONTINENTS:
+            self._writer.add('continent', (continent_id, continent_code, name))
+
+        for country_id in range(1, self._country_count + 1):
+            self._generate_country(country_id)
+
+        self._writer.flush_all()
+
+
+    def _generate_country(self, country_id):
+        rng = self._rng
+        continent_id, _, _, (center_latitude, center_longitude) = \
+            rng.choices(_CONTINENTS, weights = _CONTINENT_WEIGHTS)[0]
+
+        country_latitude = _clamp_latitude(rng.gauss(center_latitude, 12.0))
+        country_longitude = _wrap_longitude(rng.gauss(center_longitude, 20.0))
+        country_code = _code(country_id, 2)
+        name = _name(rng, rng.choice([1, 1, 1, 2, 2, 3]))
+
+        self._writer.add('country', (
+            country_id, country_code, name, continent_id,
+            f'https://en.wikipedia.org/wiki/{name.replace(" ", "_")}',
+            _keywords(rng, 'country')))
+
+        for _ in range(max(1, _heavy_tailed_count(rng, self._regions_per_country, 1.1))):
+            self._generate_region(
+                continent_id, country_id, country_code, country_latitude, country_longitude)
+
+
+    def _generate_region(self, continent_id, country_id, country_code, country_latitude, country_longitude):
+        rng = self._rng
+        region_id = self._next_region_id
+        self._next_region_id += 1
+
+        local_code = _code(region_id % 1296, 2)
+        latitude = _clamp_latitude(rng.gauss(country_latitude, 3.0))
+        longitude = _wrap_longitude(rng.gauss(country_longitude, 4.0))
+        name = _name(rng, rng.choice([1, 1, 1, 2, 2, 3]))
+
+        self._writer.add('region', (
+            region_id, f'{country_code}-{_code(region_id, 3)}', local_code, name,
+            continent_id, country_id,
+            f'https://en.wikipedia.org/wiki/{name.replace(" ", "_")}' if rng.random() < 0.8 else None,
+            _keywords(rng, 'region')))
+
+        for _ in range(_heavy_tailed_count(rng, self._airports_per_region, 1.3)):
+            self._generate_airport(continent_id, country_id, country_code, region_id, latitude, longitude)
+
+
+    def _generate_airport(self, continent_id, country_id, country_code, region_id, region_latitude, region_longitude):
+        rng = self._rng
+        airport_id = self._next_airport_id
+        self._next_airport_id += 1
+
+        airport_type, suffix, _ = rng.choices(_AIRPORT_TYPES, weights = [t[2] for t in _AIRPORT_TYPES])[0]
+        latitude = _clamp_latitude(rng.gauss(region_latitude, 0.7))
+        longitude = _wrap_longitude(rng.gauss(region_longitude, 0.9))
+        is_major = airport_type in ('medium_airport', 'large_airport')
+        municipality = _name(rng, rng.choice([1, 1, 2])) if rng.random() < 0.7 else None
+        ident = f'{country_code}{_code(airport_id, 5)}'
+
+        self._writer.add('airport', (
+            airport_id, ident, airport_type, f'{_name(rng, rng.choice([1, 1, 2, 2, 3]))} {suffix}',
+            round(latitude, 6), round(longitude, 6),
+            int(rng.gauss(1200, 1500)) if rng.random() < 0.85 else None,
+            str(continent_id), country_id, region_id, municipality,
+            1 if is_major and rng.random() < 0.7 else 0,
+            ident if rng.random() < 0.5 else None,
+            _code(airport_id, 3)[-3:] if is_major else None,
+            _code(airport_id, 4) if rng.random() < 0.4 else None,
+            None,
+            f'https://en.wikipedia.org/wiki/{ident}' if is_major else None,
+            _keywords(rng, 'airport')))
+
+        runway_mean = self._runways_per_airport * (3.0 if is_major else 0.9)
+        frequency_mean = self._frequencies_per_airport * (6.0 if is_major else 0.6)
+
+        for _ in range(_heavy_tailed_count(rng, runway_mean, 0.5)):
+            self._generate_runway(airport_id, latitude, longitude, is_major)
+
+        for _ in range(_heavy_tailed_count(rng, frequency_mean, 0.8)):
+            self._generate_frequency(airport_id)
+
+        if rng.random() < self._navigation_aids_per_airport:
+            self._generate_navigation_aid(airport_id, country_code, latitude, longitude)
+
+
+    def _generate_runway(self, airport_id, latitude, longitude, is_major):
+        rng = self._rng
+        runway_id = self._next_runway_id
+        self._next_runway_id += 1
+
+        heading = rng.randrange(0, 180, 10)
+        length = int(rng.gauss(9000 if is_major else 3000, 1500))
+
+        self._writer.add('runway', (
+            runway_id, airport_id, max(100, length), rng.choice([75, 100, 150, 200]),
+            rng.choice(_RUNWAY_SURFACES), 1 if is_major or rng.random() < 0.3 else 0,
+            1 if rng.random() < 0.05 else 0,
+            f'{max(1, heading // 10):02d}', round(latitude, 6), round(longitude, 6), None,
+            float(heading), None,
+            f'{(heading + 180) // 10:02d}', round(latitude + 0.01, 6), round(longitude + 0.01, 6), None,
+            float(heading + 180), None))
+
+
+    def _generate_frequency(self, airport_id):
+        rng = self._rng
+        frequency_id = self._next_frequency_id
+        self._next_frequency_id += 1
+        frequency_type = rng.choice(_FREQUENCY_TYPES)
+
+        self._writer.add('airport_frequency', (
+            frequency_id, airport_id, frequency_type,
+            frequency_type if rng.random() < 0.6 else None,
+            round(rng.uniform(118.0, 136.975), 3)))
+
+
+    def _generate_navigation_aid(self, airport_id, country_code, latitude, longitude):
+        rng = self._rng
+
+        if self._next_navigation_aid_id > 1 and rng.random() < _DUPLICATE_NAVIGATION_AID_RATE:
+            navigation_aid_id = self._next_navigation_aid_id - 1
+        else:
+            navigation_aid_id = self._next_navigation_aid_id
+            self._next_navigation_aid_id += 1
+
+        ident = _code(rng.randrange(36 ** 3), 3)
+        navigation_aid_type = rng.choice(_NAVIGATION_AID_TYPES)
+
+        self._writer.add('navigation_aid', (
+            navigation_aid_id, f'{ident}_{country_code}.html', ident, _name(rng, 1),
+            navigation_aid_type,
+            rng.randrange(190, 1750) if 'NDB' in navigation_aid_type else rng.randrange(108000, 117950, 50),
+            round(latitude + rng.gauss(0, 0.05), 6), round(longitude + rng.gauss(0, 0.05), 6),
+            int(rng.gauss(1000, 1000)) if rng.random() < 0.9 else None,
+            country_code, None, None, None, None, None, None,
+            round(rng.uniform(-20, 20), 3) if rng.random() < 0.5 else None,
+            rng.choice(['HI', 'LO', 'BOTH', 'TERMINAL', None]),
+            rng.choice(['HIGH', 'MEDIUM', 'LOW', None]),
+            airport_id if rng.random() < 0.7 else None))
+
+
+
+def generate_database(path: Path, scale: float = 1.0, seed: int = _DEFAULT_SEED,
+                      batch_size: int = _DEFAULT_BATCH_SIZE):
+    """Creates a new database following schema.sql at the given path, filled with
+    synthetic data of the given scale.  The same seed and scale always produce the
+    same database."""
+    path = Path(path)
+
+    if path.exists():
+        raise FileExistsError(f'{path} already exists')
+
+    connection = sqlite3.connect(path, isolation_level = None)
+
+    try:
+        # Nothing is lost if generation is interrupted, except the partly-written
+        # database, so journaling and syncing to disk are turned off until the end.
+        connection.execute('PRAGMA journal_mode = OFF;')
+        connection.execute('PRAGMA synchronous = OFF;')
+        connection.executescript(_SCHEMA_PATH.read_text())
+        connection.execute('BEGIN;')
+        _Generator(random.Random(seed), _BatchWriter(connection, batch_size), scale).generate()
+        connection.execute('COMMIT;')
+        connection.execute('PRAGMA journal_mode = DELETE;')
+        connection.execute('ANALYZE;')
+    finally:
+        connection.close()
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Generate a synthetic airport database.')
+    parser.add_argument('path', type = Path, help = 'where to create the database')
+    parser.add_argument('--scale', type = float, default = 1.0,
+                        help = 'the size relative to airport.db (e.g., 10, 100 or 1000)')
+    parser.add_argument('--seed', type = int, default = _DEFAULT_SEED)
+    parser.add_argument('--batch-size', type = int, default = _DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    generate_database(args.path, args.scale, args.seed, args.batch_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,455 @@
+# benchmarks/run.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# A benchmark suite that drives Engine.process_event without any user interface,
+# timing each kind of search, load and save against databases of increasing size,
+# generated by benchmarks/generate.py.  It also times the per-row cost of turning
+# rows into records, which every search and load pays, how long it takes to
+# migrate each database (and how a query joining airports to their continents
+# fares before and after, along with every search, load and save, run again once
+# it's migrated), and how long it takes a new Python process to import
+# each of the p2app packages (as reported by python -X importtime), along with
+# whether doing so imports tkinter.
+#
+#     python -m benchmarks.run
+#     python -m benchmarks.run --scale 1 --scale 10 --output results.json
+#     python -m benchmarks.run --database airport.db
+#     python -m benchmarks.run --save-baseline baseline.json
+#     python -m benchmarks.run --baseline baseline.json
+#
+# Results are written as JSON.  When a baseline is given, any benchmark whose
+# median time has grown by more than the threshold (and by more than a small
+# absolute amount, so that noise in very fast operations is ignored) is reported
+# as a regression, and the exit status is 1.  Times depend on the machine they're
+# measured on, so no baseline is kept with the project: save one on the machine
+# where results will be compared to it, before the changes being measured.
+
+import argparse
+import json
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import p2app.engine.migrations as migrations
+import p2app.engine.normalize as normalize
+import p2app.engine.rows as rows
+from p2app.engine import Engine
+from p2app.events import *
+from .generate import generate_database
+
+
+
+_DEFAULT_SCALES = [0.1, 1]
+_DEFAULT_REPETITIONS = 20
+_DEFAULT_THRESHOLD = 0.25
+_IMPORT_REPETITIONS = 5
+
+# The modules whose import times are measured.
+_IMPORTED_MODULES = ['p2app', 'p2app.events', 'p2app.engine', 'p2app.views']
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Queries timed before and after the database is migrated, each with a query that
+# picks the value it searches for.
+_MIGRATION_QUERIES = [
+    ('airports_by_continent',
+     '''
+     SELECT COUNT(*)
+     FROM continent AS c JOIN airport AS a ON a.continent_id = c.continent_id
+     WHERE c.continent_code = ?;
+     ''',
+     'SELECT continent_code FROM continent ORDER BY continent_id LIMIT 1;'),
+    ('navigation_aids_by_ident',
+     'SELECT * FROM navigation_aid WHERE ident = ?;',
+     'SELECT ident FROM navigation_aid ORDER BY rowid LIMIT 1;')
+]
+
+# Regressions smaller than this many seconds are ignored, however large they are
+# relative to the baseline.
+_NOISE_FLOOR = 0.0002
+
+
+
+def _sample(connection, sql):
+    cursor = connection.execute(sql)
+
+    try:
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+def _first_keyword(keywords):
+    return keywords.split(',')[0].strip() if keywords else 'none'
+
+
+def _sample_record(connection, record_type, table, condition = ''):
+    # Only the record's own columns are selected, since a migrated database has
+    # others besides them.
+    where = f' WHERE {condition}' if condition else ''
+    row = _sample(
+        connection,
+        f'SELECT {", ".join(record_type._fields)} FROM {table}{where} ORDER BY rowid'
+        f' LIMIT 1 OFFSET (SELECT COUNT(*) / 2 FROM {table}{where});')
+    return record_type(*row)
+
+
+def _collect_context(database_path: Path) -> dict:
+    """Picks records from the middle of each table, whose values the benchmarks
+    search for, load and save."""
+    connection = sqlite3.connect(database_path)
+
+    try:
+        return {
+            'continent': _sample_record(connection, Continent, 'continent'),
+            'country': _sample_record(connection, Country, 'country', 'keywords IS NOT NULL'),
+            'region': _sample_record(connection, Region, 'region', 'keywords IS NOT NULL'),
+            'airport': _sample_record(connection, Airport, 'airport', 'keywords IS NOT NULL'),
+            'navigation_aid': _sample_record(connection, NavigationAid, 'navigation_aid')
+        }
+    finally:
+        connection.close()
+
+
+def _misspell(name):
+    # Swapping two letters in the middle of a name makes a typical typo.
+    middle = len(name) // 2
+
+    if middle < 1:
+        return name
+
+    return name[:middle - 1] + name[middle] + name[middle - 1] + name[middle + 1:]
+
+
+def _cases(context):
+    """Returns (name, function) pairs, where each function returns the event to be
+    processed by one repetition of a benchmark."""
+    continent = context['continent']
+    country = context['country']
+    region = context['region']
+    airport = context['airport']
+    navigation_aid = context['navigation_aid']
+    counter = iter(range(1, 1_000_000_000))
+
+    return [
+        ('search_continent_by_code', lambda: StartContinentSearchEvent(continent.continent_code, None)),
+        ('search_country_by_name', lambda: StartCountrySearchEvent(None, country.name)),
+        ('search_region_by_code', lambda: StartRegionSearchEvent(region.region_code, None, None)),
+        ('search_region_by_name', lambda: StartRegionSearchEvent(None, None, region.name)),
+        ('search_region_by_local_code', lambda: StartRegionSearchEvent(None, region.local_code, None)),
+        ('summary_search_country_by_name', lambda: StartCountrySummarySearchEvent(None, country.name)),
+        ('summary_search_region_by_name', lambda: StartRegionSummarySearchEvent(None, None, region.name)),
+        ('summary_search_region_by_local_code', lambda: StartRegionSummarySearchEvent(None, region.local_code, None)),
+        ('load_continent', lambda: LoadContinentEvent(continent.continent_id)),
+        ('load_country', lambda: LoadCountryEvent(country.country_id)),
+        ('load_region', lambda: LoadRegionEvent(region.region_id)),
+        ('load_airport', lambda: LoadAirportEvent(airport.airport_id)),
+        ('search_navigation_aid_by_ident', lambda: StartNavigationAidSearchEvent(navigation_aid.ident, None, None, None)),
+        ('load_navigation_aid', lambda: LoadNavigationAidEvent(navigation_aid.navigation_aid_id)),
+        ('fuzzy_search_region', lambda: StartRegionFuzzySearchEvent(_misspell(region.name))),
+        ('fuzzy_search_airport', lambda: StartAirportFuzzySearchEvent(_misspell(airport.name))),
+        ('keyword_search_country', lambda: StartCountryKeywordSearchEvent([_first_keyword(country.keywords)])),
+        ('keyword_search_region', lambda: StartRegionKeywordSearchEvent([_first_keyword(region.keywords)])),
+        ('keyword_search_airport', lambda: StartAirportKeywordSearchEvent([_first_keyword(airport.keywords)])),
+        ('insert_region', lambda: SaveNewRegionEvent(region._replace(
+            region_id = None, region_code = f'BENCH-{next(counter)}'))),
+        ('update_region', lambda: SaveRegionEvent(region._replace(
+            keywords = f'{region.keywords}, bench {next(counter)}'))),
+        ('update_country', lambda: SaveCountryEvent(country._replace(
+            keywords = f'{country.keywords}, bench {next(counter)}')))
+    ]
+
+
+def _time_event(engine, event) -> float:
+    started_at = time.perf_counter()
+
+    for _ in engine.process_event(event):
+        pass
+
+    return time.perf_counter() - started_at
+
+
+def _time_materialization(connection, record_type, copy_rows) -> float:
+    started_at = time.perf_counter()
+    cursor = rows.execute(
+        connection, None if copy_rows else record_type, f'SELECT {", ".join(Airport._fields)} FROM airport;')
+
+    if copy_rows:
+        for row in cursor:
+            record_type(*row)
+    else:
+        for row in cursor:
+            pass
+
+    return time.perf_counter() - started_at
+
+
+def _materialization_benchmarks(database_path: Path, repetitions: int) -> dict:
+    """Times reading every airport as plain tuples, as plain tuples copied into
+    Airport records, and as Airport records built by a row factory, so that the
+    per-row cost of each can be compared."""
+    connection = sqlite3.connect(database_path)
+
+    try:
+        row_count = connection.execute('SELECT COUNT(*) FROM airport;').fetchone()[0]
+        results = {}
+
+        for name, record_type, copy_rows in [
+                ('materialize_airports_as_tuples', None, False),
+                ('materialize_airports_by_copying', Airport, True),
+                ('materialize_airports_by_row_factory', Airport, False)]:
+            times = [_time_materialization(connection, record_type, copy_rows) for _ in range(repetitions)]
+            results[name] = {'times': times, 'rows': row_count}
+
+        return results
+    finally:
+        connection.close()
+
+
+def _time_query(connection, sql, parameters) -> float:
+    started_at = time.perf_counter()
+    connection.execute(sql, parameters).fetchall()
+    return time.perf_counter() - started_at
+
+
+def _migration_benchmarks(database_path: Path, repetitions: int, excluded = ()) -> dict:
+    """Times the migration queries, then applying the migrations the database needs
+    (other than those whose names are excluded), then the queries again.  The
+    database is migrated in place."""
+    connection = sqlite3.connect(database_path, isolation_level = None)
+
+    try:
+        normalize.register_functions(connection)
+        connection.execute('PRAGMA foreign_keys = ON;')
+        queries = []
+
+        for name, sql, sample_sql in _MIGRATION_QUERIES:
+            sample = _sample(connection, sample_sql)
+            queries.append((name, sql, (sample[0] if sample else '',)))
+
+        def time_queries(suffix):
+            return {
+                f'{name}{suffix}': {
+                    'times': [_time_query(connection, sql, parameters) for _ in range(repetitions)]
+                }
+                for name, sql, parameters in queries
+            }
+
+        results = time_queries('')
+        pending = migrations.pending(connection, excluded)
+
+        if pending:
+            started_at = time.perf_counter()
+
+            for migration in pending:
+                migrations.apply(connection, migration)
+
+            results['migrate_database'] = {'times': [time.perf_counter() - started_at]}
+            results.update(time_queries('_migrated'))
+
+        return results
+    finally:
+        connection.close()
+
+
+def _engine_benchmarks(database_path: Path, repetitions: int, engine_options: dict, suffix: str = '') -> dict:
+    """Times opening the database through an engine, then each of the cases, with
+    the suffix appended to their names."""
+    context = _collect_context(database_path)
+    engine = Engine(**engine_options)
+    results = {f'open_database{suffix}': {'times': [_time_event(engine, OpenDatabaseEvent(database_path))]}}
+
+    for name, make_event in _cases(context):
+        # The first repetition is a warmup, which also builds any indexes that the
+        # engine creates lazily; it's timed separately, since that cost matters too.
+        first_time = _time_event(engine, make_event())
+        times = [_time_event(engine, make_event()) for _ in range(repetitions)]
+        results[f'{name}{suffix}'] = {'first': first_time, 'times': times}
+
+    _time_event(engine, CloseDatabaseEvent())
+    return results
+
+
+def run_benchmarks(database_path: Path, repetitions: int, engine_options: dict | None = None) -> dict:
+    """Runs every benchmark against one database, returning timing summaries (in
+    seconds) keyed by benchmark name.  The engine's cases are run against the
+    database as it is, then migrated the way the engine would migrate it, then run
+    again, under names ending in _migrated, so that the searches migrations speed up
+    (with the keyword index, stored normalized names and covering indexes) are timed
+    both ways."""
+    engine_options = engine_options or {}
+    excluded = () if engine_options.get('change_log') else ('change_log',)
+    results = _engine_benchmarks(database_path, repetitions, engine_options)
+    results.update(_materialization_benchmarks(database_path, repetitions))
+    results.update(_migration_benchmarks(database_path, repetitions, excluded))
+
+    if 'migrate_database' in results:
+        results.update(_engine_benchmarks(database_path, repetitions, engine_options, '_migrated'))
+
+    return {name: _summarize(result) for name, result in results.items()}
+
+
+def _summarize(result):
+    times = sorted(result['times'])
+    summary = {
+        'repetitions': len(times),
+        'median': statistics.median(times),
+        'p90': times[min(len(times) - 1, int(0.9 * len(times)))],
+        'min': times[0],
+        'max': times[-1]
+    }
+
+    if 'first' in result:
+        summary['first'] = result['first']
+
+    if result.get('rows'):
+        summary['rows'] = result['rows']
+        summary['median_per_row'] = summary['median'] / result['rows']
+
+    return summary
+
+
+def _time_import(module_name):
+    # Each line written by -X importtime looks like this, with the cumulative time
+    # in microseconds, and the name indented according to how deeply it's nested:
+    #
+    #     import time:       220 |      31031 | p2app.engine
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module_name}'],
+        cwd = _PROJECT_ROOT, capture_output = True, text = True, check = True)
+
+    cumulative_time = 0.0
+    imported_names = set()
+
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+
+        _, cumulative, name = line.split('|')
+
+        if cumulative.strip().isdigit():
+            imported_names.add(name.strip())
+
+            if name.strip() == module_name:
+                cumulative_time = int(cumulative) / 1_000_000
+
+    return cumulative_time, 'tkinter' in imported_names
+
+
+def run_import_benchmarks(repetitions: int = _IMPORT_REPETITIONS) -> dict:
+    """Times importing each of the p2app packages in a new Python process, returning
+    timing summaries (in seconds) keyed by module name."""
+    results = {}
+
+    for module_name in _IMPORTED_MODULES:
+        measurements = [_time_import(module_name) for _ in range(repetitions)]
+        summary = _summarize({'times': [import_time for import_time, _ in measurements]})
+        summary['imports_tkinter'] = any(imports_tkinter for _, imports_tkinter in measurements)
+        results[module_name] = summary
+
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Returns a description of each benchmark whose median time regressed by more
+    than the threshold relative to the baseline."""
+    regressions = []
+    groups = dict(results['databases'], imports = results.get('imports', {}))
+    baseline_groups = dict(baseline.get('databases', {}), imports = baseline.get('imports', {}))
+
+    for database_name, benchmarks in groups.items():
+        baseline_benchmarks = baseline_groups.get(database_name, {})
+
+        for name, summary in benchmarks.items():
+            baseline_summary = baseline_benchmarks.get(name)
+
+            if baseline_summary is None or not isinstance(summary, dict) or 'median' not in summary:
+                continue
+
+            before = baseline_summary['median']
+            after = summary['median']
+
+            if after > before * (1 + threshold) and after - before > _NOISE_FLOOR:
+                regressions.append(
+                    f'{database_name}/{name}: median {before * 1000:.3f} ms -> {after * 1000:.3f} ms '
+                    f'(+{(after / before - 1) * 100 if before else float("inf"):.0f}%)')
+
+    return regressions
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Benchmark the engine.')
+    parser.add_argument('--scale', type = float, action = 'append',
+                        help = 'generate and benchmark a database of this scale, relative to '
+                               'airport.db (repeatable)')
+    parser.add_argument('--database', type = Path, action = 'append', default = [],
+                        help = 'benchmark a copy of an existing database (repeatable)')
+    parser.add_argument('--repetitions', type = int, default = _DEFAULT_REPETITIONS)
+    parser.add_argument('--output', type = Path, help = 'write the results to this JSON file')
+    parser.add_argument('--baseline', type = Path, help = 'compare the results to this JSON file')
+    parser.add_argument('--save-baseline', type = Path, help = 'also write the results here as a baseline')
+    parser.add_argument('--threshold', type = float, default = _DEFAULT_THRESHOLD,
+                        help = 'the relative slowdown that counts as a regression (default 0.25)')
+    parser.add_argument('--replica', action = 'store_true',
+                        help = 'serve searches and loads from an in-memory replica of each database')
+    args = parser.parse_args(argv)
+    engine_options = {'replica': True} if args.replica else None
+
+    scales = args.scale if args.scale or args.database else _DEFAULT_SCALES
+    results = {
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'repetitions': args.repetitions,
+        'replica': args.replica,
+        'databases': {}
+    }
+
+    print('Benchmarking imports...', file = sys.stderr)
+    results['imports'] = run_import_benchmarks()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for scale in scales or []:
+            database_path = Path(temp_dir) / f'scale-{scale}.db'
+            generate_database(database_path, scale)
+            print(f'Benchmarking synthetic database at scale {scale}...', file = sys.stderr)
+            results['databases'][f'scale-{scale}'] = run_benchmarks(database_path, args.repetitions, engine_options)
+
+        for source_path in args.database:
+            database_path = Path(temp_dir) / source_path.name
+            source = sqlite3.connect(source_path)
+            target = sqlite3.connect(database_path)
+            source.backup(target)
+            target.close()
+            source.close()
+            print(f'Benchmarking {source_path}...', file = sys.stderr)
+            results['databases'][source_path.name] = run_benchmarks(database_path, args.repetitions, engine_options)
+
+    output = json.dumps(results, indent = 2)
+
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)
+
+    if args.save_baseline:
+        args.save_baseline.write_text(output)
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file = sys.stderr)
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,8 +5,31 @@
 #
 # Initialization module for the p2app package.
 #
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
+# Engine, EventBus and MainView are imported only when they're first used, so
+# that importing the engine or the events (from a benchmark or a replay, say)
+# doesn't also import tkinter and every view.
 
-from .engine import Engine
-from .events import EventBus
-from .views import MainView
+import importlib
+
+
+_LAZY_NAMES = {
+    'Engine': '.engine',
+    'EventBus': '.events',
+    'MainView': '.views'
+}
+
+__all__ = list(_LAZY_NAMES)
+
+
+
+def __getattr__(name):
+    if name not in _LAZY_NAMES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    value = getattr(importlib.import_module(_LAZY_NAMES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES))
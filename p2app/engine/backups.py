@@ -0,0 +1,136 @@
+# p2app/engine/backups.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Online backups (and restores) of a database, made with SQLite's backup API while
+# the database stays open, rather than by copying its file, which isn't safe while
+# it might be written to.
+#
+# The database is copied a limited number of pages at a time.  Between steps, the
+# copy holds no locks, so other connections can go on reading (and writing) the
+# database; if another connection writes to it partway through, SQLite starts the
+# copy over, so the result is always a consistent snapshot.
+#
+# sqlite3's Connection.backup runs every step itself, calling back after each one,
+# which leaves no way for a generator to yield between steps.  So the copy runs on
+# a thread of its own, with connections of its own, and after each step, its
+# callback hands the progress to the generator and waits until the generator is
+# resumed before letting the next step run.  Only one of the two ever runs at once.
+
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+
+from . import normalize
+
+
+# How many pages are copied in each step; with SQLite's default page size of 4 KB,
+# this is a megabyte.
+PAGES_PER_STEP = 256
+
+# How many problems an integrity check reports, at most.
+_MAX_INTEGRITY_PROBLEMS = 100
+
+
+
+class _Cancelled(Exception):
+    pass
+
+
+
+class _SteppedCopy:
+    def __init__(self, source_path, target_path, pages_per_step):
+        self._source_path = source_path
+        self._target_path = target_path
+        self._pages_per_step = pages_per_step
+        self._reports = queue.Queue()
+        self._resume = threading.Semaphore(0)
+        self._cancelled = False
+
+
+    def steps(self):
+        thread = threading.Thread(target = self._copy, daemon = True)
+        thread.start()
+
+        try:
+            while True:
+                kind, value = self._reports.get()
+
+                if kind == 'step':
+                    yield value
+                    self._resume.release()
+                elif kind == 'error':
+                    raise value
+                else:
+                    break
+        finally:
+            # If the generator is abandoned partway, the copy is stopped at its next step.
+            self._cancelled = True
+            self._resume.release()
+            thread.join()
+
+
+    def _copy(self):
+        source = None
+        target = None
+
+        try:
+            source = sqlite3.connect(read_only_uri(self._source_path), uri = True)
+            target = sqlite3.connect(self._target_path)
+            source.backup(target, pages = self._pages_per_step, progress = self._on_step)
+            self._reports.put(('done', None))
+        except _Cancelled:
+            pass
+        except Exception as e:
+            self._reports.put(('error', e))
+        finally:
+            if target is not None:
+                target.close()
+
+            if source is not None:
+                source.close()
+
+
+    def _on_step(self, status, remaining, total):
+        self._reports.put(('step', (remaining, total)))
+        self._resume.acquire()
+
+        if self._cancelled:
+            raise _Cancelled()
+
+
+
+def copy(source_path: str | os.PathLike, target_path: str | os.PathLike,
+         pages_per_step: int = PAGES_PER_STEP):
+    """A generator that copies the database at source_path over the one at target_path
+    (creating it if it doesn't exist), generating a (remaining, total) pair of page
+    counts after each step.  Raises sqlite3.Error if either database can't be used;
+    if the copy fails or is abandoned partway, the target is left as it was."""
+    yield from _SteppedCopy(source_path, target_path, pages_per_step).steps()
+
+
+def read_only_uri(path: str | os.PathLike) -> str:
+    """Returns a URI that opens the database at the given path read-only, when passed
+    to sqlite3.connect along with uri = True.  Characters that mean something in a
+    URI, such as ? and #, are escaped, so that they're read as part of the path."""
+    return f'{pathlib.Path(path).resolve().as_uri()}?mode=ro'
+
+
+def check_integrity(path: str | os.PathLike) -> list[str]:
+    """Checks the integrity of the database at the given path, returning ['ok'] if
+    there are no problems, or a description of each problem otherwise."""
+    connection = sqlite3.connect(read_only_uri(path), uri = True)
+
+    try:
+        # A database last written by an earlier version of the engine can still have
+        # indexes whose expressions call the normalization function (see
+        # normalize.function_indexes), which can't be checked without it.
+        normalize.register_functions(connection)
+        return [
+            problem for (problem,) in connection.execute(
+                f'PRAGMA integrity_check({_MAX_INTEGRITY_PROBLEMS});')]
+    finally:
+        connection.close()
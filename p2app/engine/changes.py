@@ -0,0 +1,124 @@
+# p2app/engine/changes.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# A log of the changes made to the continent, country, region and airport tables,
+# kept by triggers, so that anything keeping a copy of their rows (a cache, or an
+# export) can bring it up to date by reading only what changed since it last
+# looked, rather than reading the tables again.
+#
+# Each insert, update or delete of a row appends an entry to the log, recording the
+# table, the row's ID, the operation and a sequence number.  The sequence numbers
+# only ever increase (the log's key is declared AUTOINCREMENT, so numbers aren't
+# reused even after the entries holding them are removed), so a consumer that
+# remembers the last one it saw can ask for everything after it.
+#
+# Compacting the log removes every entry but the latest for each row.  A consumer
+# is told about every row that changed after the sequence it asks from, but only
+# of its latest operation, so consumers should treat an insert and an update alike,
+# as a sign to read the row again.
+#
+# The log and its triggers are created by a migration (see migrations.py), which is
+# only offered by an engine asked to keep a change log, so that nothing is added to
+# a database, or done on each of its writes, unless its user agrees to it.
+
+import sqlite3
+
+from . import rows
+from .normalize import NORMALIZED_NAME_COLUMN
+
+
+# The tables whose changes are logged, along with the names of their ID columns.
+_LOGGED_TABLES = {
+    'continent': 'continent_id',
+    'country': 'country_id',
+    'region': 'region_id',
+    'airport': 'airport_id'
+}
+
+
+
+def _trigger_names():
+    return [
+        f'{table}_change_log_{operation}'
+        for table in _LOGGED_TABLES for operation in ('insert', 'update', 'delete')]
+
+
+def has_log(connection: sqlite3.Connection) -> bool:
+    """Returns True if the database has the change log, along with every trigger that
+    maintains it."""
+    names = {
+        name for (name,) in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger');")}
+
+    return 'change_log' in names and all(name in names for name in _trigger_names())
+
+
+def create_log(connection: sqlite3.Connection):
+    """Creates the change log and the triggers that maintain it, if they don't already
+    exist."""
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS change_log ('
+        ' sequence INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,'
+        ' table_name TEXT NOT NULL,'
+        ' row_id INTEGER NOT NULL,'
+        ' operation TEXT NOT NULL);')
+
+    for table, id_column in _LOGGED_TABLES.items():
+        connection.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_change_log_insert AFTER INSERT ON {table}'
+            ' BEGIN'
+            '   INSERT INTO change_log (table_name, row_id, operation)'
+            f"  VALUES ('{table}', NEW.{id_column}, 'insert');"
+            ' END;')
+
+        # An update that changes a row's ID is logged as the deletion of the old
+        # ID, as well as the update of the new one.  Updates of nothing but a row's
+        # stored normalized name (see normalize.py), which follows from its name,
+        # aren't logged, since the update of its name already was.
+        columns = ', '.join(
+            name for _, name, *_ in connection.execute(f'PRAGMA table_info({table});')
+            if name != NORMALIZED_NAME_COLUMN)
+
+        connection.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_change_log_update AFTER UPDATE OF {columns} ON {table}'
+            ' BEGIN'
+            '   INSERT INTO change_log (table_name, row_id, operation)'
+            f"  SELECT '{table}', OLD.{id_column}, 'delete' WHERE OLD.{id_column} != NEW.{id_column};"
+            '   INSERT INTO change_log (table_name, row_id, operation)'
+            f"  VALUES ('{table}', NEW.{id_column}, 'update');"
+            ' END;')
+
+        connection.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_change_log_delete AFTER DELETE ON {table}'
+            ' BEGIN'
+            '   INSERT INTO change_log (table_name, row_id, operation)'
+            f"  VALUES ('{table}', OLD.{id_column}, 'delete');"
+            ' END;')
+
+
+def changes_since(connection: sqlite3.Connection, record_type, sequence: int,
+                  limit: int | None = None) -> sqlite3.Cursor:
+    """Returns a cursor over the entries in the log after the given sequence number
+    (at most limit of them, if a limit is given), in order, built as record_type.
+    Since the log's key is the sequence number, the entries are found by a range of
+    keys, in time proportional to how many there are."""
+    return rows.execute(
+        connection, record_type,
+        'SELECT sequence, table_name, row_id, operation FROM change_log'
+        ' WHERE sequence > (:sequence) ORDER BY sequence LIMIT (:limit);',
+        {'sequence': sequence, 'limit': -1 if limit is None else limit})
+
+
+def compact(connection: sqlite3.Connection) -> int:
+    """Removes every entry in the log but the latest for each row, returning how many
+    entries were removed."""
+    cursor = connection.execute(
+        'DELETE FROM change_log WHERE sequence NOT IN'
+        ' (SELECT MAX(sequence) FROM change_log GROUP BY table_name, row_id);')
+
+    try:
+        return cursor.rowcount
+    finally:
+        cursor.close()
@@ -0,0 +1,90 @@
+# p2app/engine/deadlines.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Deadlines that bound how long the engine may spend processing one event.  Each
+# type of event has a time budget; while an event is being processed, a progress
+# handler installed on the connection checks the clock every few thousand SQLite
+# virtual machine instructions, and interrupts the running statement once the
+# budget has been spent.
+#
+# Budgets are measured in wall-clock time from when the engine starts processing
+# an event, including any time the user interface spends handling the results
+# generated along the way, since that's the latency the user actually sees.
+
+import time
+
+
+# The default budgets, in seconds, for searches and loads.  Other events (saves,
+# and opening or closing a database, in particular) have no budget by default,
+# since interrupting them would leave work half done.
+SEARCH_BUDGET = 2.0
+LOAD_BUDGET = 1.0
+
+# How many virtual machine instructions SQLite executes between calls to the
+# progress handler; a few thousand take on the order of a millisecond.
+_PROGRESS_INTERVAL = 5000
+
+
+
+def default_budget(event_type_name: str) -> float | None:
+    if event_type_name.startswith('Start') and event_type_name.endswith('SearchEvent'):
+        return SEARCH_BUDGET
+    elif event_type_name.startswith('Load') and event_type_name.endswith('Event'):
+        return LOAD_BUDGET
+    else:
+        return None
+
+
+def budget_for(event_type_name: str, budgets: dict | None) -> float | None:
+    """Returns the budget, in seconds, for the type of event with the given name, or
+    None if it has no budget.  Budgets given by name override the defaults; giving
+    None as a budget removes it."""
+    if budgets is not None and event_type_name in budgets:
+        return budgets[event_type_name]
+
+    return default_budget(event_type_name)
+
+
+
+class Deadline:
+    def __init__(self):
+        self._expires_at = None
+        self._budget = None
+        self._exceeded = False
+
+
+    def install(self, connection):
+        """Installs a progress handler that enforces this deadline on a connection."""
+        connection.set_progress_handler(self._on_progress, _PROGRESS_INTERVAL)
+
+
+    def start(self, budget: float | None):
+        """Starts a new deadline, budget seconds from now, or none if budget is None."""
+        self._budget = budget
+        self._expires_at = time.perf_counter() + budget if budget is not None else None
+        self._exceeded = False
+
+
+    def clear(self):
+        self._expires_at = None
+
+
+    def budget(self) -> float | None:
+        return self._budget
+
+
+    def exceeded(self) -> bool:
+        """Returns True if a statement was interrupted since the deadline started."""
+        return self._exceeded
+
+
+    def _on_progress(self):
+        # Returning a true value makes SQLite interrupt the statement, which then
+        # raises sqlite3.OperationalError.
+        if self._expires_at is not None and time.perf_counter() > self._expires_at:
+            self._exceeded = True
+            return 1
+
+        return 0
@@ -0,0 +1,180 @@
+# p2app/engine/duplicates.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# A detector of airports that are likely to be duplicates of one another: the
+# same field, listed more than once under different idents, a few hundred metres
+# apart, with similar names.
+#
+# Comparing every airport with every other would take time proportional to the
+# square of their number.  Instead, the airports are put into a grid of cells, in
+# bands of latitude as tall as the largest distance two duplicates can be apart,
+# each divided into columns at least that wide, and each airport is compared only
+# with the ones in its own cell and the cells beside it, since no airport farther
+# away can be close enough.  A degree of longitude spans less distance nearer the
+# poles, so bands there have fewer, wider columns (a band near a pole may be a
+# single cell).  Columns wrap around at the antimeridian, so airports on either
+# side of it are still compared.
+#
+# The airports close enough to be duplicates then have their names compared, by
+# the share of their trigrams (see trigram.py) that they have in common, leaving
+# out words like "airport" that so many names have that they say nothing about
+# whether two names are alike.  Each pair similar enough is generated as soon as
+# it's found, so a report of them can be streamed while the rest are sought.
+
+import math
+from collections import defaultdict
+
+from . import rows
+from .normalize import normalize_name
+from .trigram import trigrams
+
+
+EARTH_RADIUS_M = 6_371_008.8
+
+DEFAULT_MAX_DISTANCE_M = 1000.0
+DEFAULT_MIN_SIMILARITY = 0.5
+
+# Words in airport names that are left out when names are compared (unless a name
+# has nothing else in it).
+_GENERIC_WORDS = frozenset({
+    'aerodrome', 'air', 'airfield', 'airpark', 'airport', 'airstrip', 'base', 'field',
+    'heliport', 'international', 'landing', 'municipal', 'regional', 'seaplane', 'strip'
+})
+
+
+
+class _Grid:
+    def __init__(self, max_distance_m: float):
+        self._band_height = math.degrees(max_distance_m / EARTH_RADIUS_M)
+        self._cells = defaultdict(list)
+        self._column_counts = {}
+
+
+    def band(self, latitude: float) -> int:
+        return math.floor((latitude + 90.0) / self._band_height)
+
+
+    def column_count(self, band: int) -> int:
+        count = self._column_counts.get(band)
+
+        if count is None:
+            # Two airports close enough to be compared, one of them in this band, are
+            # no more than two bands from it, so columns must be as wide as the span
+            # of longitude the largest distance covers at the highest latitude there.
+            highest = min(90.0, max(
+                abs(-90.0 + (band - 2) * self._band_height),
+                abs(-90.0 + (band + 3) * self._band_height)))
+            cosine = math.cos(math.radians(highest))
+            width = 360.0 if cosine <= 0.0 else min(360.0, self._band_height / cosine)
+            count = max(1, math.floor(360.0 / width))
+            self._column_counts[band] = count
+
+        return count
+
+
+    def column(self, band: int, longitude: float) -> int:
+        count = self.column_count(band)
+        return math.floor((longitude + 180.0) / 360.0 * count) % count
+
+
+    def add(self, site):
+        band = self.band(site[3])
+        self._cells[(band, self.column(band, site[4]))].append(site)
+
+
+    def cells(self):
+        """Generates the sites in each cell, one cell at a time, from south to north."""
+        for key in sorted(self._cells):
+            yield self._cells[key]
+
+
+    def neighbours(self, latitude: float, longitude: float):
+        """Generates the sites in the cell containing the given location and the cells
+        beside it."""
+        band = self.band(latitude)
+
+        for neighbouring_band in (band - 1, band, band + 1):
+            count = self.column_count(neighbouring_band)
+            column = self.column(neighbouring_band, longitude)
+
+            for neighbouring_column in {(column - 1) % count, column, (column + 1) % count}:
+                yield from self._cells.get((neighbouring_band, neighbouring_column), ())
+
+
+
+def distance_m(latitude: float, longitude: float, other_latitude: float, other_longitude: float) -> float:
+    """Returns the great-circle distance, in metres, between two locations."""
+    phi = math.radians(latitude)
+    other_phi = math.radians(other_latitude)
+    half_chord = (
+        math.sin((other_phi - phi) / 2) ** 2
+        + math.cos(phi) * math.cos(other_phi) * math.sin(math.radians(other_longitude - longitude) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(half_chord)))
+
+
+def name_trigrams(name: str | None) -> set[str]:
+    """Returns the trigrams of a name, once normalized, leaving out generic words."""
+    words = normalize_name(name or '').split()
+    specific = [word for word in words if word not in _GENERIC_WORDS]
+    return trigrams(' '.join(specific or words))
+
+
+def similarity(first: set[str], second: set[str]) -> float:
+    """Returns the share of two sets of trigrams that they have in common."""
+    if not first or not second:
+        return 0.0
+
+    shared = len(first & second)
+    return shared / (len(first) + len(second) - shared)
+
+
+def find(connection, record_type, max_distance_m: float = DEFAULT_MAX_DISTANCE_M,
+         min_similarity: float = DEFAULT_MIN_SIMILARITY):
+    """A generator that finds pairs of airports no more than max_distance_m metres
+    apart whose names have a similarity of at least min_similarity, generating each
+    pair, once, as record_type(airport_id, airport_ident, name, other_airport_id,
+    other_airport_ident, other_name, distance_m, similarity), with the lower ID
+    first.  Airports without a location are left out."""
+    grid = _Grid(max_distance_m)
+    cursor = rows.execute(
+        connection, None,
+        'SELECT airport_id, airport_ident, name, latitude_deg, longitude_deg FROM airport'
+        ' WHERE latitude_deg IS NOT NULL AND longitude_deg IS NOT NULL;')
+
+    try:
+        for site in cursor:
+            grid.add(site)
+    finally:
+        cursor.close()
+
+    # Most airports have no others nearby, so names are broken into trigrams only
+    # once they're needed, and only once each.
+    site_trigrams = {}
+
+    def trigrams_of(site):
+        result = site_trigrams.get(site[0])
+
+        if result is None:
+            result = site_trigrams[site[0]] = name_trigrams(site[2])
+
+        return result
+
+    for cell in grid.cells():
+        for site in cell:
+            airport_id, _, _, latitude, longitude = site
+
+            for other in grid.neighbours(latitude, longitude):
+                if other[0] <= airport_id:
+                    continue
+
+                distance = distance_m(latitude, longitude, other[3], other[4])
+
+                if distance > max_distance_m:
+                    continue
+
+                score = similarity(trigrams_of(site), trigrams_of(other))
+
+                if score >= min_similarity:
+                    yield record_type(*site[:3], *other[:3], distance, score)
@@ -0,0 +1,198 @@
+# p2app/engine/federation.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Other airport databases attached alongside the open one (a production copy and
+# a copy with staged edits, say), so that they can be searched all at once, and
+# records can be copied from one to another.
+#
+# Each attached database is a schema of its own on the open database's
+# connection, named by the alias it was attached as; the open database's own
+# schema is main.  A search is one statement, a SELECT on each schema combined
+# with UNION ALL, each tagging its rows with the name of its schema, so that
+# SQLite streams the rows from one schema after another, using each one's own
+# indexes.  A copy is one INSERT ... SELECT from one schema into another, so the
+# rows being copied never pass through Python.
+
+import json
+import os
+import re
+import sqlite3
+
+from . import keywords, normalize
+from .normalize import normalize_name
+
+
+# The tables that can be searched across databases and copied between them, along
+# with the columns holding their IDs and their codes.
+FEDERATED_TABLES = {
+    'continent': ('continent_id', 'continent_code'),
+    'country': ('country_id', 'country_code'),
+    'region': ('region_id', 'region_code'),
+    'airport': ('airport_id', 'airport_ident')
+}
+
+_ALIAS = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+# The names of the schemas SQLite gives every connection, which can't be aliases.
+_RESERVED_SCHEMAS = {'main', 'temp'}
+
+_COPY_SAVEPOINT = 'p2app_copy'
+
+
+
+class FederationError(Exception):
+    """Raised when a database can't be attached or detached, or records can't be
+    copied, because of what was asked for."""
+    pass
+
+
+
+def schemas(connection: sqlite3.Connection) -> list[str]:
+    """Returns the names of the schemas on a connection that can be searched: main,
+    followed by the aliases of the attached databases, in the order they were
+    attached."""
+    return [name for _, name, _ in connection.execute('PRAGMA database_list;') if name != 'temp']
+
+
+def attach(connection: sqlite3.Connection, path: str | os.PathLike, alias: str):
+    """Attaches the airport database at the given path to a connection, which must
+    be in autocommit mode, as a schema named alias.  Raises FederationError if the
+    alias can't be used, or the path isn't an airport database (other than the open
+    one), or sqlite3.Error if the database can't be attached."""
+    if not _ALIAS.fullmatch(alias) or alias.lower() in _RESERVED_SCHEMAS:
+        raise FederationError(f'{alias} cannot be used as the name of an attached database.')
+
+    if alias.lower() in (schema.lower() for schema in schemas(connection)):
+        raise FederationError(f'A database is already attached as {alias}.')
+
+    # Attaching a file that doesn't exist would create an empty database there.
+    if not os.path.isfile(path):
+        raise FederationError(f'There is no database at {path}.')
+
+    main_path = connection.execute('PRAGMA database_list;').fetchone()[2]
+
+    if main_path and os.path.realpath(path) == os.path.realpath(main_path):
+        raise FederationError('The open database cannot be attached to itself.')
+
+    connection.execute('ATTACH DATABASE ? AS ?;', (os.fspath(path), alias))
+
+    try:
+        tables = {
+            name for (name,) in connection.execute(
+                f"SELECT name FROM \"{alias}\".sqlite_master WHERE type = 'table';")}
+    except sqlite3.Error:
+        connection.execute('DETACH DATABASE ?;', (alias,))
+        raise
+
+    missing = sorted(set(FEDERATED_TABLES) - tables)
+
+    if missing:
+        connection.execute('DETACH DATABASE ?;', (alias,))
+        raise FederationError(
+            f'{path} is not an airport database; it has no {", ".join(missing)} table.')
+
+
+def detach(connection: sqlite3.Connection, alias: str):
+    """Detaches the database attached to a connection as alias.  Raises
+    FederationError if none is."""
+    if alias.lower() in _RESERVED_SCHEMAS or alias not in schemas(connection):
+        raise FederationError(f'No database is attached as {alias}.')
+
+    connection.execute('DETACH DATABASE ?;', (alias,))
+
+
+def search(connection: sqlite3.Connection, table: str, columns: list[str],
+           code: str | None = None, name: str | None = None) -> sqlite3.Cursor:
+    """Returns a cursor over the rows of a table, in main and every attached schema,
+    whose code is the given one and whose name, once normalized, matches the given
+    one (each only if given).  Each row is the name of its schema, followed by the
+    values of the given columns, which every schema's table must have."""
+    _, code_column = FEDERATED_TABLES[table]
+    column_list = ', '.join(columns)
+
+    # Each schema is searched by its stored normalized names, if it has them.
+    def where(schema):
+        conditions = []
+
+        if code is not None:
+            conditions.append(f'{code_column} = (:code)')
+
+        if name is not None:
+            conditions.append(normalize.name_condition(normalize.has_stored_names(connection, schema)))
+
+        return ' AND '.join(conditions)
+
+    return connection.execute(
+        ' UNION ALL '.join(
+            f"SELECT '{schema}' AS source, {column_list} FROM \"{schema}\".{table} WHERE {where(schema)}"
+            for schema in schemas(connection)) + ';',
+        {'code': code, 'name': normalize_name(name) if name is not None else None})
+
+
+def _columns(connection: sqlite3.Connection, schema: str, table: str) -> list[str]:
+    return [name for _, name, *_ in connection.execute(f'PRAGMA "{schema}".table_info({table});')]
+
+
+def copy(connection: sqlite3.Connection, table: str, record_ids: list[int], source: str,
+         target: str, replace: bool = False) -> int:
+    """Copies the rows of a table with the given IDs from the source schema to the
+    target schema, returning how many were copied.  Only the columns the two tables
+    have in common are copied.  If replace is True, a row whose ID is already in the
+    target is updated in place to match the source; otherwise, it makes the copy
+    fail.  The copied rows' keywords are indexed in the target, and their normalized
+    names stored there, if it indexes them and stores them.
+    Raises FederationError if the schemas or table can't be used, or sqlite3.Error
+    if the rows can't be copied (because they refer to rows the target doesn't
+    have, for example); either way, nothing is copied."""
+    if table not in FEDERATED_TABLES:
+        raise FederationError(f'Records of type {table} cannot be copied.')
+
+    attached = schemas(connection)
+
+    for schema in (source, target):
+        if schema not in attached:
+            raise FederationError(f'No database is attached as {schema}.')
+
+    if source == target:
+        raise FederationError('Records cannot be copied into the database they came from.')
+
+    id_column, _ = FEDERATED_TABLES[table]
+    source_columns = set(_columns(connection, source, table))
+    columns = [column for column in _columns(connection, target, table) if column in source_columns]
+    column_list = ', '.join(columns)
+
+    # Updating a row in place, rather than replacing it, keeps the rows referring to
+    # it valid, where deleting it and inserting its replacement would not.
+    if replace:
+        assignments = ', '.join(f'{column} = excluded.{column}' for column in columns if column != id_column)
+        upsert = f' ON CONFLICT ({id_column}) DO UPDATE SET {assignments}'
+    else:
+        upsert = ''
+
+    record_ids = [int(record_id) for record_id in record_ids]
+    connection.execute(f'SAVEPOINT {_COPY_SAVEPOINT};')
+
+    try:
+        cursor = connection.execute(
+            f'INSERT INTO "{target}".{table} ({column_list})'
+            f' SELECT {column_list} FROM "{source}".{table}'
+            f' WHERE {id_column} IN (SELECT value FROM json_each(?)){upsert};',
+            (json.dumps(record_ids),))
+        count = cursor.rowcount
+        cursor.close()
+
+        if table in keywords.KEYWORD_TABLES:
+            keywords.reindex(connection, table, record_ids, target)
+
+        if normalize.has_stored_names(connection, target):
+            normalize.refresh(connection, table, record_ids, target)
+
+        connection.execute(f'RELEASE {_COPY_SAVEPOINT};')
+    except BaseException:
+        connection.execute(f'ROLLBACK TO {_COPY_SAVEPOINT};')
+        connection.execute(f'RELEASE {_COPY_SAVEPOINT};')
+        raise
+
+    return count
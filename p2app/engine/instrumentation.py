@@ -0,0 +1,214 @@
+# p2app/engine/instrumentation.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Instrumented sqlite3 connections, which time every statement the engine
+# executes, capture how SQLite plans to execute each distinct statement, flag the
+# ones that scan whole tables, and write the slow ones to a rotating log.
+#
+# The instrumentation is meant to be cheap enough to leave on: the query plan of
+# a statement is asked for only the first time its SQL is seen, and after that,
+# each execution costs two clock readings and a dictionary lookup.  Times are
+# measured up to the statement's first row, which for the engine's searches and
+# loads is nearly all of their work; a statement that goes on to scan many rows
+# shows up in its plan instead.
+
+import os
+import sqlite3
+import time
+
+
+# The statements whose plans can be asked for with EXPLAIN QUERY PLAN.
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE')
+
+_LOG_MAX_BYTES = 1_000_000
+_LOG_BACKUP_COUNT = 3
+
+
+
+class StatementStats:
+    """What has been observed about one distinct SQL statement."""
+
+    __slots__ = ('sql', 'plan', 'scans', 'count', 'total_time', 'max_time', 'slow_count')
+
+    def __init__(self, sql: str, plan: list[str]):
+        self.sql = sql
+        self.plan = plan
+        self.scans = [detail for detail in plan if _is_scan(detail)]
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.slow_count = 0
+
+
+    def summary(self) -> dict:
+        return {
+            'sql': self.sql,
+            'plan': self.plan,
+            'full_scan': bool(self.scans),
+            'count': self.count,
+            'total': self.total_time,
+            'mean': self.total_time / self.count if self.count else 0.0,
+            'max': self.max_time,
+            'slow': self.slow_count
+        }
+
+
+
+def _is_scan(detail: str) -> bool:
+    return detail.startswith('SCAN ') and detail != 'SCAN CONSTANT ROW'
+
+
+def _create_slow_query_logger(path: str | os.PathLike):
+    # logging is imported only once a log is asked for, since importing it takes
+    # longer than importing the rest of the engine.
+    import logging
+    import logging.handlers
+
+    # The logger is deliberately not registered with the logging module, so that
+    # each connection's log is separate and is released when the connection closes.
+    logger = logging.Logger('p2app.engine.slow_queries')
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes = _LOG_MAX_BYTES, backupCount = _LOG_BACKUP_COUNT, encoding = 'utf-8')
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+    logger.addHandler(handler)
+    return logger
+
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters = ()):
+        instruments = self.connection.instruments
+        stats = instruments.stats_for(sql, parameters)
+        started_at = time.perf_counter()
+
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            instruments.record(stats, time.perf_counter() - started_at, parameters)
+
+
+    def executemany(self, sql, parameters):
+        instruments = self.connection.instruments
+        stats = instruments.stats_for(sql, None)
+        started_at = time.perf_counter()
+
+        try:
+            return super().executemany(sql, parameters)
+        finally:
+            instruments.record(stats, time.perf_counter() - started_at, None)
+
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """A connection whose cursors are all instrumented.  Create one by passing this
+    class as the factory to sqlite3.connect; its statistics, and its slow-query log,
+    are reached through its instruments attribute."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.instruments = Instruments(self)
+
+
+    def cursor(self, factory = InstrumentedCursor):
+        return super().cursor(factory)
+
+
+    # Connection.execute creates its cursor without calling the cursor method, so
+    # it must be overridden as well.
+    def execute(self, sql, parameters = ()):
+        return self.cursor().execute(sql, parameters)
+
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+
+    def close(self):
+        self.instruments.close()
+        super().close()
+
+
+
+class Instruments:
+    """The statistics, and the slow-query log, of one instrumented connection."""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+        self._stats = {}
+        self._slow_threshold = None
+        self._logger = None
+
+
+    def configure(self, slow_query_log: str | os.PathLike | None = None,
+                  slow_query_threshold: float = 0.1):
+        """Starts writing statements taking longer than the threshold (in seconds),
+        and the plans of statements that scan whole tables, to the given log."""
+        self.close()
+        self._slow_threshold = slow_query_threshold
+
+        if slow_query_log is not None:
+            self._logger = _create_slow_query_logger(slow_query_log)
+
+
+    def stats_for(self, sql: str, parameters) -> StatementStats:
+        stats = self._stats.get(sql)
+
+        if stats is None:
+            stats = StatementStats(sql, self._explain(sql, parameters))
+            self._stats[sql] = stats
+
+            if stats.scans and self._logger is not None:
+                self._logger.warning('full scan (%s): %s', '; '.join(stats.scans), sql)
+
+        return stats
+
+
+    def record(self, stats: StatementStats, elapsed: float, parameters):
+        stats.count += 1
+        stats.total_time += elapsed
+
+        if elapsed > stats.max_time:
+            stats.max_time = elapsed
+
+        if self._slow_threshold is not None and elapsed >= self._slow_threshold:
+            stats.slow_count += 1
+
+            if self._logger is not None:
+                self._logger.warning(
+                    'slow query (%.1f ms): %s parameters = %r plan = %s',
+                    elapsed * 1000, stats.sql, parameters, ' / '.join(stats.plan) or '(none)')
+
+
+    def statement_stats(self) -> list[dict]:
+        """Returns a summary of every distinct statement executed so far, from the
+        one taking the most time in total to the one taking the least."""
+        return sorted(
+            (stats.summary() for stats in self._stats.values()),
+            key = lambda summary: summary['total'], reverse = True)
+
+
+    def close(self):
+        if self._logger is not None:
+            for handler in self._logger.handlers:
+                handler.close()
+
+            self._logger = None
+
+
+    def _explain(self, sql: str, parameters) -> list[str]:
+        if not sql.lstrip()[:7].upper().startswith(_EXPLAINABLE) or parameters is None:
+            return []
+
+        try:
+            # The plan is read through a plain Cursor, so that asking for it isn't
+            # itself instrumented.
+            cursor = sqlite3.Cursor(self._connection)
+
+            try:
+                return [row[3] for row in cursor.execute(f'EXPLAIN QUERY PLAN {sql}', parameters)]
+            finally:
+                cursor.close()
+        except sqlite3.Error:
+            return []
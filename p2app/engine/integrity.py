@@ -0,0 +1,218 @@
+# p2app/engine/integrity.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# A scanner that checks the data already in a database for the kinds of
+# inconsistency the engine guards against when rows are saved, but that nothing
+# catches in rows that were imported or edited elsewhere: references to rows that
+# don't exist (via PRAGMA foreign_key_check), and rows whose references disagree
+# with each other, such as a region whose continent isn't its country's.
+#
+# Each consistency check is a single set-based query, joining a table to the
+# tables it refers to.  Large tables are split into ranges of rowids, and the
+# ranges (along with each table's foreign key check) are checked in parallel by a
+# pool of threads, each on its own read-only connection; sqlite3 releases the GIL
+# while SQLite executes a statement, so the threads genuinely run at the same time.
+#
+# The readers each see the database as it is when they start, so the scan should
+# be run while nothing else is writing to the database.  The engine does this by
+# scanning while it processes an event, when it can't be saving anything.
+
+import concurrent.futures
+import json
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+from . import backups
+
+
+# How many rowids each range of a split table covers.
+_RANGE_SIZE = 20_000
+
+# At most this many violations of each check are listed in a report; the rest are
+# only counted.
+_MAX_LISTED_VIOLATIONS = 1000
+
+_FOREIGN_KEY_CHECK = 'foreign_key'
+
+
+
+# A check of the rows of one table.  Its SQL selects the rowid of each row that
+# violates the check, among the rows with rowids between :low and :high, along with
+# the values named by details.
+ConsistencyCheck = namedtuple(
+    'ConsistencyCheck', ['name', 'table', 'description', 'sql', 'details'])
+
+
+_CONSISTENCY_CHECKS = [
+    ConsistencyCheck(
+        'region_continent_is_country_continent', 'region',
+        "A region's continent is its country's continent.",
+        'SELECT r.region_id, r.continent_id, c.continent_id'
+        ' FROM region AS r JOIN country AS c ON c.country_id = r.country_id'
+        ' WHERE r.region_id BETWEEN :low AND :high AND r.continent_id != c.continent_id',
+        ('continent_id', 'country_continent_id')),
+    ConsistencyCheck(
+        'airport_continent_resolves', 'airport',
+        "An airport's continent_id is the ID of a continent, written as an integer even"
+        " in a database that stores it as text.",
+        'SELECT a.airport_id, a.continent_id FROM airport AS a'
+        ' WHERE a.airport_id BETWEEN :low AND :high'
+        ' AND (a.continent_id != CAST(CAST(a.continent_id AS INTEGER) AS TEXT)'
+        ' OR NOT EXISTS (SELECT 1 FROM continent AS c WHERE c.continent_id = a.continent_id))',
+        ('continent_id',)),
+    ConsistencyCheck(
+        'airport_continent_is_country_continent', 'airport',
+        "An airport's continent is its country's continent.",
+        'SELECT a.airport_id, a.continent_id, c.continent_id'
+        ' FROM airport AS a JOIN country AS c ON c.country_id = a.country_id'
+        ' WHERE a.airport_id BETWEEN :low AND :high AND a.continent_id != c.continent_id',
+        ('continent_id', 'country_continent_id')),
+    ConsistencyCheck(
+        'airport_country_is_region_country', 'airport',
+        "An airport's country is its region's country.",
+        'SELECT a.airport_id, a.country_id, r.country_id'
+        ' FROM airport AS a JOIN region AS r ON r.region_id = a.region_id'
+        ' WHERE a.airport_id BETWEEN :low AND :high AND a.country_id != r.country_id',
+        ('country_id', 'region_country_id'))
+]
+
+
+
+def scan(path: str | os.PathLike, workers: int | None = None,
+         range_size: int = _RANGE_SIZE) -> dict:
+    """Scans the database at the given path, returning a report that can be written
+    as JSON (see write_report).  workers is the number of threads to scan with, which
+    defaults to one per processor (at most eight).  Raises sqlite3.Error if the
+    database can't be read."""
+    started_at = time.perf_counter()
+    uri = backups.read_only_uri(path)
+
+    connection = sqlite3.connect(uri, uri = True)
+
+    try:
+        tables = _tables(connection)
+        # A task whose check is None checks the foreign keys of a whole table.
+        tasks = [(None, table, None, None) for table in tables]
+
+        for check in _CONSISTENCY_CHECKS:
+            if check.table in tables:
+                for low, high in _rowid_ranges(connection, check.table, range_size):
+                    tasks.append((check, check.table, low, high))
+    finally:
+        connection.close()
+
+    if workers is None:
+        workers = min(8, os.cpu_count() or 1)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+        task_violations = list(executor.map(lambda task: _run_task(uri, *task), tasks))
+
+    return _report(path, tables, tasks, task_violations, time.perf_counter() - started_at)
+
+
+def write_report(report: dict, path: str | os.PathLike):
+    with open(path, 'w', encoding = 'utf-8') as report_file:
+        json.dump(report, report_file, indent = 2)
+
+
+def _tables(connection: sqlite3.Connection) -> list[str]:
+    return [
+        name for (name,) in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name;")]
+
+
+def _rowid_ranges(connection: sqlite3.Connection, table: str, range_size: int):
+    low, high = connection.execute(f'SELECT MIN(rowid), MAX(rowid) FROM {table};').fetchone()
+
+    if low is None:
+        return
+
+    while low <= high:
+        yield low, min(high, low + range_size - 1)
+        low += range_size
+
+
+def _run_task(uri: str, check: ConsistencyCheck | None, table: str,
+              low: int | None, high: int | None) -> list[dict]:
+    connection = sqlite3.connect(uri, uri = True)
+
+    try:
+        if check is None:
+            return _check_foreign_keys(connection, table)
+        else:
+            return _check_consistency(connection, check, low, high)
+    finally:
+        connection.close()
+
+
+def _check_foreign_keys(connection: sqlite3.Connection, table: str) -> list[dict]:
+    columns = {
+        key_id: from_column
+        for key_id, _, _, from_column, *_ in connection.execute(f'PRAGMA foreign_key_list({table});')}
+
+    return [
+        {
+            'check': _FOREIGN_KEY_CHECK,
+            'table': table,
+            'rowid': rowid,
+            'details': {'column': columns.get(key_id), 'parent': parent}
+        }
+        for _, rowid, parent, key_id in connection.execute(f'PRAGMA foreign_key_check({table});')]
+
+
+def _check_consistency(connection: sqlite3.Connection, check: ConsistencyCheck,
+                       low: int, high: int) -> list[dict]:
+    return [
+        {
+            'check': check.name,
+            'table': check.table,
+            'rowid': rowid,
+            'details': dict(zip(check.details, values))
+        }
+        for rowid, *values in connection.execute(check.sql, {'low': low, 'high': high})]
+
+
+def _report(path, tables: list[str], tasks: list[tuple], task_violations: list[list[dict]],
+            elapsed: float) -> dict:
+    counts = {}
+    listed = []
+
+    for violations in task_violations:
+        for violation in violations:
+            count = counts.get(violation['check'], 0)
+
+            if count < _MAX_LISTED_VIOLATIONS:
+                listed.append(violation)
+
+            counts[violation['check']] = count + 1
+
+    checks = [
+        {
+            'name': _FOREIGN_KEY_CHECK,
+            'tables': tables,
+            'description': 'Every foreign key refers to an existing row.'
+        }
+    ]
+
+    checks.extend(
+        {'name': check.name, 'tables': [check.table], 'description': check.description}
+        for check in _CONSISTENCY_CHECKS
+        if check.table in tables)
+
+    for check in checks:
+        check['violations'] = counts.get(check['name'], 0)
+        check['truncated'] = check['violations'] > _MAX_LISTED_VIOLATIONS
+
+    return {
+        'database': os.fspath(path),
+        'ok': not counts,
+        'violation_count': sum(counts.values()),
+        'elapsed': elapsed,
+        'tasks': len(tasks),
+        'checks': checks,
+        'violations': listed
+    }
@@ -0,0 +1,185 @@
+# p2app/engine/keywords.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# A normalized keyword table, which acts as an inverted index from each keyword
+# to the countries, regions and airports that list it, so that keyword searches
+# are index seeks rather than scans over comma-separated text.
+#
+# The table is created, and filled from the keywords already in the database, by a
+# migration (see migrations.py), so that nothing is added to a database unless its
+# user agrees to it.  Until then, keyword searches scan the keywords column instead.
+
+import json
+import sqlite3
+
+from . import rows
+from .normalize import normalize_name
+
+
+# The tables whose keywords are indexed, along with their ID columns.
+KEYWORD_TABLES = {
+    'country': 'country_id',
+    'region': 'region_id',
+    'airport': 'airport_id'
+}
+
+# Columns in which earlier versions of the engine stored the string 'NULL' rather
+# than an actual NULL when a field was left empty.
+_NULLABLE_TEXT_COLUMNS = [
+    ('country', 'keywords'),
+    ('region', 'wikipedia_link'),
+    ('region', 'keywords')
+]
+
+
+
+def tokenize(keywords: str | None) -> set[str]:
+    """Returns the set of normalized keywords in a comma-separated keyword list."""
+    if not keywords:
+        return set()
+
+    tokens = (normalize_name(keyword) for keyword in keywords.split(','))
+    return {token for token in tokens if token}
+
+
+def has_index(connection: sqlite3.Connection, schema: str = 'main') -> bool:
+    """Returns True if the given schema (by default, the open database's) has a
+    keyword table."""
+    cursor = connection.execute(
+        f"SELECT 1 FROM \"{schema}\".sqlite_master WHERE type = 'table' AND name = 'keyword_index';")
+
+    try:
+        return cursor.fetchone() is not None
+    finally:
+        cursor.close()
+
+
+def create_index(connection: sqlite3.Connection):
+    """Creates the keyword table, filling it from the keywords already in the
+    database."""
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS keyword_index ('
+        'keyword TEXT NOT NULL, entity TEXT NOT NULL, entity_id INTEGER NOT NULL, '
+        'PRIMARY KEY (keyword, entity, entity_id)) STRICT, WITHOUT ROWID;')
+    connection.execute(
+        'CREATE INDEX IF NOT EXISTS keyword_index_entity ON keyword_index (entity, entity_id);')
+
+    for table, id_column in KEYWORD_TABLES.items():
+        cursor = connection.execute(
+            f'SELECT {id_column}, keywords FROM {table} WHERE keywords IS NOT NULL;')
+        connection.executemany(
+            'INSERT OR IGNORE INTO keyword_index (keyword, entity, entity_id) VALUES (?, ?, ?);',
+            ((token, table, row_id) for row_id, keywords in cursor for token in tokenize(keywords)))
+        cursor.close()
+
+
+def has_null_strings(connection: sqlite3.Connection) -> bool:
+    """Returns True if any of the columns in which earlier versions of the engine
+    stored the string 'NULL' still hold one."""
+    return any(
+        connection.execute(f"SELECT 1 FROM {table} WHERE {column} = 'NULL' LIMIT 1;").fetchone()
+        for table, column in _NULLABLE_TEXT_COLUMNS)
+
+
+def replace_null_strings(connection: sqlite3.Connection):
+    """Turns the literal 'NULL' strings left behind by earlier versions of the engine
+    into real NULLs, reindexing the keywords of the rows that had them in place of
+    their keywords, if the keyword table exists."""
+    indexed = has_index(connection)
+
+    for table, column in _NULLABLE_TEXT_COLUMNS:
+        id_column = KEYWORD_TABLES[table]
+        row_ids = [
+            row_id for (row_id,) in connection.execute(
+                f"SELECT {id_column} FROM {table} WHERE {column} = 'NULL';")]
+        connection.execute(f"UPDATE {table} SET {column} = NULL WHERE {column} = 'NULL';")
+
+        if indexed and column == 'keywords':
+            reindex(connection, table, row_ids)
+
+
+def update(connection: sqlite3.Connection, table: str, row_id: int, keywords: str | None):
+    """Replaces the indexed keywords of one row with the ones in the given list."""
+    connection.execute(
+        'DELETE FROM keyword_index WHERE entity = (:entity) AND entity_id = (:entity_id);',
+        (table, row_id))
+    connection.executemany(
+        'INSERT OR IGNORE INTO keyword_index (keyword, entity, entity_id) VALUES (?, ?, ?);',
+        ((token, table, row_id) for token in tokenize(keywords)))
+
+
+def reindex(connection: sqlite3.Connection, table: str, row_ids: list[int], schema: str = 'main'):
+    """Replaces the indexed keywords of the given rows of a table with the ones they
+    list now, in the given schema (by default, the open database's), if that schema
+    has a keyword table."""
+    if not has_index(connection, schema):
+        return
+
+    id_column = KEYWORD_TABLES[table]
+    row_ids = json.dumps(row_ids)
+
+    connection.execute(
+        f'DELETE FROM "{schema}".keyword_index'
+        ' WHERE entity = (:entity) AND entity_id IN (SELECT value FROM json_each(:row_ids));',
+        {'entity': table, 'row_ids': row_ids})
+
+    listed = connection.execute(
+        f'SELECT {id_column}, keywords FROM "{schema}".{table}'
+        f' WHERE {id_column} IN (SELECT value FROM json_each(?)) AND keywords IS NOT NULL;',
+        (row_ids,)).fetchall()
+
+    connection.executemany(
+        f'INSERT OR IGNORE INTO "{schema}".keyword_index (keyword, entity, entity_id) VALUES (?, ?, ?);',
+        ((token, table, row_id) for row_id, keywords in listed for token in tokenize(keywords)))
+
+
+def search(connection: sqlite3.Connection, table: str, keywords: list[str], match_all: bool,
+           record_type = None, indexed: bool = True):
+    """Returns an iterator over the rows of a table that list all (if match_all is
+    True) or any (otherwise) of the given keywords, or None if no keywords were
+    given.  The rows are built as record_type, or are plain tuples if it's None.  If
+    indexed is False, the keywords column is scanned, rather than the keyword table
+    searched.  Either way, the iterator's close method releases its cursor."""
+    tokens = sorted({token for keyword in keywords for token in tokenize(keyword)})
+
+    if not tokens:
+        return None
+
+    id_column = KEYWORD_TABLES[table]
+    columns = ', '.join(record_type._fields) if record_type is not None else '*'
+
+    if not indexed:
+        return _scan(connection, table, set(tokens), match_all, record_type, columns)
+
+    placeholders = ', '.join('?' * len(tokens))
+    having = f'HAVING COUNT(*) = {len(tokens)}' if match_all else ''
+
+    # The unary + keeps SQLite from choosing the (entity, entity_id) index, which would
+    # visit every keyword of every row in the table, over the primary key on keyword.
+    return rows.execute(
+        connection, record_type,
+        f'SELECT {columns} FROM {table} WHERE {id_column} IN ('
+        f'SELECT entity_id FROM keyword_index '
+        f'WHERE keyword IN ({placeholders}) AND +entity = ? '
+        f'GROUP BY entity_id {having}) ORDER BY {id_column};',
+        (*tokens, table))
+
+
+def _scan(connection, table, tokens, match_all, record_type, columns):
+    cursor = rows.execute(
+        connection, record_type,
+        f'SELECT {columns} FROM {table} WHERE keywords IS NOT NULL'
+        f' ORDER BY {KEYWORD_TABLES[table]};')
+
+    try:
+        position = [description[0] for description in cursor.description].index('keywords')
+
+        for row in cursor:
+            listed = tokenize(row[position])
+
+            if tokens <= listed if match_all else not tokens.isdisjoint(listed):
+                yield row
+    finally:
+        cursor.close()
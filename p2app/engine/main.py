@@ -10,14 +10,37 @@
 
 from collections import namedtuple
 
+import json
+import os
 import sqlite3
 
+import p2app.events.airports as airportEvents
 import p2app.events.app as appEvents
+import p2app.events.changes as changeEvents
 import p2app.events.database as dbEvents
+import p2app.events.federation as federationEvents
+import p2app.events.navigation_aids as navaidEvents
 import p2app.events.continents as contEvents
 import p2app.events.countries as countryEvents
 import p2app.events.regions as regionEvents
 from p2app.events import OpenDatabaseEvent
+from p2app.events.airports import Airport, DuplicateAirportCandidate
+from p2app.events.changes import Change
+from p2app.events.navigation_aids import NavigationAid
+from .trigram import TrigramIndex
+import p2app.engine.backups as backups
+import p2app.engine.changes as changes
+import p2app.engine.deadlines as deadlines
+import p2app.engine.duplicates as duplicates
+import p2app.engine.federation as federation
+import p2app.engine.instrumentation as instrumentation
+import p2app.engine.integrity as integrity
+import p2app.engine.keywords as keywords
+import p2app.engine.migrations as migrations
+import p2app.engine.normalize as normalize
+import p2app.engine.replicas as replicas
+import p2app.engine.rows as rows
+import p2app.engine.summaries as summaries
 
 Continent = namedtuple('Continent', ['continent_id', 'continent_code', 'name'])
 
@@ -56,6 +79,14 @@ Region.__annotations__ = {
     'keywords': str | None
 }
 
+# The record types of the tables that can be searched across attached databases.
+_FEDERATED_RECORD_TYPES = {
+    'continent': Continent,
+    'country': Country,
+    'region': Region,
+    'airport': Airport
+}
+
 class Engine:
     """An object that represents the application's engine, whose main role is to
     process events sent to it by the user interface, then generate events that are
@@ -63,29 +94,107 @@ class Engine:
     unaware of any details of how the engine is implemented.
     """
 
-    def __init__(self):
-        """Initializes the engine"""
+    def __init__(self, instrument = False, slow_query_log = None, slow_query_threshold = 0.1,
+                 budgets = None, replica = False, replica_max_bytes = replicas.DEFAULT_MAX_BYTES,
+                 change_log = False):
+        """Initializes the engine. If instrument is True, or a slow_query_log path is
+        given, every statement the engine executes is timed and its query plan is
+        captured; statements taking at least slow_query_threshold seconds, along with
+        those that scan whole tables, are written to the slow query log. budgets maps
+        the names of event types to the number of seconds the engine may spend
+        processing them (or None, for no limit), overriding the defaults in deadlines.py.
+        If replica is True, each database is copied into memory when it's opened, and
+        searches and loads are served from the copy, while saves are written to both
+        (see replicas.py); a database whose copy is estimated to need more than
+        replica_max_bytes is used from disk instead. An instrumented engine measures
+        the database on disk, so it never uses a replica. If change_log is True, the
+        migrations offered when a database is opened include one that logs the changes
+        made to it, so that they can be listed (see changes.py)."""
         self._connection = None
         self._errorEncountered = ""
         self._tempRow = None
+        self._trigramIndexes = {}
+        self._partialTrigramIndexes = {}
+        self._summaryResults = {}
+        self._storedNames = False
+        self._keywordIndex = False
+        self._excludedMigrations = () if change_log else ('change_log',)
+        self._instrument = instrument or slow_query_log is not None
+        self._slowQueryLog = slow_query_log
+        self._slowQueryThreshold = slow_query_threshold
+        self._budgets = budgets
+        self._deadline = deadlines.Deadline()
+        self._replica = replica and not self._instrument
+        self._replicaMaxBytes = replica_max_bytes
+        self._replicaStatus = None
 
     def process_event(self, event):
         """A generator function that processes one event sent from the user interface,
         yielding zero or more events in response."""
         sendBack = None
         self._errorEncountered = ""
+        self._deadline.start(deadlines.budget_for(type(event).__name__, self._budgets))
+        if type(event).__name__.startswith('Save'):
+            # A save can change which rows any search matches.
+            self._summaryResults = {}
         match type(event):
             case(appEvents.QuitInitiatedEvent):
                 sendBack = appEvents.EndApplicationEvent()
 
             case(dbEvents.OpenDatabaseEvent):
+                self._trigramIndexes = {}
+                self._partialTrigramIndexes = {}
+                self._summaryResults = {}
                 sendBack = dbEvents.DatabaseOpenedEvent(event.path()) if (
                     self._OpenDatabase(event.path())) else dbEvents.DatabaseOpenFailedEvent(
                     self._errorEncountered)
                 self._errorEncountered = ""
+                if isinstance(sendBack, dbEvents.DatabaseOpenedEvent):
+                    pending = self._pendingMigrations()
+                    if pending:
+                        yield sendBack
+                        sendBack = dbEvents.DatabaseMigrationNeededEvent(
+                            [migration.description for migration in pending])
             case (dbEvents.CloseDatabaseEvent):
                 self._CloseDatabase()
+                self._trigramIndexes = {}
+                self._partialTrigramIndexes = {}
+                self._summaryResults = {}
                 sendBack = dbEvents.DatabaseClosedEvent()
+            case (dbEvents.MigrateDatabaseEvent):
+                applied = self._migrateDatabase()
+                if applied is not None:
+                    sendBack = dbEvents.DatabaseMigratedEvent(applied)
+            case (dbEvents.CheckIntegrityEvent):
+                report = self._checkIntegrity(event.report_path())
+                if report is not None:
+                    sendBack = dbEvents.IntegrityCheckedEvent(report)
+            case (dbEvents.BackupDatabaseEvent):
+                bgen = self._backupDatabase(event.path(), event.pages_per_step())
+                p = next(bgen)
+                while p is not None:
+                    yield dbEvents.BackupProgressEvent(*p)
+                    p = next(bgen)
+                if self._errorEncountered == "":
+                    result = self._checkBackup(event.path())
+                    if result is not None:
+                        sendBack = dbEvents.DatabaseBackedUpEvent(event.path(), result)
+            case (dbEvents.RestoreDatabaseEvent):
+                rgen = self._restoreDatabase(event.path(), event.pages_per_step())
+                p = next(rgen)
+                while p is not None:
+                    yield dbEvents.BackupProgressEvent(*p)
+                    p = next(rgen)
+                self._trigramIndexes = {}
+                self._partialTrigramIndexes = {}
+                self._summaryResults = {}
+                if self._errorEncountered == "":
+                    sendBack = dbEvents.DatabaseRestoredEvent(event.path())
+                    pending = self._pendingMigrations()
+                    if pending:
+                        yield sendBack
+                        sendBack = dbEvents.DatabaseMigrationNeededEvent(
+                            [migration.description for migration in pending])
 
             case (contEvents.StartContinentSearchEvent):
                 cgen = self._searchContinents(event.name(), event.continent_code())
@@ -98,6 +207,18 @@ class Engine:
                     if self._errorEncountered != "":
                         c = None
 
+            case (contEvents.StartContinentSummarySearchEvent):
+                query = {'continent_code': event.continent_code(), 'name': event.name()}
+                cgen = self._searchContinents(event.name(), event.continent_code(), contEvents.ContinentSummary)
+                for c in self._summarySearch('continent', query, cgen):
+                    yield contEvents.ContinentSummarySearchResultEvent(c)
+                sendBack = contEvents.ContinentSummarySearchCompletedEvent()
+
+            case (contEvents.LoadContinentSummariesEvent):
+                loaded = self._loadSummaries('continent', contEvents.ContinentSummary, event.continent_ids())
+                if loaded is not None:
+                    sendBack = contEvents.ContinentSummariesLoadedEvent(loaded)
+
             case (contEvents.LoadContinentEvent):
                 sendBack = contEvents.ContinentLoadedEvent(self._loadContinent(event.continent_id()))
 
@@ -124,6 +245,22 @@ class Engine:
                     if self._errorEncountered != "":
                         c = None
 
+            case (countryEvents.StartCountrySummarySearchEvent):
+                query = {'country_code': event.country_code(), 'name': event.name()}
+                cgen = self._searchCountries(event.name(), event.country_code(), countryEvents.CountrySummary)
+                for c in self._summarySearch('country', query, cgen):
+                    yield countryEvents.CountrySummarySearchResultEvent(c)
+                sendBack = countryEvents.CountrySummarySearchCompletedEvent()
+
+            case (countryEvents.LoadCountrySummariesEvent):
+                loaded = self._loadSummaries('country', countryEvents.CountrySummary, event.country_ids())
+                if loaded is not None:
+                    sendBack = countryEvents.CountrySummariesLoadedEvent(loaded)
+
+            case (countryEvents.StartCountryKeywordSearchEvent):
+                for c in self._keywordSearch('country', Country, event.keywords(), event.match_all()):
+                    yield countryEvents.CountrySearchResultEvent(c)
+
             case (countryEvents.LoadCountryEvent):
                 sendBack = countryEvents.CountryLoadedEvent(self._loadCountry(event.country_id()))
 
@@ -152,6 +289,28 @@ class Engine:
                     if self._errorEncountered != "":
                         r = None
 
+            case (regionEvents.StartRegionSummarySearchEvent):
+                query = {'region_code': event.region_code(), 'local_code': event.local_code(),
+                         'name': event.name()}
+                rgen = self._searchRegions(event.name(), event.region_code(), event.local_code(),
+                                           regionEvents.RegionSummary)
+                for r in self._summarySearch('region', query, rgen):
+                    yield regionEvents.RegionSummarySearchResultEvent(r)
+                sendBack = regionEvents.RegionSummarySearchCompletedEvent()
+
+            case (regionEvents.LoadRegionSummariesEvent):
+                loaded = self._loadSummaries('region', regionEvents.RegionSummary, event.region_ids())
+                if loaded is not None:
+                    sendBack = regionEvents.RegionSummariesLoadedEvent(loaded)
+
+            case (regionEvents.StartRegionFuzzySearchEvent):
+                for r in self._fuzzySearchRegions(event.name(), event.limit()):
+                    yield regionEvents.RegionSearchResultEvent(r)
+
+            case (regionEvents.StartRegionKeywordSearchEvent):
+                for r in self._keywordSearch('region', Region, event.keywords(), event.match_all()):
+                    yield regionEvents.RegionSearchResultEvent(r)
+
             case (regionEvents.LoadRegionEvent):
                 sendBack = regionEvents.RegionLoadedEvent(self._loadRegion(event.region_id()))
 
@@ -169,8 +328,99 @@ class Engine:
                     self._errorEncountered)
                 self._errorEncountered = ""
 
-        if self._errorEncountered != "":
+            case (airportEvents.StartAirportFuzzySearchEvent):
+                for a in self._fuzzySearchAirports(event.name(), event.limit()):
+                    yield airportEvents.AirportSearchResultEvent(a)
+
+            case (airportEvents.StartAirportKeywordSearchEvent):
+                for a in self._keywordSearch('airport', Airport, event.keywords(), event.match_all()):
+                    yield airportEvents.AirportSearchResultEvent(a)
+
+            case (airportEvents.FindDuplicateAirportsEvent):
+                count = 0
+                dgen = self._findDuplicateAirports(event.max_distance_m(), event.min_similarity())
+                d = next(dgen)
+                while d is not None:
+                    yield airportEvents.DuplicateAirportCandidateEvent(d)
+                    count += 1
+                    d = next(dgen)
+                if self._errorEncountered == "":
+                    sendBack = airportEvents.DuplicateAirportsFoundEvent(count)
+
+            case (airportEvents.LoadAirportEvent):
+                sendBack = airportEvents.AirportLoadedEvent(self._loadAirport(event.airport_id()))
+
+            case (changeEvents.ListChangesEvent):
+                last_sequence = event.since_sequence()
+                cgen = self._listChanges(event.since_sequence(), event.limit())
+                c = next(cgen)
+                if self._errorEncountered != "":
+                    c = None
+                while c is not None:
+                    yield changeEvents.ChangeResultEvent(c)
+                    last_sequence = c.sequence
+                    c = next(cgen)
+                    if self._errorEncountered != "":
+                        c = None
+                sendBack = changeEvents.ChangesListedEvent(last_sequence)
+
+            case (changeEvents.CompactChangeLogEvent):
+                removed = self._compactChangeLog()
+                if removed is not None:
+                    sendBack = changeEvents.ChangeLogCompactedEvent(removed)
+
+            case (navaidEvents.StartNavigationAidSearchEvent):
+                ngen = self._searchNavigationAids(event.ident(), event.navigation_aid_type(),
+                                                  event.frequency_khz(), event.airport_id())
+                n = next(ngen)
+                if self._errorEncountered != "":
+                    n = None
+                while n is not None:
+                    yield navaidEvents.NavigationAidSearchResultEvent(n)
+                    n = next(ngen)
+                    if self._errorEncountered != "":
+                        n = None
+
+            case (federationEvents.AttachDatabaseEvent):
+                if self._attachDatabase(event.path(), event.alias()):
+                    sendBack = federationEvents.DatabaseAttachedEvent(event.path(), event.alias())
+
+            case (federationEvents.DetachDatabaseEvent):
+                if self._detachDatabase(event.alias()):
+                    sendBack = federationEvents.DatabaseDetachedEvent(event.alias())
+
+            case (federationEvents.StartFederatedSearchEvent):
+                fgen = self._federatedSearch(event.table_name(), event.code(), event.name())
+                f = next(fgen)
+                if self._errorEncountered != "":
+                    f = None
+                while f is not None:
+                    yield federationEvents.FederatedSearchResultEvent(*f)
+                    f = next(fgen)
+                    if self._errorEncountered != "":
+                        f = None
+
+            case (federationEvents.CopyRecordsEvent):
+                count = self._copyRecords(event.table_name(), event.record_ids(), event.source(),
+                                          event.target(), event.replace())
+                if count is not None:
+                    sendBack = federationEvents.RecordsCopiedEvent(
+                        event.table_name(), event.source(), event.target(), count)
+                    if event.target() == 'main':
+                        # The copied records can change which records any search matches.
+                        self._trigramIndexes = {}
+                        self._partialTrigramIndexes = {}
+                        self._summaryResults = {}
+
+            case (navaidEvents.LoadNavigationAidEvent):
+                sendBack = navaidEvents.NavigationAidLoadedEvent(
+                    self._loadNavigationAid(event.navigation_aid_id()))
+
+        if self._deadline.exceeded():
+            sendBack = appEvents.RequestTimedOutEvent(type(event).__name__, self._deadline.budget())
+        elif self._errorEncountered != "":
             sendBack = appEvents.ErrorEvent(self._errorEncountered)
+        self._deadline.clear()
 
         # This is a way to write a generator function that always yields zero values.
         # You'll want to remove this and replace it with your own code, once you start
@@ -179,6 +429,25 @@ class Engine:
             yield from ()
         yield sendBack
 
+    def statement_stats(self):
+        """Returns a summary of each distinct statement executed on the open database,
+        including its query plan and timings, if the engine is instrumented; otherwise,
+        returns an empty list."""
+        if self._connection and isinstance(self._connection, instrumentation.InstrumentedConnection):
+            return self._connection.instruments.statement_stats()
+        return []
+
+    def replica_status(self):
+        """Returns whether the open database is being served from an in-memory replica,
+        along with a description of the replica, or of why there isn't one, if replicas
+        are enabled; otherwise, returns None."""
+        if not self._replica:
+            return None
+        return {
+            'active': isinstance(self._connection, replicas.ReplicaConnection),
+            'description': self._replicaStatus
+        }
+
     def _OpenDatabase(self, path: str) -> bool:
         """This method opens a database. It accepts a path of type str and opens a database
         at said path. If the path does not lead to a valid Database, this function returns
@@ -203,6 +472,157 @@ class Engine:
         else:
             self._errorEncountered = "Database cannot be closed if it has not been opened yet."
 
+    def _migrateDatabase(self):
+        """Applies the migrations the open database still needs (see migrations.py),
+        returning the descriptions of those that were applied. Each is applied in a
+        transaction of its own, so if one fails, an error event will be triggered, the
+        database is left as that migration found it, and None is returned.
+        """
+        if self._connection is None:
+            self._errorEncountered = "Database cannot be migrated if it has not been opened yet."
+            return None
+        applied = []
+        try:
+            for migration in self._pendingMigrations():
+                migrations.apply(self._connection, migration)
+                applied.append(migration.description)
+        except migrations.MigrationError as e:
+            self._errorEncountered = f"Database could not be migrated. {e}"
+            applied = None
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered while migrating the database."
+            applied = None
+        # The migrations that were applied change how the database is searched.
+        self._inspectSchema(self._connection)
+        return applied
+
+    def _pendingMigrations(self):
+        """Returns the migrations the open database still needs (see migrations.py), other
+        than those this engine wasn't asked to offer.
+        """
+        return migrations.pending(self._connection, self._excludedMigrations)
+
+    def _inspectSchema(self, connection):
+        """Notes which of the columns and indexes that migrations add (see migrations.py)
+        the database on the given connection has, since some searches are written
+        differently with them than without them.
+        """
+        self._storedNames = normalize.has_stored_names(connection)
+        self._keywordIndex = keywords.has_index(connection)
+
+    def _checkIntegrity(self, report_path = None):
+        """Scans the open database for rows referring to rows that don't exist, or whose
+        references disagree with each other (see integrity.py), returning the report of
+        the scan, which is also written as JSON to report_path if one is given. The scan
+        reads the database file on connections of its own, so a database that isn't
+        stored in a file can't be scanned. If an error is encountered, an error event
+        will be triggered and None is returned.
+        """
+        if self._connection is None:
+            self._errorEncountered = "Integrity cannot be checked if a database has not been opened yet."
+            return None
+        path = self._databaseFile()
+        if path is None:
+            self._errorEncountered = "Integrity can only be checked in a database stored in a file."
+            return None
+        try:
+            report = integrity.scan(path)
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered while checking integrity."
+            return None
+        if report_path is not None:
+            try:
+                integrity.write_report(report, report_path)
+            except OSError:
+                self._errorEncountered = "Integrity was checked, but the report could not be written."
+                return None
+        return report
+
+    def _databaseFile(self):
+        """Returns the path of the file in which the open database is stored, or None if
+        it isn't stored in a file."""
+        path = self._connection.execute('PRAGMA database_list;').fetchone()[2]
+        return path if path != '' else None
+
+    def _backupDatabase(self, path, pages_per_step = None):
+        """This method is a generator that copies the open database to the file at the given
+        path, replacing whatever is stored there, using SQLite's online backup API (see
+        backups.py). The database is copied pages_per_step pages at a time, and after each
+        step, a (remaining, total) pair of page counts is generated, followed by None once the
+        copy is done. The database stays usable between steps, and if it is written to
+        partway through, the copy starts over. If an error is encountered, an error event
+        will be triggered and None is generated.
+        """
+        if self._connection is None:
+            self._errorEncountered = "Database cannot be backed up if it has not been opened yet."
+        elif self._databaseFile() is None:
+            self._errorEncountered = "Only a database stored in a file can be backed up."
+        elif os.path.realpath(path) == os.path.realpath(self._databaseFile()):
+            self._errorEncountered = "Database cannot be backed up over itself."
+        else:
+            try:
+                for progress in backups.copy(self._databaseFile(), path,
+                                             pages_per_step or backups.PAGES_PER_STEP):
+                    yield progress
+            except sqlite3.Error:
+                self._errorEncountered = "Error encountered while backing up the database."
+        yield None
+
+    def _checkBackup(self, path):
+        """Checks the integrity of the backup at the given path, returning ['ok'] if it has
+        no problems, or a description of each problem otherwise. If the backup can't be
+        read, an error event will be triggered and None is returned.
+        """
+        try:
+            return backups.check_integrity(path)
+        except sqlite3.Error:
+            self._errorEncountered = "Backup could not be read to check its integrity."
+            return None
+
+    def _restoreDatabase(self, path, pages_per_step = None):
+        """This method is a generator that replaces the open database with the backup at
+        the given path, generating (remaining, total) pairs of page counts as it's copied,
+        the same way _backupDatabase does, followed by None. The backup's integrity is
+        checked first, and a backup with any problems is not restored. The database is
+        closed while it's restored and opened again afterward; if the copy fails partway,
+        the database is left as it was. If an error is encountered, an error event will be
+        triggered and None is generated.
+        """
+        if self._connection is None:
+            self._errorEncountered = "Database cannot be restored if it has not been opened yet."
+            yield None
+            return
+        live = self._databaseFile()
+        if live is None:
+            self._errorEncountered = "Only a database stored in a file can be restored."
+            yield None
+            return
+        if os.path.realpath(path) == os.path.realpath(live):
+            self._errorEncountered = "Database cannot be restored from itself."
+            yield None
+            return
+        integrity = self._checkBackup(path)
+        if integrity is None:
+            yield None
+            return
+        if integrity != ['ok']:
+            self._errorEncountered = "Backup failed its integrity check, so it was not restored."
+            yield None
+            return
+        self._connection.close()
+        self._connection = None
+        try:
+            for progress in backups.copy(path, live, pages_per_step or backups.PAGES_PER_STEP):
+                yield progress
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered while restoring the database."
+        error = self._errorEncountered
+        if not self._OpenDatabase(live):
+            self._connection = None
+            error = "Database was restored, but could not be opened again."
+        self._errorEncountered = error
+        yield None
+
 
     def _connect(self, database_path):
         """This method is a helper method of open database. It accepts a path of type str and
@@ -211,11 +631,19 @@ class Engine:
         If no problems arise, this function returns true to signal that the connection has been
         successfully made.
         """
-        connection = sqlite3.connect(database_path, isolation_level = None)
+        if self._instrument:
+            connection = sqlite3.connect(
+                database_path, isolation_level = None, factory = instrumentation.InstrumentedConnection)
+            connection.instruments.configure(self._slowQueryLog, self._slowQueryThreshold)
+        else:
+            connection = sqlite3.connect(database_path, isolation_level = None)
         cursor = None
         try:
             cursor = connection.execute('PRAGMA foreign_keys = ON;')
-            valid = connection.execute('PRAGMA schema_version;')
+            valid = connection.execute('PRAGMA schema_version;').fetchone()[0]
+            normalize.register_functions(connection)
+            self._deadline.install(connection)
+            self._inspectSchema(connection)
         except sqlite3.Error:
             self._errorEncountered = "Database invalid."
             if cursor is not None:
@@ -229,28 +657,54 @@ class Engine:
         if valid == 0:
             self._errorEncountered = "Database invalid."
             return False
+        if self._replica:
+            return self._replicate(connection)
         return connection
 
-    def _searchContinents(self, name = None, code = None):
+    def _replicate(self, connection):
+        """This method is a helper method of _connect. It copies the database on the given
+        connection into an in-memory replica, returning the replica's connection, which
+        writes through to the given one. If the replica would need too much memory, or
+        can't be made, the given connection is returned as it is, so the database is used
+        from disk.
+        """
+        replica, self._replicaStatus = replicas.replicate(connection, self._replicaMaxBytes)
+        if replica is None:
+            return connection
+        try:
+            normalize.register_functions(replica)
+            self._deadline.install(replica)
+        except sqlite3.Error as e:
+            sqlite3.Connection.close(replica)
+            self._replicaStatus = f'The replica could not be set up: {e}'
+            return connection
+        return replica
+
+    def _searchContinents(self, name = None, code = None, record_type = Continent):
         """This method is a generator that searches for a continent given a name and/or a code.
         It then generates continents that match the exactly specified query. If a continent is not
         found, nothing will be generated. If an error is encountered, an error event will be
-        triggered and nothing will be generated.
+        triggered and nothing will be generated. Only the columns named by the fields of
+        record_type are selected, so searches for ContinentSummary records read nothing more than
+        their covering indexes.
         """
+        name = normalize.normalize_name(name) if name is not None else None
+        columns = ', '.join(record_type._fields)
+        match = normalize.name_condition(self._storedNames)
         cursor = None
         if code is None and name is None:
             self._errorEncountered = "Invalid name/code specified."
             yield None
         try:
             if code is None:
-                cursor = self._connection.execute('SELECT * FROM continent WHERE name = (:name);', (name,))
+                cursor = rows.execute(self._connection, record_type, f'SELECT {columns} FROM continent WHERE {match};', (name,))
             elif name is None:
-                cursor = self._connection.execute('SELECT * FROM continent WHERE continent_code = (:continent_code);', (code,))
+                cursor = rows.execute(self._connection, record_type, f'SELECT {columns} FROM continent WHERE continent_code = (:continent_code);', (code,))
             else:
-                cursor = self._connection.execute('SELECT * FROM continent WHERE continent_code = (:continent_code) AND name = (:name);', (code, name))
+                cursor = rows.execute(self._connection, record_type, f'SELECT {columns} FROM continent WHERE continent_code = (:continent_code) AND {match};', (code, name))
             c = cursor.fetchone()
             while c is not None:
-                yield Continent(c[0], c[1], c[2])
+                yield c
                 c = cursor.fetchone()
             yield None
         except sqlite3.Error as e:
@@ -261,6 +715,31 @@ class Engine:
         if cursor is not None:
             cursor.close()
 
+    def _loadSummaries(self, table, record_type, record_ids):
+        """This method finds the summaries of the records in the given table with the given IDs,
+        which search lists show the labels of as they're scrolled into view, rather than keeping
+        every result's. It returns a list of them, in no particular order, leaving out any whose
+        records no longer exist. If an error is encountered, an error event will be triggered and
+        None is returned.
+        """
+        if self._connection is None:
+            self._errorEncountered = "Summaries cannot be loaded if a database has not been opened yet."
+            return None
+        cursor = None
+        try:
+            cursor = rows.execute(
+                self._connection, record_type,
+                f'SELECT {", ".join(record_type._fields)} FROM {table}'
+                f' WHERE {record_type._fields[0]} IN (SELECT value FROM json_each(?));',
+                (json.dumps([int(record_id) for record_id in record_ids]),))
+            return cursor.fetchall()
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered while loading summaries."
+            return None
+        finally:
+            if cursor is not None:
+                cursor.close()
+
     def _loadContinent(self, c_id):
         """This method finds a continent given a continent id. It then returns a continent.
         Since the user does not have direct access to this method, it's unlikely that an
@@ -269,7 +748,7 @@ class Engine:
         """
         cursor = None
         try:
-            cursor = self._connection.execute('SELECT * FROM continent WHERE continent_id = (:continent_id);', (c_id,))
+            cursor = rows.execute(self._connection, Continent, f'SELECT {", ".join(Continent._fields)} FROM continent WHERE continent_id = (:continent_id);', (c_id,))
         except sqlite3.Error:
             self._errorEncountered = "Error encountered while loading a continent."
             if cursor is not None:
@@ -280,7 +759,7 @@ class Engine:
             cursor.close()
             if c is None:
                 self._errorEncountered = "Continent could not be loaded."
-            return Continent(c[0], c[1], c[2])
+            return c
         self._errorEncountered = "Continent could not be loaded."
         return None
 
@@ -291,6 +770,17 @@ class Engine:
         save locations, etc., the method will not save the continent and return False while
         specifying an error message. Otherwise, if the continent was saved successfully, it
         returns true.
+        The row and the engine's indexes of it are written within one savepoint, so if
+        either can't be written, neither is.
+        """
+        return self._withinSavepoint(
+            lambda: self._writeContinent(continent, newContinent) and self._indexSavedContinent(
+                self._tempRow if newContinent else continent))
+
+    def _writeContinent(self, continent: Continent, newContinent = True):
+        """This method is a helper method of _saveContinent. It inserts or updates the row of
+        the continent specified, returning True if it was written, or False while specifying
+        an error message if it was not.
         """
         cursor = None
         try:
@@ -338,26 +828,31 @@ class Engine:
         return False
 
 
-    def _searchCountries(self, name = None, code = None):
+    def _searchCountries(self, name = None, code = None, record_type = Country):
         """This method is a generator that searches for a country given a name and/or a code.
         It then generates countries that match the exactly specified query. If a country is not
         found, nothing will be generated. If an error is encountered, an error event will be
-        triggered and nothing will be generated.
+        triggered and nothing will be generated. Only the columns named by the fields of
+        record_type are selected, so searches for CountrySummary records read nothing more than
+        their covering indexes.
         """
+        name = normalize.normalize_name(name) if name is not None else None
+        columns = ', '.join(record_type._fields)
+        match = normalize.name_condition(self._storedNames)
         cursor = None
         if code is None and name is None:
             self._errorEncountered = "Invalid name/code specified."
             yield None
         try:
             if code is None:
-                cursor = self._connection.execute('SELECT * FROM country WHERE name = (:name);', (name,))
+                cursor = rows.execute(self._connection, record_type, f'SELECT {columns} FROM country WHERE {match};', (name,))
             elif name is None:
-                cursor = self._connection.execute('SELECT * FROM country WHERE country_code = (:country_code);', (code,))
+                cursor = rows.execute(self._connection, record_type, f'SELECT {columns} FROM country WHERE country_code = (:country_code);', (code,))
             else:
-                cursor = self._connection.execute('SELECT * FROM country WHERE country_code = (:country_code) AND name = (:name);', (code, name))
+                cursor = rows.execute(self._connection, record_type, f'SELECT {columns} FROM country WHERE country_code = (:country_code) AND {match};', (code, name))
             c = cursor.fetchone()
             while c is not None:
-                yield Country(c[0], c[1], c[2], c[3], c[4], c[5])
+                yield c
                 c = cursor.fetchone()
             yield None
         except sqlite3.Error as e:
@@ -376,7 +871,7 @@ class Engine:
         """
         cursor = None
         try:
-            cursor = self._connection.execute('SELECT * FROM country WHERE country_id = (:country_id);', (c_id,))
+            cursor = rows.execute(self._connection, Country, f'SELECT {", ".join(Country._fields)} FROM country WHERE country_id = (:country_id);', (c_id,))
         except sqlite3.Error:
             self._errorEncountered = "Error encountered while loading a country."
             if cursor is not None:
@@ -387,7 +882,7 @@ class Engine:
             cursor.close()
             if c is None:
                 self._errorEncountered = "Country could not be loaded."
-            return Country(c[0], c[1], c[2], c[3], c[4], c[5])
+            return c
         self._errorEncountered = "Country could not be loaded."
         return None
 
@@ -398,6 +893,17 @@ class Engine:
         save locations, etc., the method will not save the country and return False while
         specifying an error message. Otherwise, if the country was saved successfully, it
         returns true.
+        The row and the engine's indexes of it are written within one savepoint, so if
+        either can't be written, neither is.
+        """
+        return self._withinSavepoint(
+            lambda: self._writeCountry(country, newCountry) and self._indexSavedCountry(
+                self._tempRow if newCountry else country))
+
+    def _writeCountry(self, country: Country, newCountry = True):
+        """This method is a helper method of _saveCountry. It inserts or updates the row of
+        the country specified, returning True if it was written, or False while specifying
+        an error message if it was not.
         """
         cursor = None
         try:
@@ -430,7 +936,7 @@ class Engine:
                 if country[5] == "":
                     cursor = self._connection.execute(
                         'INSERT INTO country (country_id,country_code,name, continent_id, wikipedia_link, keywords) VALUES (:country_id, :country_code, :name, :continent_id, :wikipedia_link, :keywords);',
-                        (tempID+1, country[1], country[2], country[3], country[4], 'NULL'))
+                        (tempID+1, country[1], country[2], country[3], country[4], None))
                 else:
                     cursor = self._connection.execute(
                         'INSERT INTO country (country_id,country_code,name, continent_id, wikipedia_link, keywords) VALUES (:country_id, :country_code, :name, :continent_id, :wikipedia_link, :keywords);',
@@ -465,7 +971,7 @@ class Engine:
                 if country[5] == "":
                     cursor = self._connection.execute(
                         'UPDATE country SET country_id = (:country_id), country_code = (:country_code), name = (:name), continent_id = (:continent_id), wikipedia_link = (:wikipedia_link), keywords = (:keywords) WHERE country_id = (:id);',
-                        (country[0], country[1], country[2], country[3], country[4], 'NULL',
+                        (country[0], country[1], country[2], country[3], country[4], None,
                          country[0]))
                 else:
                     cursor = self._connection.execute(
@@ -483,12 +989,17 @@ class Engine:
             return True
         return False
 
-    def _searchRegions(self, name = None, code = None, local_code = None):
+    def _searchRegions(self, name = None, code = None, local_code = None, record_type = Region):
         """This method is a generator that searches for a region given a name and/or a code.
         It then generates regions that match the exactly specified query. If a region is not
         found, nothing will be generated. If an error is encountered, an error event will be
-        triggered and nothing will be generated.
+        triggered and nothing will be generated. Only the columns named by the fields of
+        record_type are selected, so searches for RegionSummary records read nothing more than
+        their covering indexes.
         """
+        name = normalize.normalize_name(name) if name is not None else None
+        columns = ', '.join(record_type._fields)
+        match = normalize.name_condition(self._storedNames)
         cursor = None
         if code is None and name is None and local_code is None:
             self._errorEncountered = "Invalid name/code specified."
@@ -496,41 +1007,44 @@ class Engine:
         try:
             if code is None:
                 if local_code is None:
-                    cursor = self._connection.execute('SELECT * FROM region WHERE name = (:name);', (name,))
+                    cursor = rows.execute(self._connection, record_type, f'SELECT {columns} FROM region WHERE {match};', (name,))
                 elif name is None:
-                    cursor = self._connection.execute('SELECT * FROM region WHERE local_code = (:local_code);',
-                                                      (local_code,))
+                    cursor = rows.execute(self._connection, record_type, f'SELECT {columns} FROM region WHERE local_code = (:local_code);',
+                                          (local_code,))
                 else:
-                    cursor = self._connection.execute(
-                        'SELECT * FROM region WHERE local_code = (:local_code) AND name = (:name);',
+                    cursor = rows.execute(
+                        self._connection, record_type,
+                        f'SELECT {columns} FROM region WHERE local_code = (:local_code) AND {match};',
                         (local_code, name))
 
             elif name is None:
                 if local_code is None:
-                    cursor = self._connection.execute('SELECT * FROM region WHERE region_code = (:region_code);', (code,))
+                    cursor = rows.execute(self._connection, record_type, f'SELECT {columns} FROM region WHERE region_code = (:region_code);', (code,))
                 elif code is None:
-                    cursor = self._connection.execute('SELECT * FROM region WHERE local_code = (:local_code);',
-                                                      (local_code,))
+                    cursor = rows.execute(self._connection, record_type, f'SELECT {columns} FROM region WHERE local_code = (:local_code);',
+                                          (local_code,))
                 else:
-                    cursor = self._connection.execute(
-                        'SELECT * FROM region WHERE local_code = (:local_code) AND region_code = (:code);',
+                    cursor = rows.execute(
+                        self._connection, record_type,
+                        f'SELECT {columns} FROM region WHERE local_code = (:local_code) AND region_code = (:code);',
                         (local_code, code))
 
             elif local_code is None:
                 if name is None:
-                    cursor = self._connection.execute('SELECT * FROM region WHERE region_code = (:region_code);', (code,))
+                    cursor = rows.execute(self._connection, record_type, f'SELECT {columns} FROM region WHERE region_code = (:region_code);', (code,))
                 elif code is None:
-                    cursor = self._connection.execute('SELECT * FROM region WHERE name = (:name);', (name,))
+                    cursor = rows.execute(self._connection, record_type, f'SELECT {columns} FROM region WHERE {match};', (name,))
                 else:
-                    cursor = self._connection.execute(
-                        'SELECT * FROM region WHERE region_code = (:region_code) AND name = (:name);',
+                    cursor = rows.execute(
+                        self._connection, record_type,
+                        f'SELECT {columns} FROM region WHERE region_code = (:region_code) AND {match};',
                         (code, name))
 
             else:
-                cursor = self._connection.execute('SELECT * FROM region WHERE region_code = (:region_code) AND name = (:name) AND local_code = (:local_code);', (code, name, local_code))
+                cursor = rows.execute(self._connection, record_type, f'SELECT {columns} FROM region WHERE region_code = (:region_code) AND {match} AND local_code = (:local_code);', (code, name, local_code))
             c = cursor.fetchone()
             while c is not None:
-                yield Region(c[0], c[1], c[2], c[3], c[4], c[5], c[6], c[7])
+                yield c
                 c = cursor.fetchone()
             yield None
         except sqlite3.Error as e:
@@ -549,7 +1063,7 @@ class Engine:
         """
         cursor = None
         try:
-            cursor = self._connection.execute('SELECT * FROM region WHERE region_id = (:region_id);', (r_id,))
+            cursor = rows.execute(self._connection, Region, f'SELECT {", ".join(Region._fields)} FROM region WHERE region_id = (:region_id);', (r_id,))
         except sqlite3.Error:
             self._errorEncountered = "Error encountered while loading a region."
             if cursor is not None:
@@ -560,7 +1074,7 @@ class Engine:
             cursor.close()
             if c is None:
                 self._errorEncountered = "region could not be loaded."
-            return Region(c[0], c[1], c[2], c[3], c[4], c[5], c[6], c[7])
+            return c
         self._errorEncountered = "region could not be loaded."
         return None
 
@@ -571,6 +1085,20 @@ class Engine:
         save locations, etc., the method will not save the region and return False while
         specifying an error message. Otherwise, if the region was saved successfully, it
         returns true.
+        The row and the engine's indexes of it are written within one savepoint, so if
+        either can't be written, neither is.
+        """
+        saved = self._withinSavepoint(
+            lambda: self._writeRegion(region, newRegion) and self._indexSavedRegion(
+                self._tempRow if newRegion else region))
+        if saved:
+            self._indexSavedRegionName(self._tempRow if newRegion else region)
+        return saved
+
+    def _writeRegion(self, region: Region, newRegion = True):
+        """This method is a helper method of _saveRegion. It inserts or updates the row of
+        the region specified, returning True if it was written, or False while specifying
+        an error message if it was not.
         """
         cursor = None
         try:
@@ -613,8 +1141,8 @@ class Engine:
                         cursor.close()
                     return False
                 self._tempRow = Region(tempID+1, region[1], region[2], region[3], region[4], region[5], region[6], region[7])
-                tempW = region[6] if region[6] != "" else 'NULL'
-                tempK = region[7] if region[7] != "" else 'NULL'
+                tempW = region[6] if region[6] != "" else None
+                tempK = region[7] if region[7] != "" else None
 
                 cursor = self._connection.execute(
                     'INSERT INTO region (region_id,region_code,local_code,name, continent_id, country_id, wikipedia_link, keywords) VALUES (:region_id, :region_code, :local_code, :name, :continent_id, :country_id, :wikipedia_link, :keywords);',
@@ -659,8 +1187,8 @@ class Engine:
                     if cursor is not None:
                         cursor.close()
                     return False
-                tempW = region[6] if region[6] != "" else 'NULL'
-                tempK = region[7] if region[7] != "" else 'NULL'
+                tempW = region[6] if region[6] != "" else None
+                tempK = region[7] if region[7] != "" else None
                 cursor = self._connection.execute(
                     'UPDATE region SET region_id = (:region_id), region_code = (:region_code), local_code = (:local_code), name = (:name), continent_id = (:continent_id), country_id = (:country_id), wikipedia_link = (:wikipedia_link), keywords = (:keywords) WHERE region_id = (:id);',
                     (region[0], region[1], region[2], region[3], region[4], region[5], tempW, tempK, region[0]))
@@ -673,4 +1201,445 @@ class Engine:
             cursor.close()
             return True
         self._errorEncountered = "Error with saving your region"
-        return False
\ No newline at end of file
+        return False
+    def _trigramIndex(self, table: str, id_column: str):
+        """Returns the trigram index over the names in the given table, building it
+        with a single pass over the table the first time it is asked for. Once built,
+        the index is kept up to date as rows are saved, so it is only rebuilt when a
+        database is opened or closed. If the pass is interrupted, because its event's
+        deadline passed, the rows indexed so far are kept, and the next pass resumes
+        where it stopped, so a large table is eventually indexed even if it can't be
+        in one go.
+        """
+        index = self._trigramIndexes.get(table)
+        if index is not None:
+            return index
+        index, last_id = self._partialTrigramIndexes.pop(table, (TrigramIndex(), None))
+        if last_id is None:
+            cursor = rows.execute(
+                self._connection, None, f'SELECT {id_column}, name FROM {table} ORDER BY {id_column};')
+        else:
+            cursor = rows.execute(
+                self._connection, None,
+                f'SELECT {id_column}, name FROM {table} WHERE {id_column} > (:last_id) ORDER BY {id_column};',
+                (last_id,))
+        try:
+            for row_id, name in cursor:
+                index.add(row_id, name)
+                last_id = row_id
+        except sqlite3.Error:
+            self._partialTrigramIndexes[table] = (index, last_id)
+            raise
+        finally:
+            cursor.close()
+        self._trigramIndexes[table] = index
+        return index
+
+    def _summarySearch(self, table, query, search):
+        """This method is a generator that generates the results of a summary search on
+        a table. If the query refines the previous summary search on the same table (see
+        summaries.py), the previous results are filtered, without querying the database;
+        otherwise, the given search generator is run. The results are kept for the next
+        search to refine, unless an error is encountered, in which case the search stops
+        and nothing more will be generated. Saves and opening or closing a database
+        discard the kept results.
+        """
+        if query['name'] is not None:
+            query = query | {'name': normalize.normalize_name(query['name'])}
+        previous = self._summaryResults.pop(table, None)
+        if previous is not None and summaries.is_refinement(previous[0], query):
+            results = [summary for summary in previous[1] if summaries.matches(summary, query)]
+            yield from results
+        else:
+            results = []
+            r = next(search)
+            if self._errorEncountered != "":
+                return
+            while r is not None:
+                results.append(r)
+                yield r
+                r = next(search)
+                if self._errorEncountered != "":
+                    return
+        self._summaryResults[table] = (query, results)
+
+    def _withinSavepoint(self, work):
+        """Calls work, which takes no arguments and returns True if it succeeded, within a
+        savepoint, so that everything it writes is kept if it succeeds and undone if it
+        doesn't (or raises an error). Returns what work returned, or False if what it
+        wrote could not be kept, in which case an error message is specified.
+        """
+        if self._connection is None:
+            self._errorEncountered = "Nothing can be saved if a database has not been opened yet."
+            return False
+        try:
+            self._connection.execute('SAVEPOINT p2app_save;')
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered while saving."
+            return False
+        succeeded = False
+        try:
+            succeeded = work()
+            if succeeded:
+                self._connection.execute('RELEASE p2app_save;')
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered while saving."
+            succeeded = False
+        finally:
+            if not succeeded:
+                self._connection.execute('ROLLBACK TO p2app_save;')
+                self._connection.execute('RELEASE p2app_save;')
+        return succeeded
+
+    def _indexSavedContinent(self, continent: Continent):
+        """Brings the engine's indexes up to date with a continent that was just written,
+        returning True if they were, or False while specifying an error message if not.
+        """
+        try:
+            if self._storedNames:
+                normalize.refresh(self._connection, 'continent', [continent[0]])
+        except sqlite3.Error:
+            self._errorEncountered = "Error with saving your continent: its name could not be indexed."
+            return False
+        return True
+
+    def _indexSavedCountry(self, country: Country):
+        """Brings the engine's indexes up to date with a country that was just written,
+        returning True if they were, or False while specifying an error message if not.
+        """
+        try:
+            if self._storedNames:
+                normalize.refresh(self._connection, 'country', [country[0]])
+            if self._keywordIndex:
+                keywords.update(self._connection, 'country', country[0], country[5])
+        except sqlite3.Error:
+            self._errorEncountered = "Error with saving your country: its keywords could not be indexed."
+            return False
+        return True
+
+    def _indexSavedRegion(self, region: Region):
+        """Brings the engine's indexes up to date with a region that was just written,
+        returning True if they were, or False while specifying an error message if not.
+        """
+        try:
+            if self._storedNames:
+                normalize.refresh(self._connection, 'region', [region[0]])
+            if self._keywordIndex:
+                keywords.update(self._connection, 'region', region[0], region[7])
+        except sqlite3.Error:
+            self._errorEncountered = "Error with saving your region: its keywords could not be indexed."
+            return False
+        return True
+
+    def _indexSavedRegionName(self, region: Region):
+        """Brings the in-memory trigram index of region names, if one has been built, up to
+        date with a region that was just saved.
+        """
+        if 'region' in self._trigramIndexes:
+            self._trigramIndexes['region'].add(region[0], region[3])
+        elif 'region' in self._partialTrigramIndexes:
+            index, last_id = self._partialTrigramIndexes['region']
+            if last_id is not None and region[0] <= last_id:
+                index.add(region[0], region[3])
+
+    def _keywordSearch(self, table, record_type, keyword_list, match_all = True):
+        """This method is a generator that searches a table for the rows listing all
+        (or, if match_all is False, any) of the given keywords, using the keyword index
+        rather than scanning the keywords column, once the database has been migrated to
+        have one (see keywords.py). Matching rows are generated as
+        record_type, ordered by their IDs. If an error is encountered, an error event will be
+        triggered and nothing will be generated.
+        """
+        cursor = None
+        try:
+            cursor = keywords.search(
+                self._connection, table, keyword_list, match_all, record_type, self._keywordIndex)
+            if cursor is None:
+                self._errorEncountered = "Invalid keywords specified."
+                return
+            yield from cursor
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered during search."
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+    def _fuzzySearchRegions(self, name, limit = 20):
+        """This method is a generator that searches for regions whose names are similar
+        to, but not necessarily the same as, the name given. Regions are generated from
+        the most to the least similar, and at most limit of them are generated. If an
+        error is encountered, an error event will be triggered and nothing will be generated.
+        """
+        if not name:
+            self._errorEncountered = "Invalid name specified."
+            return
+        try:
+            matches = self._trigramIndex('region', 'region_id').search(name, limit)
+            for region_id, similarity, distance in matches:
+                region = self._loadRegion(region_id)
+                if region is not None:
+                    yield region
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered during search."
+
+    def _fuzzySearchAirports(self, name, limit = 20):
+        """This method is a generator that searches for airports whose names are similar
+        to, but not necessarily the same as, the name given. Airports are generated from
+        the most to the least similar, and at most limit of them are generated. If an
+        error is encountered, an error event will be triggered and nothing will be generated.
+        """
+        if not name:
+            self._errorEncountered = "Invalid name specified."
+            return
+        try:
+            matches = self._trigramIndex('airport', 'airport_id').search(name, limit)
+            for airport_id, similarity, distance in matches:
+                airport = self._loadAirport(airport_id)
+                if airport is not None:
+                    yield airport
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered during search."
+
+    def _findDuplicateAirports(self, max_distance_m = duplicates.DEFAULT_MAX_DISTANCE_M,
+                               min_similarity = duplicates.DEFAULT_MIN_SIMILARITY):
+        """This method is a generator that finds pairs of airports that are likely to be
+        duplicates: no more than max_distance_m metres apart, with names whose similarity
+        is at least min_similarity (see duplicates.py). Only airports near one another
+        are compared, so the whole table is checked in time roughly proportional to its
+        size. Each pair is generated as a DuplicateAirportCandidate as soon as it's found,
+        followed by None. If an error is encountered, an error event will be triggered
+        and None is generated.
+        """
+        if self._connection is None:
+            self._errorEncountered = "Duplicate airports cannot be found if a database has not been opened yet."
+            yield None
+            return
+        if max_distance_m <= 0 or not 0 <= min_similarity <= 1:
+            self._errorEncountered = "Invalid distance/similarity specified."
+            yield None
+            return
+        try:
+            yield from duplicates.find(self._connection, DuplicateAirportCandidate,
+                                       max_distance_m, min_similarity)
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered while looking for duplicate airports."
+        yield None
+
+    def _loadAirport(self, a_id):
+        """This method finds an airport given an airport id. It then returns an airport,
+        or None if the airport could not be loaded.
+        """
+        cursor = None
+        try:
+            cursor = rows.execute(self._connection, Airport, f'SELECT {", ".join(Airport._fields)} FROM airport WHERE airport_id = (:airport_id);', (a_id,))
+            a = cursor.fetchone()
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered while loading an airport."
+            if cursor is not None:
+                cursor.close()
+            return None
+        cursor.close()
+        if a is None:
+            self._errorEncountered = "Airport could not be loaded."
+            return None
+        return a
+
+    def _searchNavigationAids(self, ident = None, navigation_aid_type = None, frequency_khz = None,
+                              airport_id = None):
+        """This method is a generator that searches for navigation aids given any combination
+        of an ident, a type, a frequency and the ID of the airport they serve. It then
+        generates navigation aids that match the exactly specified query. If a navigation aid
+        is not found, nothing will be generated. If an error is encountered, an error event
+        will be triggered and nothing will be generated. Each of the columns searched by is
+        indexed once the database has been migrated (see migrations.py); until then, every
+        search scans the table.
+        """
+        if self._connection is None:
+            self._errorEncountered = "Navigation aids cannot be searched if a database has not been opened yet."
+            yield None
+            return
+        criteria = {
+            column: value
+            for column, value in [('ident', ident), ('type', navigation_aid_type),
+                                  ('frequency_khz', frequency_khz), ('airport_id', airport_id)]
+            if value is not None}
+        if not criteria:
+            self._errorEncountered = "Invalid navigation aid search specified."
+            yield None
+            return
+        where = ' AND '.join(f'{column} = (:{column})' for column in criteria)
+        cursor = None
+        try:
+            cursor = rows.execute(
+                self._connection, NavigationAid, f'SELECT * FROM navigation_aid WHERE {where};', criteria)
+            n = cursor.fetchone()
+            while n is not None:
+                yield n
+                n = cursor.fetchone()
+            yield None
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered during search."
+            yield None
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+    def _loadNavigationAid(self, navigation_aid_id):
+        """This method finds a navigation aid given its ID. It then returns the navigation
+        aid, or None if it could not be loaded.
+        """
+        cursor = None
+        try:
+            cursor = rows.execute(
+                self._connection, NavigationAid,
+                'SELECT * FROM navigation_aid WHERE navigation_aid_id = (:navigation_aid_id);',
+                (navigation_aid_id,))
+            n = cursor.fetchone()
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered while loading a navigation aid."
+            if cursor is not None:
+                cursor.close()
+            return None
+        cursor.close()
+        if n is None:
+            self._errorEncountered = "Navigation aid could not be loaded."
+            return None
+        return n
+
+    def _listChanges(self, since_sequence, limit = None):
+        """This method is a generator that generates the changes made to the database after
+        the given sequence number, in the order they were made, up to limit of them if a
+        limit is given (see changes.py). If an error is encountered, an error event will be
+        triggered and nothing more will be generated.
+        """
+        if self._connection is None:
+            self._errorEncountered = "Changes cannot be listed if a database has not been opened yet."
+            yield None
+            return
+        if not changes.has_log(self._connection):
+            self._errorEncountered = "Changes are not being logged in this database."
+            yield None
+            return
+        cursor = None
+        try:
+            cursor = changes.changes_since(self._connection, Change, since_sequence, limit)
+            c = cursor.fetchone()
+            while c is not None:
+                yield c
+                c = cursor.fetchone()
+            yield None
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered while listing changes."
+            yield None
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+    def _compactChangeLog(self):
+        """This method removes every entry in the change log but the latest for each row,
+        returning how many were removed, or None if an error is encountered, in which
+        case an error event will be triggered.
+        """
+        if self._connection is None:
+            self._errorEncountered = "The change log cannot be compacted if a database has not been opened yet."
+            return None
+        if not changes.has_log(self._connection):
+            self._errorEncountered = "Changes are not being logged in this database."
+            return None
+        try:
+            return changes.compact(self._connection)
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered while compacting the change log."
+            return None
+
+    def _attachDatabase(self, path, alias):
+        """Attaches the airport database at the given path alongside the open one, as a
+        schema named alias, so that federated searches include it and records can be
+        copied to and from it (see federation.py). Returns True if it was attached; if
+        not, an error event will be triggered and False is returned.
+        """
+        if self._connection is None:
+            self._errorEncountered = "A database cannot be attached if a database has not been opened yet."
+            return False
+        try:
+            federation.attach(self._connection, path, alias)
+        except federation.FederationError as e:
+            self._errorEncountered = str(e)
+            return False
+        except sqlite3.Error:
+            self._errorEncountered = "File not found or Database Invalid."
+            return False
+        return True
+
+    def _detachDatabase(self, alias):
+        """Detaches the database attached as alias. Returns True if it was detached; if
+        not, an error event will be triggered and False is returned.
+        """
+        if self._connection is None:
+            self._errorEncountered = "A database cannot be detached if a database has not been opened yet."
+            return False
+        try:
+            federation.detach(self._connection, alias)
+        except federation.FederationError as e:
+            self._errorEncountered = str(e)
+            return False
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered while detaching the database."
+            return False
+        return True
+
+    def _federatedSearch(self, table, code = None, name = None):
+        """This method is a generator that searches the given table of the open database
+        and of every attached one at once for records matching the given code and/or
+        name, exactly as the searches of each table do. It generates a (source, record)
+        pair for each, where source is the name of the database's schema ('main' for the
+        open database, or the alias of an attached one), followed by None. If an error
+        is encountered, an error event will be triggered and None is generated.
+        """
+        if self._connection is None:
+            self._errorEncountered = "Databases cannot be searched if a database has not been opened yet."
+            yield None
+            return
+        record_type = _FEDERATED_RECORD_TYPES.get(table)
+        if record_type is None:
+            self._errorEncountered = f"Records of type {table} cannot be searched."
+            yield None
+            return
+        if code is None and name is None:
+            self._errorEncountered = "Invalid name/code specified."
+            yield None
+            return
+        cursor = None
+        try:
+            cursor = federation.search(self._connection, table, record_type._fields, code, name)
+            for row in cursor:
+                yield row[0], record_type._make(row[1:])
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered while searching the attached databases."
+        finally:
+            if cursor is not None:
+                cursor.close()
+        yield None
+
+    def _copyRecords(self, table, record_ids, source, target, replace = False):
+        """Copies the records of the given table with the given IDs from the database
+        with one schema name to the database with another, without reading them into
+        the engine (see federation.py), returning how many were copied. If an error is
+        encountered, an error event will be triggered, nothing is copied, and None is
+        returned.
+        """
+        if self._connection is None:
+            self._errorEncountered = "Records cannot be copied if a database has not been opened yet."
+            return None
+        try:
+            return federation.copy(self._connection, table, record_ids, source, target, replace)
+        except federation.FederationError as e:
+            self._errorEncountered = str(e)
+            return None
+        except sqlite3.IntegrityError:
+            self._errorEncountered = \
+                "Records could not be copied, because some already exist or refer to records that don't."
+            return None
+        except sqlite3.Error:
+            self._errorEncountered = "Error encountered while copying records."
+            return None
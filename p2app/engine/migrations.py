@@ -0,0 +1,323 @@
+# p2app/engine/migrations.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Migrations that bring the layout of an older database up to date.  The engine
+# asks which of them a database still needs when it's opened, and applies them
+# when asked to.
+#
+# SQLite can't change the type of a column, or make one a primary key, in place,
+# so a migration that does rebuilds the table instead: a new table is created with the corrected layout,
+# the rows are copied into it in batches of rowids (each an INSERT ... SELECT, so
+# the rows never pass through Python), the copy is verified against the original,
+# and the original is dropped and replaced, after which its indexes and triggers
+# are recreated.  All of it happens in one transaction, so a migration that fails
+# partway leaves the database as it was.
+
+import re
+import sqlite3
+from collections import namedtuple
+
+from . import changes, keywords, normalize, summaries
+
+
+# How many rows each INSERT ... SELECT copies while a table is rebuilt.
+_BATCH_SIZE = 10_000
+
+_MIGRATING_SUFFIX = '_migrating'
+
+# The columns of navigation_aid that navigation aids are searched by, each of which
+# is indexed once its primary key is in place.
+_NAVIGATION_AID_INDEXED_COLUMNS = ['ident', 'type', 'frequency_khz', 'airport_id']
+
+
+
+class MigrationError(Exception):
+    """Raised when a database can't be migrated, because of the data in it."""
+    pass
+
+
+
+Migration = namedtuple('Migration', ['name', 'description', 'is_needed', 'apply'])
+
+
+
+def _column_type(connection: sqlite3.Connection, table: str, column: str) -> str | None:
+    for _, name, column_type, *_ in connection.execute(f'PRAGMA table_info({table});'):
+        if name == column:
+            return column_type.upper()
+
+    return None
+
+
+def _is_primary_key(connection: sqlite3.Connection, table: str, column: str) -> bool:
+    return any(
+        name == column and primary_key_position > 0
+        for _, name, _, _, _, primary_key_position in connection.execute(f'PRAGMA table_info({table});'))
+
+
+def _columns(connection: sqlite3.Connection, table: str) -> list[str]:
+    return [name for _, name, *_ in connection.execute(f'PRAGMA table_info({table});')]
+
+
+def _table_sql(connection: sqlite3.Connection, table: str) -> str:
+    return connection.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?;", (table,)).fetchone()[0]
+
+
+def _replace_once(pattern: str, replacement: str, sql: str) -> str:
+    replaced, count = re.subn(pattern, replacement, sql, count = 1, flags = re.IGNORECASE)
+
+    if count != 1:
+        raise MigrationError(f'The table definition was not as expected: {sql}')
+
+    return replaced
+
+
+def _foreign_key_violations(connection: sqlite3.Connection) -> int:
+    return len(connection.execute('PRAGMA foreign_key_check;').fetchall())
+
+
+def _rebuild_table(connection: sqlite3.Connection, table: str, create_sql: str, select_list: str,
+                   source: str | None = None, source_rowid: str = 'rowid',
+                   batch_size: int = _BATCH_SIZE):
+    """Rebuilds a table within the current transaction.  create_sql creates the new
+    table, named with the migrating suffix; select_list selects the values of each
+    of the new table's columns, in order, from the rows of source (by default, the
+    original table), which are copied in the order of source_rowid."""
+    new_table = f'{table}{_MIGRATING_SUFFIX}'
+    source = source or table
+    schema_sql = [
+        sql for (sql,) in connection.execute(
+            "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger')"
+            ' AND sql IS NOT NULL ORDER BY type, name;',
+            (table,))]
+
+    violations_before = _foreign_key_violations(connection)
+    connection.execute(f'DROP TABLE IF EXISTS {new_table};')
+    connection.execute(create_sql)
+
+    low = None
+
+    while True:
+        # The rowid that ends this batch, or None if the rest of the table fits in it.
+        high = connection.execute(
+            f'SELECT {source_rowid} FROM {source}'
+            f' WHERE {source_rowid} > coalesce(?, -9223372036854775808)'
+            f' ORDER BY {source_rowid} LIMIT 1 OFFSET ?;',
+            (low, batch_size - 1)).fetchone()
+
+        connection.execute(
+            f'INSERT INTO {new_table} SELECT {select_list} FROM {source}'
+            f' WHERE {source_rowid} > coalesce(:low, -9223372036854775808)'
+            f' AND {source_rowid} <= coalesce(:high, 9223372036854775807) ORDER BY {source_rowid};',
+            {'low': low, 'high': high[0] if high else None})
+
+        if high is None:
+            break
+
+        low = high[0]
+
+    # The copy must hold exactly the rows selected from the source: as many of
+    # them, and none that differ.
+    original_count = connection.execute(f'SELECT COUNT(*) FROM {source};').fetchone()[0]
+    copied_count = connection.execute(f'SELECT COUNT(*) FROM {new_table};').fetchone()[0]
+    differing_count = connection.execute(
+        f'SELECT COUNT(*) FROM (SELECT {select_list} FROM {source} EXCEPT SELECT * FROM {new_table});').fetchone()[0]
+
+    if copied_count != original_count or differing_count != 0:
+        raise MigrationError(
+            f'The copy of {table} did not match the original '
+            f'({copied_count} of {original_count} rows copied, {differing_count} differing).')
+
+    connection.execute(f'DROP TABLE {table};')
+    connection.execute(f'ALTER TABLE {new_table} RENAME TO {table};')
+
+    for sql in schema_sql:
+        connection.execute(sql)
+
+    if _foreign_key_violations(connection) > violations_before:
+        raise MigrationError(f'Rebuilding {table} broke references to or from it.')
+
+
+def _migrate(connection: sqlite3.Connection, migrate):
+    """Calls migrate(connection) in a transaction, with foreign keys turned off, as
+    SQLite requires while a table is rebuilt, restoring them afterward."""
+    foreign_keys = connection.execute('PRAGMA foreign_keys;').fetchone()[0]
+    connection.execute('PRAGMA foreign_keys = OFF;')
+
+    try:
+        connection.execute('BEGIN IMMEDIATE;')
+
+        try:
+            migrate(connection)
+            connection.execute('COMMIT;')
+        except BaseException:
+            connection.execute('ROLLBACK;')
+            raise
+    finally:
+        connection.execute(f'PRAGMA foreign_keys = {foreign_keys};')
+
+    # Dropping the original table also dropped its statistics, which the query
+    # planner relies on, so they're gathered again if the database keeps them.
+    if connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1';").fetchone():
+        connection.execute('ANALYZE;')
+
+
+def _airport_continent_id_is_text(connection: sqlite3.Connection) -> bool:
+    return _column_type(connection, 'airport', 'continent_id') == 'TEXT'
+
+
+def _make_airport_continent_id_integer(connection: sqlite3.Connection):
+    # airport.continent_id is TEXT, though it refers to continent.continent_id,
+    # which is an INTEGER, so comparisons between them convert every value, and no
+    # index can serve a join between them.
+    not_integers = connection.execute(
+        'SELECT COUNT(*) FROM airport'
+        ' WHERE continent_id != CAST(CAST(continent_id AS INTEGER) AS TEXT);').fetchone()[0]
+
+    if not_integers > 0:
+        raise MigrationError(f'{not_integers} airports have a continent_id that is not an integer.')
+
+    create_sql = _replace_once(
+        r'\bcontinent_id\s+TEXT\b', 'continent_id INTEGER',
+        _replace_once(r'^CREATE TABLE\s+"?airport"?', f'CREATE TABLE airport{_MIGRATING_SUFFIX}',
+                      _table_sql(connection, 'airport')))
+
+    select_list = ', '.join(
+        'CAST(continent_id AS INTEGER)' if column == 'continent_id' else column
+        for column in _columns(connection, 'airport'))
+
+    _rebuild_table(connection, 'airport', create_sql, select_list)
+    connection.execute('CREATE INDEX IF NOT EXISTS airport_continent_id ON airport (continent_id);')
+
+
+def _navigation_aid_id_is_not_primary_key(connection: sqlite3.Connection) -> bool:
+    return _column_type(connection, 'navigation_aid', 'navigation_aid_id') is not None \
+        and not _is_primary_key(connection, 'navigation_aid', 'navigation_aid_id')
+
+
+def _make_navigation_aid_id_primary_key(connection: sqlite3.Connection):
+    # navigation_aid_id is neither a primary key nor unique, and some IDs are shared
+    # by more than one row.  Rows that are exact duplicates of another are dropped;
+    # of the rest, the first row with each ID keeps it, and the others are given new
+    # IDs, beyond the largest one in use, since they describe different navigation
+    # aids.  Nothing refers to navigation aids by ID, so renumbering them is safe.
+    columns = _columns(connection, 'navigation_aid')
+    column_list = ', '.join(columns)
+
+    connection.execute('DROP TABLE IF EXISTS temp.navigation_aid_ids;')
+    connection.execute(
+        'CREATE TEMP TABLE navigation_aid_ids'
+        ' (source_rowid INTEGER NOT NULL PRIMARY KEY, navigation_aid_id INTEGER NOT NULL);')
+    connection.execute(
+        'WITH kept AS ('
+        '    SELECT rowid AS source_rowid, navigation_aid_id,'
+        '        ROW_NUMBER() OVER (PARTITION BY navigation_aid_id ORDER BY rowid) AS position'
+        '    FROM navigation_aid'
+        f'    WHERE rowid IN (SELECT MIN(rowid) FROM navigation_aid GROUP BY {column_list}))'
+        ' INSERT INTO temp.navigation_aid_ids'
+        ' SELECT source_rowid,'
+        '     CASE WHEN position = 1 THEN navigation_aid_id'
+        '     ELSE (SELECT MAX(navigation_aid_id) FROM navigation_aid)'
+        '         + ROW_NUMBER() OVER (PARTITION BY position = 1 ORDER BY source_rowid) END'
+        ' FROM kept;')
+
+    create_sql = _replace_once(
+        r'\bnavigation_aid_id\s+INTEGER\s+NOT\s+NULL\b', 'navigation_aid_id INTEGER NOT NULL PRIMARY KEY',
+        _replace_once(r'^CREATE TABLE\s+"?navigation_aid"?', f'CREATE TABLE navigation_aid{_MIGRATING_SUFFIX}',
+                      _table_sql(connection, 'navigation_aid')))
+
+    select_list = ', '.join(
+        'ids.navigation_aid_id' if column == 'navigation_aid_id' else f'navigation_aid.{column}'
+        for column in columns)
+
+    _rebuild_table(
+        connection, 'navigation_aid', create_sql, select_list,
+        source = 'navigation_aid JOIN temp.navigation_aid_ids AS ids ON ids.source_rowid = navigation_aid.rowid',
+        source_rowid = 'navigation_aid.rowid')
+
+    connection.execute('DROP TABLE temp.navigation_aid_ids;')
+
+    for column in _NAVIGATION_AID_INDEXED_COLUMNS:
+        connection.execute(
+            f'CREATE INDEX IF NOT EXISTS navigation_aid_{column} ON navigation_aid ({column});')
+
+
+def _keywords_are_not_indexed(connection: sqlite3.Connection) -> bool:
+    return not keywords.has_index(connection)
+
+
+def _changes_are_not_logged(connection: sqlite3.Connection) -> bool:
+    return not changes.has_log(connection)
+
+
+def _names_are_not_stored(connection: sqlite3.Connection) -> bool:
+    return (
+        not normalize.has_stored_names(connection)
+        or len(normalize.function_indexes(connection)) > 0
+        or len(summaries.missing_indexes(connection)) > 0)
+
+
+def _store_normalized_names(connection: sqlite3.Connection):
+    normalize.store_names(connection)
+    summaries.create_indexes(connection)
+
+
+MIGRATIONS = [
+    Migration(
+        'airport_continent_id_integer',
+        "Store each airport's continent ID as an integer, like the continent's own, and index it.",
+        _airport_continent_id_is_text,
+        _make_airport_continent_id_integer),
+    Migration(
+        'navigation_aid_primary_key',
+        "Make each navigation aid's ID its primary key, dropping rows that are exact duplicates"
+        ' and giving new IDs to other rows that share one, and index the columns navigation'
+        ' aids are looked up by.',
+        _navigation_aid_id_is_not_primary_key,
+        _make_navigation_aid_id_primary_key),
+    Migration(
+        'stored_normalized_names',
+        'Store each name with its accents and case folded away, in an indexed column of its'
+        ' own, so that searches by name ignore accents and case using an index, while the'
+        ' database stays writable by programs other than this one.',
+        _names_are_not_stored,
+        _store_normalized_names),
+    Migration(
+        'null_strings',
+        "Replace the text 'NULL', which earlier versions of this program stored in place of"
+        " empty keywords and Wikipedia links of countries and regions, with empty values.",
+        keywords.has_null_strings,
+        keywords.replace_null_strings),
+    Migration(
+        'keyword_index',
+        'Index the keywords of each country, region and airport in a table of their own, so'
+        ' that searches by keyword needn\'t read every row.',
+        _keywords_are_not_indexed,
+        keywords.create_index),
+    Migration(
+        'change_log',
+        'Log each change made to the continents, countries, regions and airports, so that'
+        ' other programs keeping copies of them can read only what changed.',
+        _changes_are_not_logged,
+        changes.create_log)
+]
+
+
+
+def pending(connection: sqlite3.Connection, excluded = ()) -> list[Migration]:
+    """Returns the migrations the database on a connection still needs, in the order
+    in which they must be applied, leaving out those whose names are excluded."""
+    return [
+        migration for migration in MIGRATIONS
+        if migration.name not in excluded and migration.is_needed(connection)]
+
+
+def apply(connection: sqlite3.Connection, migration: Migration):
+    """Applies one migration, in a transaction of its own, to the database on a
+    connection, which must be in autocommit mode.  Raises MigrationError if the data
+    in the database can't be migrated, or sqlite3.Error if the database can't be
+    written; either way, the database is left as it was."""
+    _migrate(connection, migration.apply)
@@ -0,0 +1,150 @@
+# p2app/engine/normalize.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Unicode normalization of names, so that searches are insensitive to accents and
+# case (e.g., "Zurich" finds "Zürich"), along with the stored, indexed copies of
+# the normalized names that let SQLite answer those searches with an index seek.
+#
+# Each searchable table gets a normalized_name column, holding its name as
+# normalize_name returns it, so that the column can be indexed like any other.
+# The normalization can't be written in plain SQL, so the engine fills the column
+# in itself, when a database is migrated and whenever it saves a row.  Nothing in
+# the database's schema depends on the SQL function the engine registers, so any
+# other program (the sqlite3 shell, or an older version of this one) can still
+# read, write and check the database without it.
+#
+# Other programs don't know to keep the column up to date, though, so a trigger,
+# written in plain SQL, sets it to NULL whenever a row's name changes without its
+# normalized name changing along with it.  Rows inserted by other programs get a
+# NULL there, too.  A search matches a row either by its stored normalized name,
+# or, if that's NULL, by normalizing its name as it goes; since NULLs are indexed
+# as well, both are index seeks, and only the few rows with a NULL need their
+# names normalized during a search.  The engine fills in the NULLs again as it
+# saves the rows that have them.
+#
+# Databases that haven't been migrated yet have no such column; searches on them
+# normalize every name in the table as they go.
+
+import json
+import sqlite3
+import unicodedata
+
+
+# The name under which normalize_name is registered as an SQL function.
+SQL_FUNCTION_NAME = 'p2app_normalize'
+
+# The name of the column holding each row's normalized name.
+NORMALIZED_NAME_COLUMN = 'normalized_name'
+
+# The tables whose names are stored normalized, along with their ID columns.
+NORMALIZED_NAME_TABLES = {
+    'continent': 'continent_id',
+    'country': 'country_id',
+    'region': 'region_id',
+    'airport': 'airport_id'
+}
+
+# The tables whose normalized names are indexed by an index of their own.  Continent,
+# country and region names are indexed instead by the covering indexes in summaries.py.
+_INDEXED_TABLES = ['airport']
+
+
+
+def normalize_name(name: str) -> str:
+    """Returns a name folded for comparison: decomposed, with combining accents
+    removed, casefolded and with runs of whitespace collapsed to single spaces."""
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.casefold().split())
+
+
+def _sql_normalize_name(name):
+    return normalize_name(name) if isinstance(name, str) else name
+
+
+def register_functions(connection: sqlite3.Connection):
+    """Registers the normalization function with a connection, so that the engine's
+    statements can normalize names as they run.  It's only ever called by statements,
+    never by anything stored in the database's schema."""
+    connection.create_function(
+        SQL_FUNCTION_NAME, 1, _sql_normalize_name, deterministic = True)
+
+
+def has_stored_names(connection: sqlite3.Connection, schema: str = 'main') -> bool:
+    """Returns True if every searchable table in the given schema has a column of
+    normalized names."""
+    return all(
+        NORMALIZED_NAME_COLUMN in (
+            name for _, name, *_ in connection.execute(f'PRAGMA "{schema}".table_info({table});'))
+        for table in NORMALIZED_NAME_TABLES)
+
+
+def name_condition(stored: bool) -> str:
+    """Returns an SQL condition that matches the rows whose normalized name is the
+    value of the :name parameter (which must already be normalized), using the
+    stored normalized names if stored is True."""
+    if stored:
+        return (
+            f'({NORMALIZED_NAME_COLUMN} = (:name) OR ({NORMALIZED_NAME_COLUMN} IS NULL'
+            f' AND {SQL_FUNCTION_NAME}(name) = (:name)))')
+    else:
+        return f'{SQL_FUNCTION_NAME}(name) = (:name)'
+
+
+def function_indexes(connection: sqlite3.Connection, tables = tuple(NORMALIZED_NAME_TABLES)) -> list[str]:
+    """Returns the names of the indexes on the given tables whose expressions call the
+    normalization function, which earlier versions of the engine created, and which
+    keep any program that hasn't registered the function from writing to the tables."""
+    placeholders = ', '.join('?' * len(tables))
+
+    return [
+        name for (name,) in connection.execute(
+            f"SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name IN ({placeholders})"
+            ' AND sql LIKE ?;',
+            (*tables, f'%{SQL_FUNCTION_NAME}(%'))]
+
+
+def store_names(connection: sqlite3.Connection):
+    """Adds a column of normalized names to each searchable table that doesn't have
+    one, fills it in, and creates the triggers that mark it out of date, and the
+    indexes over it, replacing any indexes that call the normalization function.
+    The function must be registered with the connection."""
+    for index_name in function_indexes(connection):
+        connection.execute(f'DROP INDEX {index_name};')
+
+    for table, id_column in NORMALIZED_NAME_TABLES.items():
+        columns = [name for _, name, *_ in connection.execute(f'PRAGMA table_info({table});')]
+
+        if NORMALIZED_NAME_COLUMN not in columns:
+            connection.execute(f'ALTER TABLE {table} ADD COLUMN {NORMALIZED_NAME_COLUMN} TEXT NULL;')
+
+        connection.execute(
+            f'UPDATE {table} SET {NORMALIZED_NAME_COLUMN} = {SQL_FUNCTION_NAME}(name)'
+            f' WHERE {NORMALIZED_NAME_COLUMN} IS NOT {SQL_FUNCTION_NAME}(name);')
+
+        connection.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_{NORMALIZED_NAME_COLUMN}_stale'
+            f' AFTER UPDATE OF name ON {table}'
+            f' WHEN NEW.name IS NOT OLD.name AND NEW.{NORMALIZED_NAME_COLUMN} IS OLD.{NORMALIZED_NAME_COLUMN}'
+            ' BEGIN'
+            f'   UPDATE {table} SET {NORMALIZED_NAME_COLUMN} = NULL WHERE {id_column} = NEW.{id_column};'
+            ' END;')
+
+    for table in _INDEXED_TABLES:
+        connection.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_{NORMALIZED_NAME_COLUMN}'
+            f' ON {table} ({NORMALIZED_NAME_COLUMN});')
+
+
+def refresh(connection: sqlite3.Connection, table: str, row_ids: list[int], schema: str = 'main'):
+    """Brings the stored normalized names of the given rows of a table, in the given
+    schema (by default, the open database's), up to date with their names.  The
+    function must be registered with the connection."""
+    id_column = NORMALIZED_NAME_TABLES[table]
+    connection.execute(
+        f'UPDATE "{schema}".{table} SET {NORMALIZED_NAME_COLUMN} = {SQL_FUNCTION_NAME}(name)'
+        f' WHERE {id_column} IN (SELECT value FROM json_each(?))'
+        f' AND {NORMALIZED_NAME_COLUMN} IS NOT {SQL_FUNCTION_NAME}(name);',
+        (json.dumps(row_ids),))
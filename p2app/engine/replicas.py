@@ -0,0 +1,323 @@
+# p2app/engine/replicas.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# In-memory replicas of a database, which serve every read from memory while
+# writing through to the database on disk, so that searches and loads never wait
+# on the disk for pages that aren't in its cache.
+#
+# A replica is a copy of the database in a :memory: connection, made with SQLite's
+# backup API.  Its connection stands in for the one on disk: statements that only
+# read are executed on the replica alone, while everything else is executed on the
+# disk first, then on the replica.  Each write happens within a savepoint on both
+# connections, released (committing it, unless a transaction was already open) on
+# the disk first and then on the replica, so a write that fails on either one
+# before then is undone on both.  The disk stays the database of record, so other
+# connections to the file (integrity scans and backups, which open their own) see
+# every change as soon as it's made.
+#
+# Once the disk has committed a change, though, it can't be undone there, so if the
+# replica then fails to commit it too (or fails at anything else the disk has
+# already done), the two would disagree.  Instead, the replica is set aside: every
+# statement is executed on the disk alone, until the disk is next outside of a
+# transaction, when the replica is copied from it again.
+#
+# Statements are told apart by their first keyword.  One that might write but
+# doesn't (a WITH that only selects, say) is executed on both, which costs a little
+# time, but is never wrong.  Transaction control, pragmas, and the attaching and
+# detaching of other databases are executed on both, outside of any savepoint
+# (some pragmas, like foreign_keys, do nothing within a transaction, and databases
+# can't be attached within one), and their results come from the disk, which is
+# where questions like which file the database is stored in have to be answered.
+#
+# Only the open database is replicated.  Other databases attached to it are
+# attached to both connections, and read from their files either way, so a write
+# that names one of them is made on the disk alone; made on both, it would be made
+# to the same file twice.  Within a transaction, reads are made on the disk, too:
+# a replica reading an attached database within a transaction would hold a lock on
+# it until the transaction ended, keeping the disk from committing writes to it.
+#
+# The replica only ever repeats writes the disk has already accepted, so it
+# doesn't check foreign keys again; without indexes on the columns that refer to
+# other tables, checking them scans those tables, which would double the cost of
+# every save.  (If a foreign key has an action, like ON DELETE CASCADE, the replica
+# checks them after all, since the actions make changes of their own.)
+#
+# A replica needs about as much memory as the pages of the database it copies,
+# plus the overhead SQLite keeps for each, so one is made only if that estimate
+# fits within a limit; otherwise, the database is used from disk, as it would be
+# without a replica.
+
+import os
+import re
+import sqlite3
+
+
+# The most memory, in bytes, a replica may be estimated to need by default.
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# What an in-memory database needs for each of its pages, on top of the page itself,
+# in bytes: SQLite's page cache headers, along with the allocator's own overhead
+# (measured on SQLite 3.40 with 4 KB pages; it varies a little between versions
+# and platforms, but an estimate is all that's needed).
+_PAGE_OVERHEAD = 700
+
+# The first keywords of statements that only read, which are executed on the
+# replica alone.
+_READING = ('SELECT', 'VALUES', 'EXPLAIN')
+
+# The first keywords of statements that control transactions, or are pragmas.
+_UNWRAPPED = (
+    'BEGIN', 'COMMIT', 'END', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'PRAGMA', 'ATTACH', 'DETACH')
+
+# The schema a statement writes to, or a pragma is about, if it names one.  Pragmas
+# about an attached database are made on the primary alone, like writes to it, since
+# the replica reading that database within a transaction would hold a lock on its
+# file that keeps the primary from committing to it.
+_WRITTEN_SCHEMA = re.compile(
+    r'\s*(?:(?:INSERT|REPLACE)\s+(?:OR\s+\w+\s+)?INTO|UPDATE\s+(?:OR\s+\w+\s+)?|DELETE\s+FROM|PRAGMA)'
+    r'\s*"?(\w+)"?\s*\.',
+    re.IGNORECASE)
+
+_FOREIGN_KEYS_PRAGMA = re.compile(r'\s*PRAGMA\s+foreign_keys\b', re.IGNORECASE)
+
+_SAVEPOINT = 'p2app_replica_write'
+
+
+
+class ReplicaCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters = ()):
+        keyword = sql.lstrip()[:9].upper()
+
+        if self.connection.is_set_aside and not self.connection.recopy():
+            return self._primary_cursor().execute(sql, parameters)
+        elif keyword.startswith(_READING) and not self.connection.in_transaction:
+            return super().execute(sql, parameters)
+        elif keyword.startswith(_READING):
+            return self._primary_cursor().execute(sql, parameters)
+        elif self.connection.writes_attached(sql):
+            return self.connection.primary.execute(sql, parameters)
+        elif keyword.startswith(_UNWRAPPED):
+            cursor = self._primary_cursor().execute(sql, parameters)
+
+            if self.connection.checks_foreign_keys or not _FOREIGN_KEYS_PRAGMA.match(sql):
+                try:
+                    super().execute(sql, parameters)
+                except sqlite3.Error:
+                    self.connection.set_aside()
+
+            return cursor
+        else:
+            return self.connection.write_through(
+                lambda connection: connection.execute(sql, parameters),
+                lambda: super(ReplicaCursor, self).execute(sql, parameters))
+
+
+    def executemany(self, sql, parameters):
+        # The parameters are executed twice, once on each connection, so an iterator
+        # of them is read into a list first.
+        if self.connection.is_set_aside and not self.connection.recopy():
+            return self.connection.primary.executemany(sql, parameters)
+        elif self.connection.writes_attached(sql):
+            return self.connection.primary.executemany(sql, parameters)
+
+        parameters = list(parameters)
+        return self.connection.write_through(
+            lambda connection: connection.executemany(sql, parameters),
+            lambda: super(ReplicaCursor, self).executemany(sql, parameters))
+
+
+    def _primary_cursor(self):
+        cursor = self.connection.primary.cursor()
+        cursor.row_factory = self.row_factory
+        return cursor
+
+
+
+class ReplicaConnection(sqlite3.Connection):
+    """A connection to an in-memory replica of the database on another connection,
+    its primary.  Create one with replicate, rather than directly."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.primary = None
+        self.checks_foreign_keys = False
+        self.is_set_aside = False
+
+
+    def cursor(self, factory = ReplicaCursor):
+        return super().cursor(factory)
+
+
+    # Connection.execute creates its cursor without calling the cursor method, so
+    # it must be overridden as well.
+    def execute(self, sql, parameters = ()):
+        return self.cursor().execute(sql, parameters)
+
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+
+    def create_function(self, *args, **kwargs):
+        self.primary.create_function(*args, **kwargs)
+        super().create_function(*args, **kwargs)
+
+
+    def set_progress_handler(self, *args, **kwargs):
+        self.primary.set_progress_handler(*args, **kwargs)
+        super().set_progress_handler(*args, **kwargs)
+
+
+    @property
+    def in_transaction(self):
+        # The disk is in a transaction whenever the replica is, but not only then, since
+        # the replica might be set aside.
+        return self.primary.in_transaction
+
+
+    def writes_attached(self, sql):
+        """Returns True if the statement writes to an attached database, rather than the
+        replicated one, or is a pragma about one."""
+        match = _WRITTEN_SCHEMA.match(sql)
+        return match is not None and match.group(1).lower() not in ('main', 'temp')
+
+
+    def write_through(self, write_primary, write_replica):
+        """Makes one write to the primary, then the replica, within a savepoint on
+        each, so that it's made on both or neither.  write_primary is called with the
+        primary connection, and write_replica with no arguments; the result of
+        write_replica is returned."""
+        self.primary.execute(f'SAVEPOINT {_SAVEPOINT};')
+        sqlite3.Connection.execute(self, f'SAVEPOINT {_SAVEPOINT};')
+
+        try:
+            write_primary(self.primary)
+            result = write_replica()
+            self.primary.execute(f'RELEASE {_SAVEPOINT};')
+        except BaseException:
+            self._roll_back(self.primary)
+            self._roll_back(self)
+            raise
+
+        try:
+            sqlite3.Connection.execute(self, f'RELEASE {_SAVEPOINT};')
+        except sqlite3.Error:
+            self.set_aside()
+
+        return result
+
+
+    def set_aside(self):
+        """Sets the replica aside, after it failed to make a change the primary made,
+        so that every statement is executed on the primary until the replica is copied
+        from it again."""
+        self.is_set_aside = True
+
+        try:
+            if super().in_transaction:
+                sqlite3.Connection.execute(self, 'ROLLBACK;')
+        except sqlite3.Error:
+            pass
+
+
+    def recopy(self) -> bool:
+        """Copies the primary into a replica that was set aside, if the primary isn't
+        in a transaction, returning True if the replica is in use again."""
+        if self.primary.in_transaction:
+            return False
+
+        try:
+            self.primary.backup(self)
+        except sqlite3.Error:
+            return False
+
+        self.is_set_aside = False
+        return True
+
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self.primary.close()
+
+
+    @staticmethod
+    def _roll_back(connection):
+        # The savepoint is gone already if releasing it committed the write.
+        try:
+            sqlite3.Connection.execute(connection, f'ROLLBACK TO {_SAVEPOINT};')
+            sqlite3.Connection.execute(connection, f'RELEASE {_SAVEPOINT};')
+        except sqlite3.Error:
+            pass
+
+
+
+def _has_foreign_key_actions(connection: sqlite3.Connection) -> bool:
+    tables = [
+        name for (name,) in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table';").fetchall()]
+
+    return any(
+        on_update != 'NO ACTION' or on_delete != 'NO ACTION'
+        for table in tables
+        for _, _, _, _, _, on_update, on_delete, _ in connection.execute(
+            f'PRAGMA foreign_key_list("{table}");'))
+
+
+def estimate_bytes(connection: sqlite3.Connection) -> int:
+    """Estimates how much memory, in bytes, a replica of the database on a connection
+    would need, from how many of its pages are in use."""
+    page_size = connection.execute('PRAGMA page_size;').fetchone()[0]
+    page_count = connection.execute('PRAGMA page_count;').fetchone()[0]
+    free_count = connection.execute('PRAGMA freelist_count;').fetchone()[0]
+    return (page_count - free_count) * (page_size + _PAGE_OVERHEAD)
+
+
+def available_bytes() -> int | None:
+    """Returns how much physical memory, in bytes, is available, or None if that
+    can't be determined on this platform."""
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def replicate(connection: sqlite3.Connection, max_bytes: int | None = DEFAULT_MAX_BYTES
+              ) -> tuple[ReplicaConnection | None, str]:
+    """Copies the database on a connection, which must be in autocommit mode, into
+    an in-memory replica, returning its connection, which takes ownership of the
+    original one, along with a description of the replica.  If the replica is
+    estimated to need more than max_bytes (or, when it can be determined, more than
+    half the physical memory that's available), or it can't be made, (None, reason)
+    is returned instead, and the original connection can go on being used as it
+    is.  Functions must be registered on the replica's connection afterward, since
+    they aren't copied."""
+    needed = estimate_bytes(connection)
+    available = available_bytes()
+    limits = [max_bytes] if max_bytes is not None else []
+
+    if available is not None:
+        limits.append(available // 2)
+
+    if limits and needed > min(limits):
+        return None, f'A replica would need about {needed:,} bytes, more than the {min(limits):,} allowed.'
+
+    replica = sqlite3.connect(':memory:', isolation_level = None, factory = ReplicaConnection)
+
+    try:
+        connection.backup(replica)
+    except (sqlite3.Error, MemoryError) as e:
+        sqlite3.Connection.close(replica)
+        return None, f'The replica could not be made: {e}'
+
+    replica.primary = connection
+    replica.checks_foreign_keys = _has_foreign_key_actions(connection)
+
+    if replica.checks_foreign_keys:
+        foreign_keys = connection.execute('PRAGMA foreign_keys;').fetchone()[0]
+        sqlite3.Connection.execute(replica, f'PRAGMA foreign_keys = {foreign_keys};')
+
+    return replica, f'Replica of about {needed:,} bytes.'
@@ -0,0 +1,47 @@
+# p2app/engine/rows.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Row factories that have sqlite3 build the engine's record types (Continent,
+# Country, Region, Airport) directly as each row is fetched, rather than fetching
+# a plain tuple and then copying it into a record field by field.
+#
+# The record types are namedtuples, so tuple.__new__ can build a record straight
+# from the row sqlite3 already made, in a single C-level call that skips the
+# Python-level __new__ namedtuples generate, along with its argument parsing.
+# That saves the intermediate copy from a plain tuple into a record; building
+# the record itself still allocates one new tuple per row, sharing the row's
+# values rather than copying them.
+#
+# Bulk paths, which read many rows only to pick values out of them (building an
+# index, for example), can pass None as the record type, leaving the rows as the
+# plain tuples sqlite3 produces on its own, which are cheaper still.
+
+import functools
+import sqlite3
+
+
+
+@functools.cache
+def record_factory(record_type):
+    """Returns a row factory that builds rows as the given namedtuple type.  The
+    factories are cached, so every cursor building the same type shares one."""
+    make_record = tuple.__new__
+
+    def factory(cursor, row):
+        return make_record(record_type, row)
+
+    return factory
+
+
+def execute(connection: sqlite3.Connection, record_type, sql: str, parameters = ()):
+    """Executes a statement on a new cursor, returning the cursor.  Rows fetched
+    from it are built as record_type, whose fields must be the columns the
+    statement selects, in order; if record_type is None, they're plain tuples."""
+    cursor = connection.cursor()
+
+    if record_type is not None:
+        cursor.row_factory = record_factory(record_type)
+
+    return cursor.execute(sql, parameters)
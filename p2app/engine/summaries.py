@@ -0,0 +1,80 @@
+# p2app/engine/summaries.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Covering indexes for summary searches, which select only the ID, code and name
+# of each matching row (all a search list displays), rather than every column.
+# Each index holds a search key along with the code and name (the ID comes along
+# for free, as the table's rowid), so a summary search is answered from the index
+# alone, without visiting the table; whole rows are read only when one is loaded.
+# Searches by name are keyed by the stored normalized names (see normalize.py), so
+# the indexes are created when those are, by the migration that stores them.
+#
+# Searches by the unique codes need no index of their own, since they find at
+# most one row and SQLite prefers the unique index for them regardless.
+#
+# A summary search that refines the previous one (asking for everything it did, and
+# more) can only match rows the previous one did, so the engine answers it by
+# filtering the previous results rather than querying again; the functions below
+# decide when that's possible and which of the previous results still match.
+
+import sqlite3
+
+from .normalize import NORMALIZED_NAME_COLUMN, normalize_name
+
+
+# Each covering index, along with its table and its columns.  Region summaries
+# include the local code, so the region indexes hold it as well.
+_COVERING_INDEXES = [
+    ('continent_summary_name', 'continent',
+     f'{NORMALIZED_NAME_COLUMN}, continent_code, name'),
+    ('country_summary_name', 'country',
+     f'{NORMALIZED_NAME_COLUMN}, country_code, name'),
+    ('region_summary_normalized_name', 'region',
+     f'{NORMALIZED_NAME_COLUMN}, region_code, local_code, name'),
+    ('region_summary_local_code', 'region',
+     'local_code, region_code, name')
+]
+
+
+
+def missing_indexes(connection: sqlite3.Connection) -> list[str]:
+    """Returns the names of the covering indexes that don't exist yet."""
+    existing = {
+        name for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index';")}
+
+    return [index_name for index_name, _, _ in _COVERING_INDEXES if index_name not in existing]
+
+
+def create_indexes(connection: sqlite3.Connection):
+    """Creates the covering indexes, if they don't already exist.  The searchable
+    tables must already have their normalized_name columns."""
+    for index_name, table, columns in _COVERING_INDEXES:
+        connection.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns});')
+
+
+def is_refinement(previous_query: dict, query: dict) -> bool:
+    """Returns True if a query can only match rows that a previous query matched,
+    because it asks for the same value of every field the previous query did.
+    Queries map the fields of a summary to the values searched for, or to None for
+    fields not searched by; names are given already normalized."""
+    return all(
+        value is None or query.get(field) == value
+        for field, value in previous_query.items())
+
+
+def matches(summary, query: dict) -> bool:
+    """Returns True if a summary matches a query, compared the way the engine's
+    searches compare them in SQL."""
+    for field, value in query.items():
+        if value is not None:
+            actual = getattr(summary, field)
+
+            if field == 'name' and actual is not None:
+                actual = normalize_name(actual)
+
+            if actual != value:
+                return False
+
+    return True
@@ -0,0 +1,163 @@
+# p2app/engine/trigram.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# A trigram inverted index over names, used by the engine to answer fuzzy
+# searches (e.g., "Sao Paolo" finding "São Paulo") without computing an edit
+# distance against every row in a table.
+
+from array import array
+from collections import Counter
+
+import heapq
+
+from .normalize import normalize_name
+
+
+# How many of the best trigram matches are re-ranked by exact edit distance.
+_RERANK_FACTOR = 5
+
+
+
+def trigrams(name: str) -> set[str]:
+    """Returns the set of trigrams in a normalized name. Each word is padded with
+    two leading spaces and one trailing space, so short words and word starts
+    still produce trigrams that can match."""
+    result = set()
+
+    for word in name.split():
+        padded = f'  {word} '
+
+        for i in range(len(padded) - 2):
+            result.add(padded[i:i + 3])
+
+    return result
+
+
+def best_window_distance(query: str, name: str) -> int:
+    """Returns the smallest edit distance between a normalized query and any run of
+    consecutive words in a normalized name having the same number of words as the
+    query, so that "sao paolo" is close to "sao paulo guarulhos airport"."""
+    query_words = query.split()
+    name_words = name.split()
+    width = len(query_words)
+
+    if width >= len(name_words):
+        return edit_distance(query, name)
+
+    return min(
+        edit_distance(query, ' '.join(name_words[i:i + width]))
+        for i in range(len(name_words) - width + 1))
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Returns the Levenshtein distance between two strings."""
+    if len(a) < len(b):
+        a, b = b, a
+
+    previous = list(range(len(b) + 1))
+
+    for i, ch_a in enumerate(a, 1):
+        current = [i]
+
+        for j, ch_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ch_a != ch_b)))
+
+        previous = current
+
+    return previous[-1]
+
+
+
+class TrigramIndex:
+    """An inverted index from trigrams to the IDs of the rows whose names contain
+    them. Postings are kept in compact arrays, and the index is maintained one row
+    at a time as names are added, changed or removed."""
+
+    def __init__(self):
+        """Initializes an empty index"""
+        self._postings = {}
+        self._names = {}
+        self._sizes = {}
+
+
+    def __len__(self):
+        return len(self._names)
+
+
+    def add(self, row_id: int, name: str | None):
+        """Adds a row to the index, replacing whatever name it had before."""
+        self.remove(row_id)
+
+        if not name:
+            return
+
+        normalized = normalize_name(name)
+        row_trigrams = trigrams(normalized)
+        self._names[row_id] = normalized
+        self._sizes[row_id] = len(row_trigrams)
+
+        for trigram in row_trigrams:
+            postings = self._postings.get(trigram)
+
+            if postings is None:
+                postings = self._postings[trigram] = array('q')
+
+            postings.append(row_id)
+
+
+    def remove(self, row_id: int):
+        """Removes a row from the index, if it is present."""
+        normalized = self._names.pop(row_id, None)
+
+        if normalized is None:
+            return
+
+        del self._sizes[row_id]
+
+        for trigram in trigrams(normalized):
+            postings = self._postings.get(trigram)
+
+            if postings is not None:
+                postings.remove(row_id)
+
+                if not postings:
+                    del self._postings[trigram]
+
+
+    def search(self, name: str, limit: int = 20) -> list[tuple[int, float, int]]:
+        """Returns up to limit (row ID, similarity, edit distance) tuples for the
+        names most similar to the given one. Candidates are ranked by trigram
+        similarity, and only the best few of those have their edit distance computed
+        for the final ordering."""
+        normalized = normalize_name(name)
+        query = trigrams(normalized)
+
+        if not query or limit <= 0:
+            return []
+
+        shared = Counter()
+
+        for trigram in query:
+            postings = self._postings.get(trigram)
+
+            if postings is not None:
+                shared.update(postings)
+
+        def similarity(row_id):
+            count = shared[row_id]
+            return count / (len(query) + self._sizes[row_id] - count)
+
+        candidates = heapq.nlargest(limit * _RERANK_FACTOR, shared, key = similarity)
+        ranked = []
+
+        for row_id in candidates:
+            distance = best_window_distance(normalized, self._names[row_id])
+            ranked.append((row_id, similarity(row_id), distance))
+
+        ranked.sort(key = lambda candidate: (candidate[2], -candidate[1]))
+        return ranked[:limit]
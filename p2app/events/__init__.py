@@ -4,12 +4,14 @@
 # Project 2: Learning to Fly
 #
 # Initialization module for the p2app.events package.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 from .event_bus import EventBus
+from .airports import *
 from .app import *
+from .changes import *
 from .continents import *
 from .countries import *
 from .database import *
+from .federation import *
+from .navigation_aids import *
 from .regions import *
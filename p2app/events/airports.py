@@ -0,0 +1,183 @@
+# p2app/events/airports.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Events that are related to searching for and loading airports in the database.
+
+from collections import namedtuple
+
+
+
+Airport = namedtuple(
+    'Airport',
+    ['airport_id', 'airport_ident', 'type', 'name', 'latitude_deg', 'longitude_deg',
+     'elevation_ft', 'continent_id', 'country_id', 'region_id', 'municipality',
+     'scheduled_service', 'gps_code', 'iata_code', 'local_code', 'home_link',
+     'wikipedia_link', 'keywords'])
+
+Airport.__annotations__ = {
+    'airport_id': int | None,
+    'airport_ident': str | None,
+    'type': str | None,
+    'name': str | None,
+    'latitude_deg': float | None,
+    'longitude_deg': float | None,
+    'elevation_ft': int | None,
+    'continent_id': int | str | None,
+    'country_id': int | None,
+    'region_id': int | None,
+    'municipality': str | None,
+    'scheduled_service': int | None,
+    'gps_code': str | None,
+    'iata_code': str | None,
+    'local_code': str | None,
+    'home_link': str | None,
+    'wikipedia_link': str | None,
+    'keywords': str | None
+}
+
+DuplicateAirportCandidate = namedtuple(
+    'DuplicateAirportCandidate',
+    ['airport_id', 'airport_ident', 'name', 'other_airport_id', 'other_airport_ident',
+     'other_name', 'distance_m', 'similarity'])
+
+DuplicateAirportCandidate.__annotations__ = {
+    'airport_id': int,
+    'airport_ident': str | None,
+    'name': str | None,
+    'other_airport_id': int,
+    'other_airport_ident': str | None,
+    'other_name': str | None,
+    'distance_m': float,
+    'similarity': float
+}
+
+
+
+class StartAirportFuzzySearchEvent:
+    def __init__(self, name: str, limit: int = 20):
+        self._name = name
+        self._limit = limit
+
+
+    def name(self) -> str:
+        return self._name
+
+
+    def limit(self) -> int:
+        return self._limit
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: name = {repr(self._name)}, limit = {repr(self._limit)}'
+
+
+
+class StartAirportKeywordSearchEvent:
+    def __init__(self, keywords: list[str], match_all: bool = True):
+        self._keywords = keywords
+        self._match_all = match_all
+
+
+    def keywords(self) -> list[str]:
+        return self._keywords
+
+
+    def match_all(self) -> bool:
+        return self._match_all
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: keywords = {repr(self._keywords)}, ' + \
+               f'match_all = {repr(self._match_all)}'
+
+
+
+class AirportSearchResultEvent:
+    def __init__(self, airport: Airport):
+        self._airport = airport
+
+
+    def airport(self) -> Airport:
+        return self._airport
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport = {repr(self._airport)}'
+
+
+
+class LoadAirportEvent:
+    def __init__(self, airport_id: int):
+        self._airport_id = airport_id
+
+
+    def airport_id(self) -> int:
+        return self._airport_id
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport_id = {repr(self._airport_id)}'
+
+
+
+class AirportLoadedEvent:
+    def __init__(self, airport: Airport):
+        self._airport = airport
+
+
+    def airport(self) -> Airport:
+        return self._airport
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport = {repr(self._airport)}'
+
+
+
+class FindDuplicateAirportsEvent:
+    def __init__(self, max_distance_m: float = 1000.0, min_similarity: float = 0.5):
+        self._max_distance_m = max_distance_m
+        self._min_similarity = min_similarity
+
+
+    def max_distance_m(self) -> float:
+        return self._max_distance_m
+
+
+    def min_similarity(self) -> float:
+        return self._min_similarity
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: max_distance_m = {repr(self._max_distance_m)}, ' + \
+               f'min_similarity = {repr(self._min_similarity)}'
+
+
+
+class DuplicateAirportCandidateEvent:
+    def __init__(self, candidate: DuplicateAirportCandidate):
+        self._candidate = candidate
+
+
+    def candidate(self) -> DuplicateAirportCandidate:
+        return self._candidate
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: candidate = {repr(self._candidate)}'
+
+
+
+class DuplicateAirportsFoundEvent:
+    def __init__(self, count: int):
+        self._count = count
+
+
+    def count(self) -> int:
+        return self._count
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: count = {repr(self._count)}'
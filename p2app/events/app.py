@@ -7,8 +7,6 @@
 # engine, or from the engine back to the user interface.
 #
 # See the project write-up for details on when these events are sent and by whom.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 
 
@@ -26,6 +24,26 @@ class ErrorEvent:
 
 
 
+class RequestTimedOutEvent:
+    def __init__(self, event_type_name: str, budget: float):
+        self._event_type_name = event_type_name
+        self._budget = budget
+
+
+    def event_type_name(self) -> str:
+        return self._event_type_name
+
+
+    def budget(self) -> float:
+        return self._budget
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: event_type_name = {repr(self._event_type_name)}, ' + \
+               f'budget = {repr(self._budget)}'
+
+
+
 class QuitInitiatedEvent:
     def __repr__(self) -> str:
         return f'{type(self).__name__}'
@@ -35,3 +53,29 @@ class QuitInitiatedEvent:
 class EndApplicationEvent:
     def __repr__(self) -> str:
         return f'{type(self).__name__}'
+
+
+
+class RequestEventStatsEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class EventStatsEvent:
+    def __init__(self, stats: dict, queue_metrics: dict):
+        self._stats = stats
+        self._queue_metrics = queue_metrics
+
+
+    def stats(self) -> dict:
+        return self._stats
+
+
+    def queue_metrics(self) -> dict:
+        return self._queue_metrics
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: stats = {repr(self._stats)}, ' + \
+               f'queue_metrics = {repr(self._queue_metrics)}'
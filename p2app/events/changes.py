@@ -0,0 +1,88 @@
+# p2app/events/changes.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Events that are related to listing the changes made to the database, so that a
+# copy of its rows kept elsewhere can be brought up to date incrementally.
+
+from collections import namedtuple
+
+
+
+Change = namedtuple('Change', ['sequence', 'table_name', 'row_id', 'operation'])
+
+Change.__annotations__ = {
+    'sequence': int,
+    'table_name': str,
+    'row_id': int,
+    'operation': str
+}
+
+
+
+class ListChangesEvent:
+    def __init__(self, since_sequence: int, limit: int | None = None):
+        self._since_sequence = since_sequence
+        self._limit = limit
+
+
+    def since_sequence(self) -> int:
+        return self._since_sequence
+
+
+    def limit(self) -> int | None:
+        return self._limit
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: since_sequence = {repr(self._since_sequence)}, ' + \
+               f'limit = {repr(self._limit)}'
+
+
+
+class ChangeResultEvent:
+    def __init__(self, change: Change):
+        self._change = change
+
+
+    def change(self) -> Change:
+        return self._change
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: change = {repr(self._change)}'
+
+
+
+class ChangesListedEvent:
+    def __init__(self, last_sequence: int):
+        self._last_sequence = last_sequence
+
+
+    def last_sequence(self) -> int:
+        return self._last_sequence
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: last_sequence = {repr(self._last_sequence)}'
+
+
+
+class CompactChangeLogEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class ChangeLogCompactedEvent:
+    def __init__(self, removed_count: int):
+        self._removed_count = removed_count
+
+
+    def removed_count(self) -> int:
+        return self._removed_count
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: removed_count = {repr(self._removed_count)}'
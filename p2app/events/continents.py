@@ -7,8 +7,6 @@
 # in the database.
 #
 # See the project write-up for details on when these events are sent and by whom.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 from collections import namedtuple
 
@@ -24,6 +22,16 @@ Continent.__annotations__ = {
 
 
 
+ContinentSummary = namedtuple('ContinentSummary', ['continent_id', 'continent_code', 'name'])
+
+ContinentSummary.__annotations__ = {
+    'continent_id': int | None,
+    'continent_code': str | None,
+    'name': str | None
+}
+
+
+
 class StartContinentSearchEvent:
     def __init__(self, continent_code: str, name: str):
         self._continent_code = continent_code
@@ -43,6 +51,25 @@ class StartContinentSearchEvent:
 
 
 
+class StartContinentSummarySearchEvent:
+    def __init__(self, continent_code: str, name: str):
+        self._continent_code = continent_code
+        self._name = name
+
+
+    def continent_code(self) -> str:
+        return self._continent_code
+
+
+    def name(self) -> str:
+        return self._name
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: continent_code = {repr(self._continent_code)}, name = {repr(self._name)}'
+
+
+
 class ContinentSearchResultEvent:
     def __init__(self, continent: Continent):
         self._continent = continent
@@ -57,6 +84,54 @@ class ContinentSearchResultEvent:
 
 
 
+class ContinentSummarySearchResultEvent:
+    def __init__(self, summary: ContinentSummary):
+        self._summary = summary
+
+
+    def summary(self) -> ContinentSummary:
+        return self._summary
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: summary = {repr(self._summary)}'
+
+
+
+class ContinentSummarySearchCompletedEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class LoadContinentSummariesEvent:
+    def __init__(self, continent_ids: list[int]):
+        self._continent_ids = list(continent_ids)
+
+
+    def continent_ids(self) -> list[int]:
+        return self._continent_ids
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: continent_ids = {repr(self._continent_ids)}'
+
+
+
+class ContinentSummariesLoadedEvent:
+    def __init__(self, summaries: list[ContinentSummary]):
+        self._summaries = summaries
+
+
+    def summaries(self) -> list[ContinentSummary]:
+        return self._summaries
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: summaries = {repr(self._summaries)}'
+
+
+
 class LoadContinentEvent:
     def __init__(self, continent_id: int):
         self._continent_id = continent_id
@@ -7,8 +7,6 @@
 # in the database.
 #
 # See the project write-up for details on when these events are sent and by whom.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 from collections import namedtuple
 
@@ -29,6 +27,16 @@ Country.__annotations__ = {
 
 
 
+CountrySummary = namedtuple('CountrySummary', ['country_id', 'country_code', 'name'])
+
+CountrySummary.__annotations__ = {
+    'country_id': int | None,
+    'country_code': str | None,
+    'name': str | None
+}
+
+
+
 class StartCountrySearchEvent:
     def __init__(self, country_code: str, name: str):
         self._country_code = country_code
@@ -48,6 +56,45 @@ class StartCountrySearchEvent:
 
 
 
+class StartCountrySummarySearchEvent:
+    def __init__(self, country_code: str, name: str):
+        self._country_code = country_code
+        self._name = name
+
+
+    def country_code(self) -> str:
+        return self._country_code
+
+
+    def name(self) -> str:
+        return self._name
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: country_code = {repr(self._country_code)}, name = {repr(self._name)}'
+
+
+
+class StartCountryKeywordSearchEvent:
+    def __init__(self, keywords: list[str], match_all: bool = True):
+        self._keywords = keywords
+        self._match_all = match_all
+
+
+    def keywords(self) -> list[str]:
+        return self._keywords
+
+
+    def match_all(self) -> bool:
+        return self._match_all
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: keywords = {repr(self._keywords)}, ' + \
+               f'match_all = {repr(self._match_all)}'
+
+
+
 class CountrySearchResultEvent:
     def __init__(self, country: Country):
         self._country = country
@@ -62,6 +109,54 @@ class CountrySearchResultEvent:
 
 
 
+class CountrySummarySearchResultEvent:
+    def __init__(self, summary: CountrySummary):
+        self._summary = summary
+
+
+    def summary(self) -> CountrySummary:
+        return self._summary
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: summary = {repr(self._summary)}'
+
+
+
+class CountrySummarySearchCompletedEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class LoadCountrySummariesEvent:
+    def __init__(self, country_ids: list[int]):
+        self._country_ids = list(country_ids)
+
+
+    def country_ids(self) -> list[int]:
+        return self._country_ids
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: country_ids = {repr(self._country_ids)}'
+
+
+
+class CountrySummariesLoadedEvent:
+    def __init__(self, summaries: list[CountrySummary]):
+        self._summaries = summaries
+
+
+    def summaries(self) -> list[CountrySummary]:
+        return self._summaries
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: summaries = {repr(self._summaries)}'
+
+
+
 class LoadCountryEvent:
     def __init__(self, country_id: int):
         self._country_id = country_id
@@ -6,19 +6,20 @@
 # Events related to the opening and closing of the database.
 #
 # See the project write-up for details on when these events are sent and by whom.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
-from pathlib import Path
+# Postponing the evaluation of annotations means that the pathlib.Path they refer
+# to needn't be imported, since importing pathlib takes longer than importing all
+# of the events together.
+from __future__ import annotations
 
 
 
 class OpenDatabaseEvent:
-    def __init__(self, path: Path):
+    def __init__(self, path: pathlib.Path):
         self._path = path
 
 
-    def path(self) -> Path:
+    def path(self) -> pathlib.Path:
         return self._path
 
 
@@ -34,11 +35,11 @@ class CloseDatabaseEvent:
 
 
 class DatabaseOpenedEvent:
-    def __init__(self, path: Path):
+    def __init__(self, path: pathlib.Path):
         self._path = path
 
 
-    def path(self) -> Path:
+    def path(self) -> pathlib.Path:
         return self._path
 
 
@@ -64,3 +65,159 @@ class DatabaseOpenFailedEvent:
 class DatabaseClosedEvent:
     def __repr__(self) -> str:
         return f'{type(self).__name__}'
+
+
+
+class CheckIntegrityEvent:
+    def __init__(self, report_path: pathlib.Path | None):
+        self._report_path = report_path
+
+
+    def report_path(self) -> pathlib.Path | None:
+        return self._report_path
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: report_path = {repr(self._report_path)}'
+
+
+
+class IntegrityCheckedEvent:
+    def __init__(self, report: dict):
+        self._report = report
+
+
+    def report(self) -> dict:
+        return self._report
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: violation_count = {self._report["violation_count"]}'
+
+
+
+class DatabaseMigrationNeededEvent:
+    def __init__(self, descriptions: list[str]):
+        self._descriptions = descriptions
+
+
+    def descriptions(self) -> list[str]:
+        return self._descriptions
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: descriptions = {repr(self._descriptions)}'
+
+
+
+class MigrateDatabaseEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class DatabaseMigratedEvent:
+    def __init__(self, descriptions: list[str]):
+        self._descriptions = descriptions
+
+
+    def descriptions(self) -> list[str]:
+        return self._descriptions
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: descriptions = {repr(self._descriptions)}'
+
+
+
+class BackupDatabaseEvent:
+    def __init__(self, path: pathlib.Path, pages_per_step: int | None = None):
+        self._path = path
+        self._pages_per_step = pages_per_step
+
+
+    def path(self) -> pathlib.Path:
+        return self._path
+
+
+    def pages_per_step(self) -> int | None:
+        return self._pages_per_step
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: path = {repr(self._path)}, ' + \
+               f'pages_per_step = {repr(self._pages_per_step)}'
+
+
+
+class BackupProgressEvent:
+    def __init__(self, remaining_pages: int, total_pages: int):
+        self._remaining_pages = remaining_pages
+        self._total_pages = total_pages
+
+
+    def remaining_pages(self) -> int:
+        return self._remaining_pages
+
+
+    def total_pages(self) -> int:
+        return self._total_pages
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: remaining_pages = {repr(self._remaining_pages)}, ' + \
+               f'total_pages = {repr(self._total_pages)}'
+
+
+
+class DatabaseBackedUpEvent:
+    def __init__(self, path: pathlib.Path, integrity: list[str]):
+        self._path = path
+        self._integrity = integrity
+
+
+    def path(self) -> pathlib.Path:
+        return self._path
+
+
+    def integrity(self) -> list[str]:
+        return self._integrity
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: path = {repr(self._path)}, ' + \
+               f'integrity = {repr(self._integrity)}'
+
+
+
+class RestoreDatabaseEvent:
+    def __init__(self, path: pathlib.Path, pages_per_step: int | None = None):
+        self._path = path
+        self._pages_per_step = pages_per_step
+
+
+    def path(self) -> pathlib.Path:
+        return self._path
+
+
+    def pages_per_step(self) -> int | None:
+        return self._pages_per_step
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: path = {repr(self._path)}, ' + \
+               f'pages_per_step = {repr(self._pages_per_step)}'
+
+
+
+class DatabaseRestoredEvent:
+    def __init__(self, path: pathlib.Path):
+        self._path = path
+
+
+    def path(self) -> pathlib.Path:
+        return self._path
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: path = {repr(self._path)}'
@@ -11,7 +11,66 @@
 # * The user interface's internal events are routed back to the user interface
 #   to be processed, with the engine never seeing them.
 #
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
+# By default, events are processed synchronously as they're initiated.  In queued
+# mode, they're placed in a bounded queue instead and processed in order, with
+# searches and loads that are superseded before they're processed coalesced away,
+# and with a policy deciding what happens when the queue is full.
+#
+# Either way, the time the engine spends on each event is measured, and the
+# measurements can be asked for by sending a RequestEventStatsEvent, which is
+# answered by the bus itself rather than the engine.
+#
+# A recorder can also be registered, in which case every event initiated is
+# written to its log before it's processed.
+
+from collections import deque
+import time
+from .app import EventStatsEvent, RequestEventStatsEvent
+from .metrics import EventMetrics
+
+
+
+# What happens when an event is initiated while the queue is full:
+#
+# * DROP_OLDEST discards the oldest queued search or load
+# * DROP_NEWEST discards the new event, if it's a search or a load
+# * MERGE coalesces loads of the same type regardless of their IDs
+#
+# The policy applies the same way whether or not the queue is being drained at
+# the time.  If it leaves no room, the queue is drained before the new event is
+# added, unless it's being drained already (i.e., the event was initiated while
+# another was being processed), in which case the oldest search or load, queued
+# or new, is dropped instead.  Events that change data (e.g., saves) are never
+# dropped, so only one of those, initiated during a drain while every queued event
+# also changes data, can go beyond the queue's bound.
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+MERGE = 'merge'
+
+_DEFAULT_MAX_QUEUE_DEPTH = 64
+
+
+
+def _is_search(event):
+    name = type(event).__name__
+    return name.startswith('Start') and name.endswith('SearchEvent')
+
+
+def _is_load(event):
+    name = type(event).__name__
+    return name.startswith('Load') and name.endswith('Event')
+
+
+def _coalescing_key(event, merge_loads):
+    if _is_search(event):
+        return type(event)
+    elif _is_load(event):
+        if merge_loads:
+            return type(event)
+        else:
+            return type(event), tuple(sorted((k, repr(v)) for k, v in vars(event).items()))
+    else:
+        return None
 
 
 
@@ -20,6 +79,17 @@ class EventBus:
         self._view = None
         self._engine = None
         self._is_debug_mode = False
+        self._queue = None
+        self._max_queue_depth = _DEFAULT_MAX_QUEUE_DEPTH
+        self._overflow_policy = DROP_OLDEST
+        self._scheduler = None
+        self._canceller = None
+        self._is_draining = False
+        self._is_drain_scheduled = False
+        self._scheduled_drain = None
+        self._reset_queue_metrics()
+        self._metrics = EventMetrics()
+        self._recorder = None
 
 
     def register_view(self, view):
@@ -30,6 +100,14 @@ class EventBus:
         self._engine = engine
 
 
+    def register_recorder(self, recorder):
+        self._recorder = recorder
+
+
+    def unregister_recorder(self):
+        self._recorder = None
+
+
     def enable_debug_mode(self):
         self._is_debug_mode = True
 
@@ -38,12 +116,222 @@ class EventBus:
         self._is_debug_mode = False
 
 
+    def enable_queued_mode(self, max_queue_depth = _DEFAULT_MAX_QUEUE_DEPTH,
+                           overflow_policy = DROP_OLDEST, scheduler = None, canceller = None):
+        # The scheduler, if given, is called with a function that drains the queue,
+        # and is expected to call it later (e.g., a tkinter widget's after_idle),
+        # so that a burst of events initiated together can be coalesced.  Without
+        # one, the queue is drained as soon as an event is initiated, which still
+        # keeps events initiated while another is being processed from re-entering
+        # the engine.  The canceller, if given, is called with whatever the scheduler
+        # returned (e.g., a tkinter widget's after_cancel) when queued mode is
+        # disabled before the scheduled drain has happened.
+        if overflow_policy not in (DROP_OLDEST, DROP_NEWEST, MERGE):
+            raise ValueError(f'Unknown overflow policy: {overflow_policy}')
+
+        if self._queue is None:
+            self._queue = deque()
+
+        self._max_queue_depth = max(1, max_queue_depth)
+        self._overflow_policy = overflow_policy
+        self._scheduler = scheduler
+        self._canceller = canceller
+
+
+    def disable_queued_mode(self, discard = False):
+        # The events still queued are processed first, unless discard is True (e.g.,
+        # because the user interface they'd be reported to is going away), in which
+        # case they're dropped.
+        if self._queue is None:
+            return
+
+        if self._is_drain_scheduled and self._canceller is not None:
+            self._canceller(self._scheduled_drain)
+
+        self._is_drain_scheduled = False
+        self._scheduled_drain = None
+
+        if discard:
+            for event in self._queue:
+                self._note_dropped(event)
+        else:
+            self._drain()
+
+        self._queue = None
+        self._scheduler = None
+        self._canceller = None
+
+
+    def event_metrics(self):
+        return self._metrics.snapshot()
+
+
+    def reset_event_metrics(self):
+        self._metrics.reset()
+        self._reset_queue_metrics()
+
+
+    def queue_metrics(self):
+        return {
+            'depth': len(self._queue) if self._queue is not None else 0,
+            'max_depth': self._max_queue_depth,
+            **self._queue_metrics
+        }
+
+
+    def _reset_queue_metrics(self):
+        self._queue_metrics = {
+            'high_water_mark': 0,
+            'enqueued': 0,
+            'processed': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'forced_drains': 0
+        }
+
+
     def initiate_event(self, event):
+        if self._recorder is not None and not isinstance(event, RequestEventStatsEvent):
+            self._recorder.record(event)
+
+        if self._queue is None:
+            self._process_event(event)
+        else:
+            self._enqueue(event)
+            self._schedule_drain()
+
+
+    def _process_event(self, event):
         if self._is_debug_mode:
             print(f'Sent by view  : {event}')
 
-        for result_event in self._engine.process_event(event):
+        if isinstance(event, RequestEventStatsEvent):
+            self._view.handle_event(EventStatsEvent(self.event_metrics(), self.queue_metrics()))
+            return
+
+        # Only the time spent inside the engine is measured, not the time the view
+        # spends handling each result between them.
+        result_events = self._engine.process_event(event)
+        engine_time = 0.0
+        time_to_first_result = None
+        result_count = 0
+
+        while True:
+            started_at = time.perf_counter()
+
+            try:
+                result_event = next(result_events)
+            except StopIteration:
+                engine_time += time.perf_counter() - started_at
+                break
+
+            engine_time += time.perf_counter() - started_at
+
+            if result_event is None:
+                continue
+
+            if time_to_first_result is None:
+                time_to_first_result = engine_time
+
+            result_count += 1
+
             if self._is_debug_mode:
                 print(f'Sent by engine: {result_event}')
 
             self._view.handle_event(result_event)
+
+        self._metrics.record(type(event).__name__, time_to_first_result, engine_time, result_count)
+
+
+    def _enqueue(self, event):
+        merge_loads = self._overflow_policy == MERGE and self._is_full()
+        key = _coalescing_key(event, merge_loads)
+
+        if key is not None:
+            self._remove_superseded(key, merge_loads)
+
+        if self._is_full() and not self._make_room(key is not None):
+            self._note_dropped(event)
+            return
+
+        self._queue.append(event)
+        self._queue_metrics['enqueued'] += 1
+        self._queue_metrics['high_water_mark'] = max(
+            self._queue_metrics['high_water_mark'], len(self._queue))
+
+
+    def _is_full(self):
+        return len(self._queue) >= self._max_queue_depth
+
+
+    def _make_room(self, droppable):
+        # Makes room in the full queue for a new event, which is droppable if it's a
+        # search or a load, returning False if the new event should be dropped instead.
+        if self._overflow_policy == DROP_NEWEST and droppable:
+            return False
+        elif self._overflow_policy == DROP_OLDEST and self._drop_oldest_droppable():
+            return True
+        elif not self._is_draining:
+            self._queue_metrics['forced_drains'] += 1
+            self._drain()
+            return True
+        elif self._drop_oldest_droppable():
+            return True
+        else:
+            return not droppable
+
+
+    def _remove_superseded(self, key, merge_loads):
+        for queued_event in list(self._queue):
+            if _coalescing_key(queued_event, merge_loads) == key:
+                self._queue.remove(queued_event)
+                self._queue_metrics['coalesced'] += 1
+
+                if self._is_debug_mode:
+                    print(f'Coalesced     : {queued_event}')
+
+
+    def _drop_oldest_droppable(self):
+        for queued_event in self._queue:
+            if _coalescing_key(queued_event, False) is not None:
+                self._queue.remove(queued_event)
+                self._note_dropped(queued_event)
+                return True
+
+        return False
+
+
+    def _note_dropped(self, event):
+        self._queue_metrics['dropped'] += 1
+
+        if self._is_debug_mode:
+            print(f'Dropped       : {event}')
+
+
+    def _schedule_drain(self):
+        if self._is_draining or self._is_drain_scheduled:
+            return
+
+        if self._scheduler is None:
+            self._drain()
+        else:
+            self._is_drain_scheduled = True
+            self._scheduled_drain = self._scheduler(self._drain)
+
+
+    def _drain(self):
+        self._is_drain_scheduled = False
+        self._scheduled_drain = None
+
+        if self._is_draining or self._queue is None:
+            return
+
+        self._is_draining = True
+
+        try:
+            while self._queue:
+                event = self._queue.popleft()
+                self._queue_metrics['processed'] += 1
+                self._process_event(event)
+        finally:
+            self._is_draining = False
@@ -0,0 +1,190 @@
+# p2app/events/federation.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Events that are related to attaching other databases alongside the open one,
+# searching all of them at once, and copying records from one to another.
+
+# Postponing the evaluation of annotations means that the pathlib.Path they refer
+# to needn't be imported, since importing pathlib takes longer than importing all
+# of the events together.
+from __future__ import annotations
+
+
+
+class AttachDatabaseEvent:
+    def __init__(self, path: pathlib.Path, alias: str):
+        self._path = path
+        self._alias = alias
+
+
+    def path(self) -> pathlib.Path:
+        return self._path
+
+
+    def alias(self) -> str:
+        return self._alias
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: path = {repr(self._path)}, alias = {repr(self._alias)}'
+
+
+
+class DatabaseAttachedEvent:
+    def __init__(self, path: pathlib.Path, alias: str):
+        self._path = path
+        self._alias = alias
+
+
+    def path(self) -> pathlib.Path:
+        return self._path
+
+
+    def alias(self) -> str:
+        return self._alias
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: path = {repr(self._path)}, alias = {repr(self._alias)}'
+
+
+
+class DetachDatabaseEvent:
+    def __init__(self, alias: str):
+        self._alias = alias
+
+
+    def alias(self) -> str:
+        return self._alias
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: alias = {repr(self._alias)}'
+
+
+
+class DatabaseDetachedEvent:
+    def __init__(self, alias: str):
+        self._alias = alias
+
+
+    def alias(self) -> str:
+        return self._alias
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: alias = {repr(self._alias)}'
+
+
+
+class StartFederatedSearchEvent:
+    def __init__(self, table_name: str, code: str | None, name: str | None):
+        self._table_name = table_name
+        self._code = code
+        self._name = name
+
+
+    def table_name(self) -> str:
+        return self._table_name
+
+
+    def code(self) -> str | None:
+        return self._code
+
+
+    def name(self) -> str | None:
+        return self._name
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: table_name = {repr(self._table_name)}, ' + \
+               f'code = {repr(self._code)}, name = {repr(self._name)}'
+
+
+
+class FederatedSearchResultEvent:
+    def __init__(self, source: str, record: tuple):
+        self._source = source
+        self._record = record
+
+
+    def source(self) -> str:
+        return self._source
+
+
+    def record(self) -> tuple:
+        return self._record
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: source = {repr(self._source)}, record = {repr(self._record)}'
+
+
+
+class CopyRecordsEvent:
+    def __init__(self, table_name: str, record_ids: list[int], source: str, target: str,
+                 replace: bool = False):
+        self._table_name = table_name
+        self._record_ids = record_ids
+        self._source = source
+        self._target = target
+        self._replace = replace
+
+
+    def table_name(self) -> str:
+        return self._table_name
+
+
+    def record_ids(self) -> list[int]:
+        return self._record_ids
+
+
+    def source(self) -> str:
+        return self._source
+
+
+    def target(self) -> str:
+        return self._target
+
+
+    def replace(self) -> bool:
+        return self._replace
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: table_name = {repr(self._table_name)}, ' + \
+               f'record_ids = {repr(self._record_ids)}, source = {repr(self._source)}, ' + \
+               f'target = {repr(self._target)}, replace = {repr(self._replace)}'
+
+
+
+class RecordsCopiedEvent:
+    def __init__(self, table_name: str, source: str, target: str, count: int):
+        self._table_name = table_name
+        self._source = source
+        self._target = target
+        self._count = count
+
+
+    def table_name(self) -> str:
+        return self._table_name
+
+
+    def source(self) -> str:
+        return self._source
+
+
+    def target(self) -> str:
+        return self._target
+
+
+    def count(self) -> int:
+        return self._count
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: table_name = {repr(self._table_name)}, ' + \
+               f'source = {repr(self._source)}, target = {repr(self._target)}, ' + \
+               f'count = {repr(self._count)}'
@@ -0,0 +1,121 @@
+# p2app/events/metrics.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Per-event-type latency and throughput measurements, kept by the event bus for
+# every event it sends to the engine.  Latencies are recorded in histograms with
+# a fixed number of buckets, so the memory used doesn't grow with the number of
+# events processed.
+
+import math
+
+
+
+# Bucket i counts latencies of at most 2 ** i microseconds; the last bucket also
+# counts anything longer, so the histograms reach to a little over two minutes.
+_BUCKET_COUNT = 28
+
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self._buckets = [0] * _BUCKET_COUNT
+        self._count = 0
+        self._total = 0.0
+        self._max = 0.0
+
+
+    def record(self, seconds: float):
+        microseconds = seconds * 1_000_000
+
+        if microseconds <= 1:
+            bucket = 0
+        else:
+            bucket = min(_BUCKET_COUNT - 1, math.ceil(math.log2(microseconds)))
+
+        self._buckets[bucket] += 1
+        self._count += 1
+        self._total += seconds
+        self._max = max(self._max, seconds)
+
+
+    def count(self) -> int:
+        return self._count
+
+
+    def percentile(self, fraction: float) -> float:
+        """Returns an upper bound, in seconds, on the given fraction of the recorded
+        latencies (e.g., 0.99 for the 99th percentile)."""
+        if self._count == 0:
+            return 0.0
+
+        threshold = fraction * self._count
+        seen = 0
+
+        for bucket, count in enumerate(self._buckets):
+            seen += count
+
+            if seen >= threshold:
+                return min(self._max, (2 ** bucket) / 1_000_000)
+
+        return self._max
+
+
+    def summary(self) -> dict:
+        return {
+            'count': self._count,
+            'mean': self._total / self._count if self._count else 0.0,
+            'p50': self.percentile(0.50),
+            'p90': self.percentile(0.90),
+            'p99': self.percentile(0.99),
+            'max': self._max
+        }
+
+
+
+class _EventTypeMetrics:
+    def __init__(self):
+        self.count = 0
+        self.result_events = 0
+        self.time_to_first_result = LatencyHistogram()
+        self.total_time = LatencyHistogram()
+
+
+
+class EventMetrics:
+    def __init__(self):
+        self._metrics_by_type = {}
+
+
+    def record(self, event_type_name: str, time_to_first_result: float | None,
+               total_time: float, result_events: int):
+        metrics = self._metrics_by_type.get(event_type_name)
+
+        if metrics is None:
+            metrics = self._metrics_by_type[event_type_name] = _EventTypeMetrics()
+
+        metrics.count += 1
+        metrics.result_events += result_events
+        metrics.total_time.record(total_time)
+
+        if time_to_first_result is not None:
+            metrics.time_to_first_result.record(time_to_first_result)
+
+
+    def reset(self):
+        self._metrics_by_type = {}
+
+
+    def snapshot(self) -> dict:
+        """Returns the measurements so far, keyed by event type name, as a dictionary
+        containing only built-in types.  Times are in seconds."""
+        return {
+            event_type_name: {
+                'count': metrics.count,
+                'result_events': metrics.result_events,
+                'time_to_first_result': metrics.time_to_first_result.summary(),
+                'total_time': metrics.total_time.summary()
+            }
+            for event_type_name, metrics in sorted(self._metrics_by_type.items())
+        }
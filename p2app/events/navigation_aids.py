@@ -0,0 +1,117 @@
+# p2app/events/navigation_aids.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Events that are related to searching for and loading navigation aids in the
+# database.
+
+from collections import namedtuple
+
+
+
+NavigationAid = namedtuple(
+    'NavigationAid',
+    ['navigation_aid_id', 'filename', 'ident', 'name', 'type', 'frequency_khz',
+     'latitude_deg', 'longitude_deg', 'elevation_ft', 'iso_country',
+     'dme_frequency_khz', 'dme_channel', 'dme_latitude_deg', 'dme_longitude_deg',
+     'dme_elevation_ft', 'adjusted_variation_deg', 'magnetic_variation_deg',
+     'usage_type', 'power', 'airport_id'])
+
+NavigationAid.__annotations__ = {
+    'navigation_aid_id': int | None,
+    'filename': str | None,
+    'ident': str | None,
+    'name': str | None,
+    'type': str | None,
+    'frequency_khz': int | None,
+    'latitude_deg': float | None,
+    'longitude_deg': float | None,
+    'elevation_ft': int | None,
+    'iso_country': str | None,
+    'dme_frequency_khz': int | None,
+    'dme_channel': str | None,
+    'dme_latitude_deg': float | None,
+    'dme_longitude_deg': float | None,
+    'dme_elevation_ft': int | None,
+    'adjusted_variation_deg': float | None,
+    'magnetic_variation_deg': float | None,
+    'usage_type': str | None,
+    'power': str | None,
+    'airport_id': int | None
+}
+
+
+
+class StartNavigationAidSearchEvent:
+    def __init__(self, ident: str | None, navigation_aid_type: str | None,
+                 frequency_khz: int | None, airport_id: int | None):
+        self._ident = ident
+        self._navigation_aid_type = navigation_aid_type
+        self._frequency_khz = frequency_khz
+        self._airport_id = airport_id
+
+
+    def ident(self) -> str | None:
+        return self._ident
+
+
+    def navigation_aid_type(self) -> str | None:
+        return self._navigation_aid_type
+
+
+    def frequency_khz(self) -> int | None:
+        return self._frequency_khz
+
+
+    def airport_id(self) -> int | None:
+        return self._airport_id
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: ident = {repr(self._ident)}, ' + \
+               f'navigation_aid_type = {repr(self._navigation_aid_type)}, ' + \
+               f'frequency_khz = {repr(self._frequency_khz)}, ' + \
+               f'airport_id = {repr(self._airport_id)}'
+
+
+
+class NavigationAidSearchResultEvent:
+    def __init__(self, navigation_aid: NavigationAid):
+        self._navigation_aid = navigation_aid
+
+
+    def navigation_aid(self) -> NavigationAid:
+        return self._navigation_aid
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: navigation_aid = {repr(self._navigation_aid)}'
+
+
+
+class LoadNavigationAidEvent:
+    def __init__(self, navigation_aid_id: int):
+        self._navigation_aid_id = navigation_aid_id
+
+
+    def navigation_aid_id(self) -> int:
+        return self._navigation_aid_id
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: navigation_aid_id = {repr(self._navigation_aid_id)}'
+
+
+
+class NavigationAidLoadedEvent:
+    def __init__(self, navigation_aid: NavigationAid):
+        self._navigation_aid = navigation_aid
+
+
+    def navigation_aid(self) -> NavigationAid:
+        return self._navigation_aid
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: navigation_aid = {repr(self._navigation_aid)}'
@@ -0,0 +1,100 @@
+# p2app/events/recorder.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# A recorder that writes every event the user interface sends toward the engine
+# to an append-only log, one compact JSON object per line, so that a session can
+# later be replayed against an engine without the user interface (see
+# p2app/replay.py).
+#
+# Events are encoded generically from their attributes, so new event types can
+# be recorded without any changes here.
+
+import importlib
+import json
+import time
+from pathlib import Path
+
+
+
+def _qualified_name(cls):
+    return f'{cls.__module__}:{cls.__qualname__}'
+
+
+def _find_class(qualified_name):
+    module_name, class_name = qualified_name.split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _encode_value(value):
+    if isinstance(value, tuple) and hasattr(value, '_fields'):
+        return {'tuple': _qualified_name(type(value)), 'values': [_encode_value(v) for v in value]}
+    elif isinstance(value, Path):
+        return {'path': str(value)}
+    elif isinstance(value, (list, tuple)):
+        return [_encode_value(v) for v in value]
+    else:
+        return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and 'tuple' in value:
+        return _find_class(value['tuple'])(*(_decode_value(v) for v in value['values']))
+    elif isinstance(value, dict) and 'path' in value:
+        return Path(value['path'])
+    elif isinstance(value, list):
+        return [_decode_value(v) for v in value]
+    else:
+        return value
+
+
+def encode_event(event) -> dict:
+    return {
+        'type': _qualified_name(type(event)),
+        'fields': {name: _encode_value(value) for name, value in vars(event).items()}
+    }
+
+
+def decode_event(encoded: dict):
+    event_type = _find_class(encoded['type'])
+    event = event_type.__new__(event_type)
+
+    for name, value in encoded['fields'].items():
+        setattr(event, name, _decode_value(value))
+
+    return event
+
+
+def read_events(path: Path):
+    """A generator that yields a (timestamp, event) tuple for each event recorded in
+    a log, in the order they were recorded.  Timestamps are in seconds since the
+    epoch."""
+    with open(path, 'r', encoding = 'utf-8') as log_file:
+        for line in log_file:
+            if line.strip():
+                record = json.loads(line)
+                yield record['t'], decode_event(record['event'])
+
+
+
+class EventRecorder:
+    def __init__(self, path: Path):
+        # Line buffering means each event reaches the log as soon as it's recorded,
+        # so a session that ends abruptly still leaves a usable log behind.
+        self._path = Path(path)
+        self._log_file = open(self._path, 'a', encoding = 'utf-8', buffering = 1)
+
+
+    def path(self) -> Path:
+        return self._path
+
+
+    def record(self, event):
+        record = {'t': round(time.time(), 6), 'event': encode_event(event)}
+        self._log_file.write(json.dumps(record, separators = (',', ':'), ensure_ascii = False))
+        self._log_file.write('\n')
+
+
+    def close(self):
+        self._log_file.close()
@@ -7,8 +7,6 @@
 # in the database.
 #
 # See the project write-up for details on when these events are sent and by whom.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 from collections import namedtuple
 
@@ -32,6 +30,17 @@ Region.__annotations__ = {
 
 
 
+RegionSummary = namedtuple('RegionSummary', ['region_id', 'region_code', 'local_code', 'name'])
+
+RegionSummary.__annotations__ = {
+    'region_id': int | None,
+    'region_code': str | None,
+    'local_code': str | None,
+    'name': str | None
+}
+
+
+
 class StartRegionSearchEvent:
     def __init__(self, region_code: str, local_code: str, name: str):
         self._region_code = region_code
@@ -57,6 +66,70 @@ class StartRegionSearchEvent:
 
 
 
+class StartRegionSummarySearchEvent:
+    def __init__(self, region_code: str, local_code: str, name: str):
+        self._region_code = region_code
+        self._local_code = local_code
+        self._name = name
+
+
+    def region_code(self) -> str:
+        return self._region_code
+
+
+    def local_code(self) -> str:
+        return self._local_code
+
+
+    def name(self) -> str:
+        return self._name
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: region_code = {repr(self._region_code)}, ' + \
+               f'local_code = {repr(self._local_code)}, name = {repr(self._name)}'
+
+
+
+class StartRegionFuzzySearchEvent:
+    def __init__(self, name: str, limit: int = 20):
+        self._name = name
+        self._limit = limit
+
+
+    def name(self) -> str:
+        return self._name
+
+
+    def limit(self) -> int:
+        return self._limit
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: name = {repr(self._name)}, limit = {repr(self._limit)}'
+
+
+
+class StartRegionKeywordSearchEvent:
+    def __init__(self, keywords: list[str], match_all: bool = True):
+        self._keywords = keywords
+        self._match_all = match_all
+
+
+    def keywords(self) -> list[str]:
+        return self._keywords
+
+
+    def match_all(self) -> bool:
+        return self._match_all
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: keywords = {repr(self._keywords)}, ' + \
+               f'match_all = {repr(self._match_all)}'
+
+
+
 class RegionSearchResultEvent:
     def __init__(self, region: Region):
         self._region = region
@@ -71,6 +144,54 @@ class RegionSearchResultEvent:
 
 
 
+class RegionSummarySearchResultEvent:
+    def __init__(self, summary: RegionSummary):
+        self._summary = summary
+
+
+    def summary(self) -> RegionSummary:
+        return self._summary
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: summary = {repr(self._summary)}'
+
+
+
+class RegionSummarySearchCompletedEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class LoadRegionSummariesEvent:
+    def __init__(self, region_ids: list[int]):
+        self._region_ids = list(region_ids)
+
+
+    def region_ids(self) -> list[int]:
+        return self._region_ids
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: region_ids = {repr(self._region_ids)}'
+
+
+
+class RegionSummariesLoadedEvent:
+    def __init__(self, summaries: list[RegionSummary]):
+        self._summaries = summaries
+
+
+    def summaries(self) -> list[RegionSummary]:
+        return self._summaries
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: summaries = {repr(self._summaries)}'
+
+
+
 class LoadRegionEvent:
     def __init__(self, region_id: int):
         self._region_id = region_id
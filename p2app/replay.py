@@ -0,0 +1,210 @@
+# p2app/replay.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Replays a log written by p2app.events.recorder.EventRecorder against the engine,
+# without any user interface, and reports the latency of each type of event.
+#
+#     python -m p2app.replay session.jsonl
+#     python -m p2app.replay session.jsonl --speed original --database copy.db
+#     python -m p2app.replay session.jsonl --config "" --config "slow_query_log='slow.log'"
+#     python -m p2app.replay session.jsonl --config "budgets={'LoadRegionEvent': 0.5, 'StartRegionSearchEvent': 1.0}"
+#
+# Each --config is a comma-separated list of name=value keyword arguments passed
+# to Engine, written as they would be in a call to it; giving more than one replays the same log against each, so that
+# engine configurations can be compared.  Each replay runs against a fresh copy
+# of the database, so saves made by one replay are not seen by the next.
+
+import argparse
+import ast
+import inspect
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from p2app.engine import Engine
+from p2app.events import OpenDatabaseEvent
+from p2app.events.recorder import read_events
+
+
+
+ORIGINAL_SPEED = 'original'
+MAXIMUM_SPEED = 'max'
+
+
+
+def parse_config(text: str) -> dict:
+    """Parses a comma-separated list of name=value pairs into keyword arguments for
+    Engine, written as they would be in a call to it, so that values are Python
+    literals (strings must be quoted) and may themselves hold commas.  Raises
+    ValueError if the text isn't such a list, or names an option Engine doesn't
+    have."""
+    try:
+        call = ast.parse(f'f({text})', mode = 'eval').body
+    except SyntaxError:
+        raise ValueError(f'Engine options must be name=value pairs: {text}')
+
+    if not isinstance(call, ast.Call) or call.args or any(keyword.arg is None for keyword in call.keywords):
+        raise ValueError(f'Engine options must be name=value pairs: {text}')
+
+    options = {}
+    parameters = inspect.signature(Engine).parameters
+
+    for keyword in call.keywords:
+        if keyword.arg not in parameters:
+            raise ValueError(f'Engine has no option named {keyword.arg}: {text}')
+        elif keyword.arg in options:
+            raise ValueError(f'{keyword.arg} is given more than once: {text}')
+
+        try:
+            options[keyword.arg] = ast.literal_eval(keyword.value)
+        except ValueError:
+            raise ValueError(f'The value of {keyword.arg} must be a Python literal: {text}')
+
+    return options
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float]) -> dict:
+    ordered = sorted(latencies)
+
+    return {
+        'count': len(ordered),
+        'p50': percentile(ordered, 0.50),
+        'p90': percentile(ordered, 0.90),
+        'p99': percentile(ordered, 0.99),
+        'max': ordered[-1] if ordered else 0.0,
+        'total': sum(ordered)
+    }
+
+
+def _copy_database(source_path: Path, target_path: Path):
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def replay(recorded_events, engine_options: dict | None = None,
+           database_path: Path | None = None, speed: str = MAXIMUM_SPEED) -> dict:
+    """Replays (timestamp, event) tuples against a new Engine created with the given
+    options, returning a dictionary of latency summaries keyed by event type name,
+    along with an 'all' entry summarizing every event.  If database_path is given,
+    it replaces the path in any OpenDatabaseEvent.  At the original speed, the
+    replay waits between events as long as the user originally did."""
+    engine = Engine(**(engine_options or {}))
+    latencies_by_type = {}
+    all_latencies = []
+    first_timestamp = None
+    started_at = time.perf_counter()
+
+    for timestamp, event in recorded_events:
+        if isinstance(event, OpenDatabaseEvent) and database_path is not None:
+            event = OpenDatabaseEvent(database_path)
+
+        if speed == ORIGINAL_SPEED:
+            if first_timestamp is None:
+                first_timestamp = timestamp
+
+            delay = (timestamp - first_timestamp) - (time.perf_counter() - started_at)
+
+            if delay > 0:
+                time.sleep(delay)
+
+        event_started_at = time.perf_counter()
+
+        for _ in engine.process_event(event):
+            pass
+
+        latency = time.perf_counter() - event_started_at
+        latencies_by_type.setdefault(type(event).__name__, []).append(latency)
+        all_latencies.append(latency)
+
+    summaries = {
+        event_type_name: summarize(latencies)
+        for event_type_name, latencies in sorted(latencies_by_type.items())
+    }
+
+    summaries['all'] = summarize(all_latencies)
+    return summaries
+
+
+def _print_report(config_text, summaries):
+    print(f'Engine configuration: {config_text or "(default)"}')
+    print(f'  {"Event":<36}{"Count":>8}{"p50 ms":>10}{"p90 ms":>10}{"p99 ms":>10}{"max ms":>10}')
+
+    for event_type_name, summary in summaries.items():
+        print(
+            f'  {event_type_name:<36}{summary["count"]:>8}'
+            f'{summary["p50"] * 1000:>10.3f}{summary["p90"] * 1000:>10.3f}'
+            f'{summary["p99"] * 1000:>10.3f}{summary["max"] * 1000:>10.3f}')
+
+    print()
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Replay a recorded event log against the engine.')
+    parser.add_argument('log', type = Path, help = 'the event log to replay')
+    parser.add_argument('--database', type = Path, help = 'the database to replay against, '
+                        'instead of the one opened in the log')
+    parser.add_argument('--speed', choices = [ORIGINAL_SPEED, MAXIMUM_SPEED], default = MAXIMUM_SPEED)
+    parser.add_argument('--config', action = 'append', default = None,
+                        help = 'comma-separated name=value Engine options, with Python literals as values; '
+                             'repeat to compare')
+    parser.add_argument('--in-place', action = 'store_true',
+                        help = 'replay against the database itself rather than a copy')
+    parser.add_argument('--json', action = 'store_true', help = 'print the results as JSON')
+    args = parser.parse_args(argv)
+
+    try:
+        configs = [(config_text, parse_config(config_text)) for config_text in args.config or ['']]
+    except ValueError as e:
+        parser.error(str(e))
+
+    recorded_events = list(read_events(args.log))
+
+    if args.database is not None:
+        source_path = args.database
+    else:
+        source_path = next(
+            (event.path() for _, event in recorded_events if isinstance(event, OpenDatabaseEvent)),
+            None)
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for config_text, engine_options in configs:
+            database_path = source_path
+
+            if source_path is not None and not args.in_place:
+                database_path = Path(temp_dir) / f'replay-{len(results)}.db'
+                _copy_database(source_path, database_path)
+
+            summaries = replay(recorded_events, engine_options, database_path, args.speed)
+            results.append({'config': config_text, 'results': summaries})
+
+    if args.json:
+        json.dump(results, sys.stdout, indent = 2)
+        print()
+    else:
+        for result in results:
+            _print_report(result['config'], result['results'])
+
+
+if __name__ == '__main__':
+    main()
@@ -5,14 +5,13 @@
 #
 # This is the portion of the user interface that is displayed when the
 # Edit / Continents menu item is selected.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 import tkinter
 import tkinter.messagebox
 from p2app.events import *
 from .event_handling import EventHandler
 from .events import *
+from .virtual_list import VirtualList
 
 
 
@@ -24,11 +23,17 @@ class ContinentsView(tkinter.Frame, EventHandler):
         search_view.grid(row = 0, column = 0, sticky = tkinter.NSEW)
 
         self._edit_view = None
+        self._loading_view = None
+        self._editor_view = None
 
         self.rowconfigure(0, weight = 0)
         self.rowconfigure(1, weight = 1)
         self.columnconfigure(0, weight = 1)
 
+        self.subscribe(
+            SaveContinentFailedEvent, DiscardContinentEvent, NewContinentEvent,
+            StartEditingContinentEvent, ContinentLoadedEvent, ContinentSavedEvent)
+
 
     def on_event(self, event):
         if isinstance(event, SaveContinentFailedEvent):
@@ -39,18 +44,36 @@ class ContinentsView(tkinter.Frame, EventHandler):
         if isinstance(event, DiscardContinentEvent):
             self._switch_edit_view(None)
         elif isinstance(event, NewContinentEvent):
-            self._switch_edit_view(_ContinentEditorView(self, True, True, None))
+            self._show_editor_view(True, True, None)
         elif isinstance(event, StartEditingContinentEvent):
-            self._switch_edit_view(_ContinentEditorLoadingView(self))
+            self._switch_edit_view(self._get_loading_view())
         elif isinstance(event, ContinentLoadedEvent):
-            self._switch_edit_view(_ContinentEditorView(self, False, True, event.continent()))
+            self._show_editor_view(False, True, event.continent())
         elif isinstance(event, ContinentSavedEvent):
-            self._switch_edit_view(_ContinentEditorView(self, False, False, event.continent()))
+            self._show_editor_view(False, False, event.continent())
+
+
+    def _get_loading_view(self):
+        if self._loading_view is None:
+            self._loading_view = _ContinentEditorLoadingView(self)
+
+        return self._loading_view
+
+
+    def _show_editor_view(self, is_new, is_editable, continent):
+        if self._editor_view is None:
+            self._editor_view = _ContinentEditorView(self)
+
+        self._editor_view.show(is_new, is_editable, continent)
+        self._switch_edit_view(self._editor_view)
 
 
     def _switch_edit_view(self, edit_view):
+        if edit_view is self._edit_view:
+            return
+
         if self._edit_view:
-            self._edit_view.destroy()
+            self._edit_view.grid_remove()
             self._edit_view = None
 
         if edit_view:
@@ -58,6 +81,7 @@ class ContinentsView(tkinter.Frame, EventHandler):
             self._edit_view.grid(row = 1, column = 0, padx = 5, pady = 5, sticky = tkinter.NSEW)
 
 
+
 class _ContinentsSearchView(tkinter.LabelFrame, EventHandler):
     def __init__(self, parent):
         super().__init__(parent, text = 'Continent Search')
@@ -89,16 +113,15 @@ class _ContinentsSearchView(tkinter.LabelFrame, EventHandler):
         empty_area = tkinter.Label(self, text = '')
         empty_area.grid(row = 3, column = 1, sticky = tkinter.NSEW, padx = 5, pady = 5)
 
-        self._search_list = tkinter.Listbox(
-            self, height = 4,
-            activestyle = tkinter.NONE, selectmode = tkinter.SINGLE)
+        self._search_list = VirtualList(
+            self, self._request_search_labels, self._on_search_selection_changed, height = 4)
 
-        self._search_list.bind('<<ListboxSelect>>', self._on_search_selection_changed)
         self._search_list.grid(
             row = 0, column = 2, rowspan = 4, columnspan = 1, sticky = tkinter.NSEW,
             padx = 5, pady = 5)
 
-        self._search_continent_ids = []
+        self._search_query = None
+        self._refined_ids = None
 
         button_frame = tkinter.Frame(self)
         button_frame.grid(row = 4, column = 2, sticky = tkinter.E, padx = 5, pady = 5)
@@ -124,10 +147,32 @@ class _ContinentsSearchView(tkinter.LabelFrame, EventHandler):
         self.columnconfigure(1, weight = 1)
         self.columnconfigure(2, weight = 2)
 
+        self.subscribe(
+            ClearContinentsSearchListEvent, ContinentSummarySearchResultEvent,
+            ContinentSummarySearchCompletedEvent, ContinentSummariesLoadedEvent,
+            ContinentSavedEvent)
+
 
     def _on_search_button_clicked(self):
-        self.initiate_event(ClearContinentsSearchListEvent())
-        self.initiate_event(StartContinentSearchEvent(self._get_search_code(), self._get_search_name()))
+        query = (self._get_search_code(), self._get_search_name())
+
+        # A search that refines the one whose results are listed can only narrow them,
+        # so rather than clearing the list, its results are collected and the list is
+        # brought up to date with them once the search completes.
+        if self._is_refinement(query):
+            self._refined_ids = []
+        else:
+            self._refined_ids = None
+            self.initiate_event(ClearContinentsSearchListEvent())
+
+        self._search_query = query
+        self.initiate_event(StartContinentSummarySearchEvent(*query))
+
+
+    def _is_refinement(self, query):
+        return self._search_query is not None and all(
+            previous is None or previous == value
+            for previous, value in zip(self._search_query, query))
 
 
     def _get_search_code(self):
@@ -141,8 +186,13 @@ class _ContinentsSearchView(tkinter.LabelFrame, EventHandler):
 
 
     def _get_selected_search_continent_id(self):
-        selection, *_ = self._search_list.curselection()
-        return self._search_continent_ids[selection]
+        return self._search_list.selected_id()
+
+
+    def _request_search_labels(self, item_ids):
+        # Only the listed IDs are kept, so the labels of the ones scrolled into view
+        # are loaded as they're needed.
+        self.initiate_event(LoadContinentSummariesEvent(item_ids))
 
 
     def _on_search_changed(self, *args):
@@ -155,8 +205,8 @@ class _ContinentsSearchView(tkinter.LabelFrame, EventHandler):
         return True
 
 
-    def _on_search_selection_changed(self, event):
-        if event.widget.curselection():
+    def _on_search_selection_changed(self):
+        if self._search_list.selected_id() is not None:
             new_state = tkinter.NORMAL
         else:
             new_state = tkinter.DISABLED
@@ -177,13 +227,30 @@ class _ContinentsSearchView(tkinter.LabelFrame, EventHandler):
 
     def on_event(self, event):
         if isinstance(event, ClearContinentsSearchListEvent):
-            self._search_list.delete(0, tkinter.END)
-            self._search_continent_ids = []
+            self._search_list.clear()
             self._edit_button['state'] = tkinter.DISABLED
-        elif isinstance(event, ContinentSearchResultEvent):
-            display_name = f'{event.continent().continent_code} - {event.continent().name}'
-            self._search_list.insert(tkinter.END, display_name)
-            self._search_continent_ids.append(event.continent().continent_id)
+        elif isinstance(event, ContinentSummarySearchResultEvent):
+            if self._refined_ids is not None:
+                self._refined_ids.append(event.summary().continent_id)
+            else:
+                self._search_list.append(event.summary().continent_id, _search_label(event.summary()))
+        elif isinstance(event, ContinentSummarySearchCompletedEvent):
+            if self._refined_ids is not None:
+                self._search_list.set_item_ids(self._refined_ids)
+                self._refined_ids = None
+                self._on_search_selection_changed()
+        elif isinstance(event, ContinentSummariesLoadedEvent):
+            self._search_list.set_labels(
+                {summary.continent_id: _search_label(summary) for summary in event.summaries()})
+        elif isinstance(event, ContinentSavedEvent):
+            # A saved continent may already be listed under its old code or name.
+            saved = event.continent()
+            self._search_list.refresh_label(saved.continent_id, _search_label(saved))
+
+
+
+def _search_label(summary):
+    return f'{summary.continent_code} - {summary.name}'
 
 
 
@@ -197,60 +264,40 @@ class _ContinentEditorLoadingView(tkinter.LabelFrame, EventHandler):
 
 
 class _ContinentEditorView(tkinter.LabelFrame, EventHandler):
-    def __init__(self, parent, is_new, is_editable, continent):
-        if is_new:
-            frame_text = 'New Continent'
-        elif is_editable:
-            frame_text = 'Edit Continent'
-        else:
-            frame_text = 'Continent Saved'
-
-        super().__init__(parent, text = frame_text)
+    def __init__(self, parent):
+        super().__init__(parent)
 
-        self._is_new = is_new
-        self._continent_id = continent.continent_id if continent else None
-        code = continent.continent_code if continent and continent.continent_code else ''
-        name = continent.name if continent and continent.name else ''
+        self._is_new = False
+        self._continent_id = None
 
         self._continent_code = tkinter.StringVar()
-        self._continent_code.set(code)
-
         self._continent_name = tkinter.StringVar()
-        self._continent_name.set(name)
 
         continent_id_label = tkinter.Label(self, text = 'Continent ID: ')
         continent_id_label.grid(row = 0, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        continent_id_value_label_text = f'{self._continent_id if self._continent_id else "(New)"}'
-        continent_id_value_label = tkinter.Label(self, text = continent_id_value_label_text)
-        continent_id_value_label.grid(row = 0, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
+        self._continent_id_value_label = tkinter.Label(self)
+        self._continent_id_value_label.grid(row = 0, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
         code_label = tkinter.Label(self, text = 'Continent Code: ')
         code_label.grid(row = 1, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        if is_editable:
-            code_entry = tkinter.Entry(self, textvariable = self._continent_code, width = 10)
-        else:
-            code_entry = tkinter.Label(self, textvariable = self._continent_code)
-
+        code_entry = tkinter.Entry(self, textvariable = self._continent_code, width = 10)
         code_entry.grid(row = 1, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
         name_label = tkinter.Label(self, text = 'Name: ')
         name_label.grid(row = 2, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        if is_editable:
-            name_entry = tkinter.Entry(self, textvariable = self._continent_name, width = 30)
-        else:
-            name_entry = tkinter.Label(self, textvariable = self._continent_name)
-
+        name_entry = tkinter.Entry(self, textvariable = self._continent_name, width = 30)
         name_entry.grid(row = 2, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
+        self._entries = [code_entry, name_entry]
+
         button_frame = tkinter.Frame(self)
         button_frame.grid(row = 4, column = 1, padx = 5, pady = 5, sticky = tkinter.SE)
 
-        if is_editable:
-            save_button = tkinter.Button(button_frame, text = 'Save', command = self._on_save)
-            save_button.grid(row = 0, column = 0, padx = 5, pady = 5)
+        self._save_button = tkinter.Button(button_frame, text = 'Save', command = self._on_save)
+        self._save_button.grid(row = 0, column = 0, padx = 5, pady = 5)
 
         discard_button = tkinter.Button(button_frame, text = 'Discard', command = self._on_discard)
         discard_button.grid(row = 0, column = 1, padx = 5, pady = 5)
@@ -264,6 +311,31 @@ class _ContinentEditorView(tkinter.LabelFrame, EventHandler):
         self.columnconfigure(1, weight = 1)
 
 
+    def show(self, is_new, is_editable, continent):
+        if is_new:
+            frame_text = 'New Continent'
+        elif is_editable:
+            frame_text = 'Edit Continent'
+        else:
+            frame_text = 'Continent Saved'
+
+        self['text'] = frame_text
+        self._is_new = is_new
+        self._continent_id = continent.continent_id if continent else None
+        self._continent_id_value_label['text'] = f'{self._continent_id if self._continent_id else "(New)"}'
+
+        self._continent_code.set(continent.continent_code if continent and continent.continent_code else '')
+        self._continent_name.set(continent.name if continent and continent.name else '')
+
+        for entry in self._entries:
+            entry['state'] = tkinter.NORMAL if is_editable else 'readonly'
+
+        if is_editable:
+            self._save_button.grid()
+        else:
+            self._save_button.grid_remove()
+
+
     def _on_save(self):
         if self._is_new:
             self.initiate_event(SaveNewContinentEvent(self._make_continent()))
@@ -5,14 +5,13 @@
 #
 # This is the portion of the user interface that is displayed when the
 # Edit / Countries menu item is selected.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 import tkinter
 import tkinter.messagebox
 from p2app.events import *
 from .event_handling import EventHandler
 from .events import *
+from .virtual_list import VirtualList
 
 
 
@@ -24,11 +23,17 @@ class CountriesView(tkinter.Frame, EventHandler):
         search_view.grid(row = 0, column = 0, sticky = tkinter.NSEW)
 
         self._edit_view = None
+        self._loading_view = None
+        self._editor_view = None
 
         self.rowconfigure(0, weight = 0)
         self.rowconfigure(1, weight = 1)
         self.columnconfigure(0, weight = 1)
 
+        self.subscribe(
+            SaveCountryFailedEvent, DiscardCountryEvent, NewCountryEvent,
+            StartEditingCountryEvent, CountryLoadedEvent, CountrySavedEvent)
+
 
     def on_event(self, event):
         if isinstance(event, SaveCountryFailedEvent):
@@ -39,18 +44,36 @@ class CountriesView(tkinter.Frame, EventHandler):
         if isinstance(event, DiscardCountryEvent):
             self._switch_edit_view(None)
         elif isinstance(event, NewCountryEvent):
-            self._switch_edit_view(_CountryEditorView(self, True, True, None))
+            self._show_editor_view(True, True, None)
         elif isinstance(event, StartEditingCountryEvent):
-            self._switch_edit_view(_CountryEditorLoadingView(self))
+            self._switch_edit_view(self._get_loading_view())
         elif isinstance(event, CountryLoadedEvent):
-            self._switch_edit_view(_CountryEditorView(self, False, True, event.country()))
+            self._show_editor_view(False, True, event.country())
         elif isinstance(event, CountrySavedEvent):
-            self._switch_edit_view(_CountryEditorView(self, False, False, event.country()))
+            self._show_editor_view(False, False, event.country())
+
+
+    def _get_loading_view(self):
+        if self._loading_view is None:
+            self._loading_view = _CountryEditorLoadingView(self)
+
+        return self._loading_view
+
+
+    def _show_editor_view(self, is_new, is_editable, country):
+        if self._editor_view is None:
+            self._editor_view = _CountryEditorView(self)
+
+        self._editor_view.show(is_new, is_editable, country)
+        self._switch_edit_view(self._editor_view)
 
 
     def _switch_edit_view(self, edit_view):
+        if edit_view is self._edit_view:
+            return
+
         if self._edit_view:
-            self._edit_view.destroy()
+            self._edit_view.grid_remove()
             self._edit_view = None
 
         if edit_view:
@@ -90,16 +113,15 @@ class _CountriesSearchView(tkinter.LabelFrame, EventHandler):
         empty_area = tkinter.Label(self, text = '')
         empty_area.grid(row = 3, column = 1, sticky = tkinter.NSEW, padx = 5, pady = 5)
 
-        self._search_list = tkinter.Listbox(
-            self, height = 4,
-            activestyle = tkinter.NONE, selectmode = tkinter.SINGLE)
+        self._search_list = VirtualList(
+            self, self._request_search_labels, self._on_search_selection_changed, height = 4)
 
-        self._search_list.bind('<<ListboxSelect>>', self._on_search_selection_changed)
         self._search_list.grid(
             row = 0, column = 2, rowspan = 4, columnspan = 1, sticky = tkinter.NSEW,
             padx = 5, pady = 5)
 
-        self._search_country_ids = []
+        self._search_query = None
+        self._refined_ids = None
 
         button_frame = tkinter.Frame(self)
         button_frame.grid(row = 4, column = 2, sticky = tkinter.E, padx = 5, pady = 5)
@@ -125,10 +147,32 @@ class _CountriesSearchView(tkinter.LabelFrame, EventHandler):
         self.columnconfigure(1, weight = 1)
         self.columnconfigure(2, weight = 2)
 
+        self.subscribe(
+            ClearCountriesSearchListEvent, CountrySummarySearchResultEvent,
+            CountrySummarySearchCompletedEvent, CountrySummariesLoadedEvent,
+            CountrySavedEvent)
+
 
     def _on_search_button_clicked(self):
-        self.initiate_event(ClearCountriesSearchListEvent())
-        self.initiate_event(StartCountrySearchEvent(self._get_search_code(), self._get_search_name()))
+        query = (self._get_search_code(), self._get_search_name())
+
+        # A search that refines the one whose results are listed can only narrow them,
+        # so rather than clearing the list, its results are collected and the list is
+        # brought up to date with them once the search completes.
+        if self._is_refinement(query):
+            self._refined_ids = []
+        else:
+            self._refined_ids = None
+            self.initiate_event(ClearCountriesSearchListEvent())
+
+        self._search_query = query
+        self.initiate_event(StartCountrySummarySearchEvent(*query))
+
+
+    def _is_refinement(self, query):
+        return self._search_query is not None and all(
+            previous is None or previous == value
+            for previous, value in zip(self._search_query, query))
 
 
     def _get_search_code(self):
@@ -142,8 +186,13 @@ class _CountriesSearchView(tkinter.LabelFrame, EventHandler):
 
 
     def _get_selected_search_country_id(self):
-        selection, *_ = self._search_list.curselection()
-        return self._search_country_ids[selection]
+        return self._search_list.selected_id()
+
+
+    def _request_search_labels(self, item_ids):
+        # Only the listed IDs are kept, so the labels of the ones scrolled into view
+        # are loaded as they're needed.
+        self.initiate_event(LoadCountrySummariesEvent(item_ids))
 
 
     def _on_search_changed(self, *args):
@@ -156,8 +205,8 @@ class _CountriesSearchView(tkinter.LabelFrame, EventHandler):
         return True
 
 
-    def _on_search_selection_changed(self, event):
-        if event.widget.curselection():
+    def _on_search_selection_changed(self):
+        if self._search_list.selected_id() is not None:
             new_state = tkinter.NORMAL
         else:
             new_state = tkinter.DISABLED
@@ -178,13 +227,30 @@ class _CountriesSearchView(tkinter.LabelFrame, EventHandler):
 
     def on_event(self, event):
         if isinstance(event, ClearCountriesSearchListEvent):
-            self._search_list.delete(0, tkinter.END)
-            self._search_country_ids = []
+            self._search_list.clear()
             self._edit_button['state'] = tkinter.DISABLED
-        elif isinstance(event, CountrySearchResultEvent):
-            display_name = f'{event.country().country_code} - {event.country().name}'
-            self._search_list.insert(tkinter.END, display_name)
-            self._search_country_ids.append(event.country().country_id)
+        elif isinstance(event, CountrySummarySearchResultEvent):
+            if self._refined_ids is not None:
+                self._refined_ids.append(event.summary().country_id)
+            else:
+                self._search_list.append(event.summary().country_id, _search_label(event.summary()))
+        elif isinstance(event, CountrySummarySearchCompletedEvent):
+            if self._refined_ids is not None:
+                self._search_list.set_item_ids(self._refined_ids)
+                self._refined_ids = None
+                self._on_search_selection_changed()
+        elif isinstance(event, CountrySummariesLoadedEvent):
+            self._search_list.set_labels(
+                {summary.country_id: _search_label(summary) for summary in event.summaries()})
+        elif isinstance(event, CountrySavedEvent):
+            # A saved country may already be listed under its old code or name.
+            saved = event.country()
+            self._search_list.refresh_label(saved.country_id, _search_label(saved))
+
+
+
+def _search_label(summary):
+    return f'{summary.country_code} - {summary.name}'
 
 
 
@@ -198,102 +264,62 @@ class _CountryEditorLoadingView(tkinter.LabelFrame, EventHandler):
 
 
 class _CountryEditorView(tkinter.LabelFrame, EventHandler):
-    def __init__(self, parent, is_new, is_editable, country):
-        if is_new:
-            frame_text = 'New Country'
-        elif is_editable:
-            frame_text = 'Edit Country'
-        else:
-            frame_text = 'Country Saved'
-
-        super().__init__(parent, text = frame_text)
+    def __init__(self, parent):
+        super().__init__(parent)
 
-        self._is_new = is_new
-        self._country_id = country.country_id if country else None
-        code = country.country_code if country and country.country_code else ''
-        name = country.name if country and country.name else ''
-        continent_id = country.continent_id if country and country.continent_id else 0
-        wikipedia_link = country.wikipedia_link if country and country.wikipedia_link else ''
-        keywords = country.keywords if country and country.keywords else ''
+        self._is_new = False
+        self._country_id = None
 
         self._country_code = tkinter.StringVar()
-        self._country_code.set(code)
-
         self._country_name = tkinter.StringVar()
-        self._country_name.set(name)
-
         self._continent_id = tkinter.StringVar()
-        self._continent_id.set(str(continent_id))
-
         self._wikipedia_link = tkinter.StringVar()
-        self._wikipedia_link.set(wikipedia_link)
-
         self._keywords = tkinter.StringVar()
-        self._keywords.set(keywords)
 
         country_id_label = tkinter.Label(self, text = 'Country ID: ')
         country_id_label.grid(row = 0, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        country_id_value_label_text = f'{self._country_id if self._country_id else "(New)"}'
-        country_id_value_label = tkinter.Label(self, text = country_id_value_label_text)
-        country_id_value_label.grid(row = 0, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
+        self._country_id_value_label = tkinter.Label(self)
+        self._country_id_value_label.grid(row = 0, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
         code_label = tkinter.Label(self, text = 'Country Code: ')
         code_label.grid(row = 1, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        if is_editable:
-            code_entry = tkinter.Entry(self, textvariable = self._country_code, width = 10)
-        else:
-            code_entry = tkinter.Label(self, textvariable = self._country_code)
-
+        code_entry = tkinter.Entry(self, textvariable = self._country_code, width = 10)
         code_entry.grid(row = 1, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
         name_label = tkinter.Label(self, text = 'Name: ')
         name_label.grid(row = 2, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        if is_editable:
-            name_entry = tkinter.Entry(self, textvariable = self._country_name, width = 30)
-        else:
-            name_entry = tkinter.Label(self, textvariable = self._country_name)
-
+        name_entry = tkinter.Entry(self, textvariable = self._country_name, width = 30)
         name_entry.grid(row = 2, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
         continent_id_label = tkinter.Label(self, text = 'Continent ID: ')
         continent_id_label.grid(row = 3, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        if is_editable:
-            continent_id_entry = tkinter.Entry(self, textvariable = self._continent_id, width = 10)
-        else:
-            continent_id_entry = tkinter.Label(self, textvariable = self._continent_id)
-
+        continent_id_entry = tkinter.Entry(self, textvariable = self._continent_id, width = 10)
         continent_id_entry.grid(row = 3, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
         wikipedia_link_label = tkinter.Label(self, text = 'Wikipedia Link: ')
         wikipedia_link_label.grid(row = 4, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        if is_editable:
-            wikipedia_link_entry = tkinter.Entry(self, textvariable = self._wikipedia_link, width = 50)
-        else:
-            wikipedia_link_entry = tkinter.Label(self, textvariable = self._wikipedia_link)
-
+        wikipedia_link_entry = tkinter.Entry(self, textvariable = self._wikipedia_link, width = 50)
         wikipedia_link_entry.grid(row = 4, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
         keywords_label = tkinter.Label(self, text = 'Keywords: ')
         keywords_label.grid(row = 5, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        if is_editable:
-            keywords_entry = tkinter.Entry(self, textvariable = self._keywords, width = 50)
-        else:
-            keywords_entry = tkinter.Label(self, textvariable = self._keywords)
-
+        keywords_entry = tkinter.Entry(self, textvariable = self._keywords, width = 50)
         keywords_entry.grid(row = 5, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
+        self._entries = [
+            code_entry, name_entry, continent_id_entry, wikipedia_link_entry, keywords_entry]
+
         button_frame = tkinter.Frame(self)
         button_frame.grid(row = 7, column = 1, padx = 5, pady = 5, sticky = tkinter.SE)
 
-        if is_editable:
-            save_button = tkinter.Button(button_frame, text = 'Save', command = self._on_save)
-            save_button.grid(row = 0, column = 0, padx = 5, pady = 5)
+        self._save_button = tkinter.Button(button_frame, text = 'Save', command = self._on_save)
+        self._save_button.grid(row = 0, column = 0, padx = 5, pady = 5)
 
         discard_button = tkinter.Button(button_frame, text = 'Discard', command = self._on_discard)
         discard_button.grid(row = 0, column = 1, padx = 5, pady = 5)
@@ -310,6 +336,34 @@ class _CountryEditorView(tkinter.LabelFrame, EventHandler):
         self.columnconfigure(1, weight = 1)
 
 
+    def show(self, is_new, is_editable, country):
+        if is_new:
+            frame_text = 'New Country'
+        elif is_editable:
+            frame_text = 'Edit Country'
+        else:
+            frame_text = 'Country Saved'
+
+        self['text'] = frame_text
+        self._is_new = is_new
+        self._country_id = country.country_id if country else None
+        self._country_id_value_label['text'] = f'{self._country_id if self._country_id else "(New)"}'
+
+        self._country_code.set(country.country_code if country and country.country_code else '')
+        self._country_name.set(country.name if country and country.name else '')
+        self._continent_id.set(str(country.continent_id if country and country.continent_id else 0))
+        self._wikipedia_link.set(country.wikipedia_link if country and country.wikipedia_link else '')
+        self._keywords.set(country.keywords if country and country.keywords else '')
+
+        for entry in self._entries:
+            entry['state'] = tkinter.NORMAL if is_editable else 'readonly'
+
+        if is_editable:
+            self._save_button.grid()
+        else:
+            self._save_button.grid_remove()
+
+
     def _on_save(self):
         country = self._make_country()
 
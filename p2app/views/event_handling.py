@@ -7,12 +7,87 @@
 # (e.g., the events returned from the p2app.engine package, or events that are
 # internal to the user interface).
 #
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
+# Components declare which types of events they handle by calling subscribe(),
+# and events are delivered only to the components subscribed to their types,
+# rather than to every component in the window.  A component is unsubscribed
+# automatically when it's destroyed.
 
 import tkinter
 
 
 
+class _Subscriptions:
+    def __init__(self):
+        self._handlers_by_type = {}
+        self._resolved = {}
+
+
+    def subscribe(self, handler, event_types):
+        for event_type in event_types:
+            handlers = self._handlers_by_type.setdefault(event_type, [])
+
+            if handler not in handlers:
+                handlers.append(handler)
+
+        self._resolved.clear()
+
+
+    def unsubscribe(self, handler):
+        for handlers in self._handlers_by_type.values():
+            if handler in handlers:
+                handlers.remove(handler)
+
+        self._resolved.clear()
+
+
+    def handlers_for(self, event_type):
+        handlers = self._resolved.get(event_type)
+
+        if handlers is None:
+            handlers = []
+
+            for base_type in event_type.__mro__:
+                for handler in self._handlers_by_type.get(base_type, []):
+                    if handler not in handlers:
+                        handlers.append(handler)
+
+            # Outer components see an event before the components inside them, and
+            # see it again (in on_event_post) after the components inside them.
+            handlers.sort(key = _depth)
+            self._resolved[event_type] = handlers
+
+        return handlers
+
+
+
+def _depth(widget):
+    depth = 0
+
+    while widget.master is not None:
+        widget = widget.master
+        depth += 1
+
+    return depth
+
+
+def _root(widget):
+    while widget.master is not None:
+        widget = widget.master
+
+    return widget
+
+
+def _subscriptions(widget):
+    root = _root(widget)
+    subscriptions = root.__dict__.get('_event_subscriptions')
+
+    if subscriptions is None:
+        subscriptions = root.__dict__['_event_subscriptions'] = _Subscriptions()
+
+    return subscriptions
+
+
+
 class EventHandler:
     def initiate_event(self, event):
         widget = self
@@ -27,18 +102,26 @@ class EventHandler:
             widget.initiate_event(event)
 
 
-    def handle_event(self, event):
-        self.on_event(event)
+    def subscribe(self, *event_types):
+        _subscriptions(self).subscribe(self, event_types)
+        self.bind('<Destroy>', self._unsubscribe_on_destroy, add = '+')
 
-        if isinstance(self, tkinter.Tk) or isinstance(self, tkinter.Widget):
-            for child in self.winfo_children():
-                if not child.winfo_exists():
-                    continue
 
-                if isinstance(child, EventHandler):
-                    child.handle_event(event)
+    def _unsubscribe_on_destroy(self, event):
+        if str(event.widget) == str(self):
+            _subscriptions(self).unsubscribe(self)
+
+
+    def handle_event(self, event):
+        handlers = list(_subscriptions(self).handlers_for(type(event)))
+
+        for handler in handlers:
+            if handler.winfo_exists():
+                handler.on_event(event)
 
-        self.on_event_post(event)
+        for handler in reversed(handlers):
+            if handler.winfo_exists():
+                handler.on_event_post(event)
 
 
     def on_event(self, event):
@@ -7,8 +7,6 @@
 # When the user interface sends these events, they are propagated to other
 # components within the user interface, but aren't sent to the engine to
 # be processed by it.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 
 
@@ -122,3 +120,20 @@ class EnableDebugModeEvent(_InternalEvent):
 class DisableDebugModeEvent(_InternalEvent):
     def __init__(self):
         super().__init__()
+
+
+
+class StartRecordingEventsEvent(_InternalEvent):
+    def __init__(self, path):
+        super().__init__()
+        self._path = path
+
+
+    def path(self):
+        return self._path
+
+
+
+class StopRecordingEventsEvent(_InternalEvent):
+    def __init__(self):
+        super().__init__()
@@ -4,12 +4,11 @@
 # Project 2: Learning to Fly
 #
 # The outermost shell of the user interface.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 import tkinter
 import tkinter.messagebox
 from p2app.events import *
+from p2app.events.recorder import EventRecorder
 from .continents import ContinentsView
 from .countries import CountriesView
 from .empty import EmptyView
@@ -34,9 +33,21 @@ class MainView(tkinter.Tk, EventHandler):
         self.config(menu = MainMenu(self))
         self._event_bus = event_bus
         self._current_view = None
+        self._views = {}
+        self._recorder = None
+        self._database_path = None
         self.rowconfigure(0, weight = 1)
         self.columnconfigure(0, weight = 1)
 
+        self.subscribe(
+            ShowEditContinentsViewEvent, ShowEditCountriesViewEvent, ShowEditRegionsViewEvent,
+            DatabaseOpenedEvent, DatabaseClosedEvent, DatabaseOpenFailedEvent,
+            EnableDebugModeEvent, DisableDebugModeEvent,
+            StartRecordingEventsEvent, StopRecordingEventsEvent, EndApplicationEvent, ErrorEvent,
+            RequestTimedOutEvent, IntegrityCheckedEvent,
+            DatabaseMigrationNeededEvent, DatabaseMigratedEvent,
+            BackupProgressEvent, DatabaseBackedUpEvent, DatabaseRestoredEvent)
+
 
     def initiate_event(self, event):
         if is_internal_event(event):
@@ -46,49 +57,167 @@ class MainView(tkinter.Tk, EventHandler):
 
 
     def run(self):
-        self._switch_view(EmptyView(self))
+        self._event_bus.enable_queued_mode(scheduler = self.after_idle, canceller = self.after_cancel)
+        self._show_view(EmptyView)
         self._update_database_path(None)
         self.mainloop()
 
 
+    def destroy(self):
+        # Events still queued would be reported to views that no longer exist, and a
+        # drain still scheduled would run after the window it was scheduled on is gone,
+        # so both are discarded first.
+        self._event_bus.disable_queued_mode(discard = True)
+        super().destroy()
+
+
     def on_event(self, event):
         if isinstance(event, ShowEditContinentsViewEvent):
-            self._switch_view(ContinentsView(self))
+            self._show_view(ContinentsView)
         elif isinstance(event, ShowEditCountriesViewEvent):
-            self._switch_view(CountriesView(self))
+            self._show_view(CountriesView)
         elif isinstance(event, ShowEditRegionsViewEvent):
-            self._switch_view(RegionsView(self))
+            self._show_view(RegionsView)
         elif isinstance(event, DatabaseOpenedEvent):
             self._update_database_path(event.path())
         elif isinstance(event, DatabaseClosedEvent):
             self._update_database_path(None)
-            self._switch_view(EmptyView(self))
+            self._discard_views()
+            self._show_view(EmptyView)
         elif isinstance(event, DatabaseOpenFailedEvent):
             self._update_database_path(None)
-            self._switch_view(EmptyView(self))
+            self._discard_views()
+            self._show_view(EmptyView)
             tkinter.messagebox.showerror('Could Not Open Database', event.reason())
         elif isinstance(event, EnableDebugModeEvent):
             self._event_bus.enable_debug_mode()
         elif isinstance(event, DisableDebugModeEvent):
             self._event_bus.disable_debug_mode()
+        elif isinstance(event, StartRecordingEventsEvent):
+            self._stop_recording()
+            self._recorder = EventRecorder(event.path())
+            self._event_bus.register_recorder(self._recorder)
+        elif isinstance(event, StopRecordingEventsEvent):
+            self._stop_recording()
+        elif isinstance(event, BackupProgressEvent):
+            self._show_copy_progress(event.remaining_pages(), event.total_pages())
+        elif isinstance(event, DatabaseRestoredEvent):
+            self._update_database_path(self._database_path)
+            self._discard_views()
+            self._show_view(EmptyView)
 
 
     def on_event_post(self, event):
         if isinstance(event, EndApplicationEvent):
+            self._stop_recording()
             self.destroy()
         elif isinstance(event, ErrorEvent):
+            self._update_database_path(self._database_path)
             tkinter.messagebox.showerror('Error', event.message())
+        elif isinstance(event, RequestTimedOutEvent):
+            tkinter.messagebox.showwarning(
+                'Request Timed Out',
+                f'The request took longer than {event.budget():g} seconds and was stopped. '
+                'Try narrowing it down.')
+        elif isinstance(event, IntegrityCheckedEvent):
+            self._show_integrity_report(event.report())
+        elif isinstance(event, DatabaseMigrationNeededEvent):
+            self._ask_to_migrate(event.descriptions())
+        elif isinstance(event, DatabaseMigratedEvent):
+            tkinter.messagebox.showinfo('Database Migrated', 'The database was brought up to date.')
+        elif isinstance(event, DatabaseBackedUpEvent):
+            self._update_database_path(self._database_path)
+            self._show_backup_integrity(event.path(), event.integrity())
+        elif isinstance(event, DatabaseRestoredEvent):
+            tkinter.messagebox.showinfo(
+                'Database Restored', f'The database was restored from {event.path().name}.')
+
+
+    def _show_view(self, view_type):
+        # Views are kept once they've been created, hidden rather than destroyed when
+        # another is shown, so that switching back to one is cheap and finds it as
+        # it was left.
+        view = self._views.get(view_type)
+
+        if view is None:
+            view = view_type(self)
+            self._views[view_type] = view
+
+        self._switch_view(view)
 
 
     def _switch_view(self, view):
+        if view is self._current_view:
+            return
+
         if self._current_view:
-            self._current_view.destroy()
+            self._current_view.grid_remove()
 
         self._current_view = view
         self._current_view.grid(row = 0, column = 0, sticky = tkinter.NSEW, padx = 5, pady = 5)
 
 
+    def _discard_views(self):
+        # Once the database is closed, what the views show no longer applies.
+        for view in self._views.values():
+            view.destroy()
+
+        self._views = {}
+        self._current_view = None
+
+
+    def _ask_to_migrate(self, descriptions):
+        changes = '\n'.join(f'- {description}' for description in descriptions)
+
+        if tkinter.messagebox.askyesno(
+                'Migrate Database',
+                f'This database uses an older layout.  Bring it up to date now?\n\n{changes}'):
+            self.initiate_event(MigrateDatabaseEvent())
+
+
+    def _show_integrity_report(self, report):
+        if report['ok']:
+            tkinter.messagebox.showinfo('Integrity Check', 'No problems were found.')
+        else:
+            problems = '\n'.join(
+                f'{check["name"]}: {check["violations"]}'
+                for check in report['checks'] if check['violations'] > 0)
+
+            tkinter.messagebox.showwarning(
+                'Integrity Check',
+                f'{report["violation_count"]} problems were found:\n\n{problems}')
+
+
+    def _show_copy_progress(self, remaining_pages, total_pages):
+        copied = 100 * (total_pages - remaining_pages) // max(total_pages, 1)
+        self.title(f'{_PROJECT_NAME} - copying database ({copied}%)')
+
+        # The copy continues as soon as this returns, so the title is redrawn now.
+        self.update_idletasks()
+
+
+    def _show_backup_integrity(self, path, integrity):
+        if integrity == ['ok']:
+            tkinter.messagebox.showinfo(
+                'Database Backed Up', f'The database was backed up to {path.name}.')
+        else:
+            problems = '\n'.join(integrity)
+
+            tkinter.messagebox.showwarning(
+                'Database Backed Up',
+                f'The database was backed up to {path.name}, but the backup has problems:\n\n{problems}')
+
+
+    def _stop_recording(self):
+        if self._recorder:
+            self._event_bus.unregister_recorder()
+            self._recorder.close()
+            self._recorder = None
+
+
     def _update_database_path(self, path):
+        self._database_path = path
+
         if path:
             visible_name = path.name
         else:
@@ -4,18 +4,22 @@
 # Project 2: Learning to Fly
 #
 # An implementation of the application's menus.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 import tkinter
 import tkinter.filedialog
+from pathlib import Path
 from p2app.events import *
 from .events import *
 from .event_handling import EventHandler
+from .stats import EventStatsWindow
 
 
 
 _OPEN_DATABASE_DIALOG_TITLE = 'Open Database'
+_RECORD_EVENTS_DIALOG_TITLE = 'Record Events To'
+_INTEGRITY_REPORT_DIALOG_TITLE = 'Write Integrity Report To'
+_BACKUP_DATABASE_DIALOG_TITLE = 'Back Up Database To'
+_RESTORE_DATABASE_DIALOG_TITLE = 'Restore Database From'
 
 
 
@@ -30,6 +34,7 @@ class MainMenu(BaseMenu):
         super().__init__(parent)
         self.add_cascade(label = 'File', menu = FileMenu(self))
         self.add_cascade(label = 'Debug', menu = DebugMenu(self))
+        self.subscribe(DatabaseOpenedEvent, DatabaseClosedEvent)
 
 
     def on_event(self, event):
@@ -45,7 +50,16 @@ class FileMenu(BaseMenu):
         super().__init__(parent)
         self.add_command(label = 'Open', state = tkinter.NORMAL, command = self._on_open)
         self.add_command(label = 'Close', state = tkinter.DISABLED, command = self._on_close)
+
+        self.add_command(
+            label = 'Check Integrity...', state = tkinter.DISABLED,
+            command = self._on_check_integrity)
+
+        self.add_command(label = 'Back Up...', state = tkinter.DISABLED, command = self._on_back_up)
+        self.add_command(label = 'Restore...', state = tkinter.DISABLED, command = self._on_restore)
+
         self.add_command(label = 'Exit', command = self._on_exit)
+        self.subscribe(DatabaseOpenedEvent, DatabaseClosedEvent)
 
 
     def _on_open(self):
@@ -61,6 +75,35 @@ class FileMenu(BaseMenu):
         self.initiate_event(CloseDatabaseEvent())
 
 
+    def _on_check_integrity(self):
+        report_path = tkinter.filedialog.asksaveasfilename(
+            title = _INTEGRITY_REPORT_DIALOG_TITLE,
+            initialdir = Path.cwd(),
+            defaultextension = '.json')
+
+        if report_path:
+            self.initiate_event(CheckIntegrityEvent(Path(report_path)))
+
+
+    def _on_back_up(self):
+        backup_path = tkinter.filedialog.asksaveasfilename(
+            title = _BACKUP_DATABASE_DIALOG_TITLE,
+            initialdir = Path.cwd(),
+            defaultextension = '.db')
+
+        if backup_path:
+            self.initiate_event(BackupDatabaseEvent(Path(backup_path)))
+
+
+    def _on_restore(self):
+        backup_path = tkinter.filedialog.askopenfilename(
+            title = _RESTORE_DATABASE_DIALOG_TITLE,
+            initialdir = Path.cwd())
+
+        if backup_path:
+            self.initiate_event(RestoreDatabaseEvent(Path(backup_path)))
+
+
     def _on_exit(self):
         self.initiate_event(QuitInitiatedEvent())
 
@@ -69,9 +112,15 @@ class FileMenu(BaseMenu):
         if isinstance(event, DatabaseOpenedEvent):
             self.entryconfig('Open', state = tkinter.DISABLED)
             self.entryconfig('Close', state = tkinter.NORMAL)
+            self.entryconfig('Check Integrity...', state = tkinter.NORMAL)
+            self.entryconfig('Back Up...', state = tkinter.NORMAL)
+            self.entryconfig('Restore...', state = tkinter.NORMAL)
         elif isinstance(event, DatabaseClosedEvent):
             self.entryconfig('Open', state = tkinter.NORMAL)
             self.entryconfig('Close', state = tkinter.DISABLED)
+            self.entryconfig('Check Integrity...', state = tkinter.DISABLED)
+            self.entryconfig('Back Up...', state = tkinter.DISABLED)
+            self.entryconfig('Restore...', state = tkinter.DISABLED)
 
 
 
@@ -106,9 +155,47 @@ class DebugMenu(BaseMenu):
             label = 'Show Events', variable = self._is_debug_mode,
             command = self._on_change_show_events)
 
+        self._is_recording = tkinter.IntVar(self, 0)
+
+        self.add_checkbutton(
+            label = 'Record Events...', variable = self._is_recording,
+            command = self._on_change_record_events)
+
+        self.add_command(label = 'Event Statistics...', command = self._on_show_event_stats)
+
+        self._stats_window = None
+
+        self.subscribe(EventStatsEvent)
+
 
     def _on_change_show_events(self):
         if self._is_debug_mode.get():
             self.initiate_event(EnableDebugModeEvent())
         else:
             self.initiate_event(DisableDebugModeEvent())
+
+
+    def _on_change_record_events(self):
+        if self._is_recording.get():
+            record_path = tkinter.filedialog.asksaveasfilename(
+                title = _RECORD_EVENTS_DIALOG_TITLE,
+                initialdir = Path.cwd(),
+                defaultextension = '.jsonl')
+
+            if record_path:
+                self.initiate_event(StartRecordingEventsEvent(Path(record_path)))
+            else:
+                self._is_recording.set(0)
+        else:
+            self.initiate_event(StopRecordingEventsEvent())
+
+
+    def _on_show_event_stats(self):
+        self.initiate_event(RequestEventStatsEvent())
+
+
+    def on_event(self, event):
+        if isinstance(event, EventStatsEvent):
+            if self._stats_window is None or not self._stats_window.winfo_exists():
+                self._stats_window = EventStatsWindow(
+                    self._root(), event.stats(), event.queue_metrics())
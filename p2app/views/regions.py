@@ -5,14 +5,13 @@
 #
 # This is the portion of the user interface that is displayed when the
 # Edit / Regions menu item is selected.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 import tkinter
 import tkinter.messagebox
 from p2app.events import *
 from .event_handling import EventHandler
 from .events import *
+from .virtual_list import VirtualList
 
 
 
@@ -24,11 +23,17 @@ class RegionsView(tkinter.Frame, EventHandler):
         search_view.grid(row = 0, column = 0, sticky = tkinter.NSEW)
 
         self._edit_view = None
+        self._loading_view = None
+        self._editor_view = None
 
         self.rowconfigure(0, weight = 0)
         self.rowconfigure(1, weight = 1)
         self.columnconfigure(0, weight = 1)
 
+        self.subscribe(
+            SaveRegionFailedEvent, DiscardRegionEvent, NewRegionEvent,
+            StartEditingRegionEvent, RegionLoadedEvent, RegionSavedEvent)
+
 
     def on_event(self, event):
         if isinstance(event, SaveRegionFailedEvent):
@@ -39,18 +44,36 @@ class RegionsView(tkinter.Frame, EventHandler):
         if isinstance(event, DiscardRegionEvent):
             self._switch_edit_view(None)
         elif isinstance(event, NewRegionEvent):
-            self._switch_edit_view(_RegionEditorView(self, True, True, None))
+            self._show_editor_view(True, True, None)
         elif isinstance(event, StartEditingRegionEvent):
-            self._switch_edit_view(_RegionEditorLoadingView(self))
+            self._switch_edit_view(self._get_loading_view())
         elif isinstance(event, RegionLoadedEvent):
-            self._switch_edit_view(_RegionEditorView(self, False, True, event.region()))
+            self._show_editor_view(False, True, event.region())
         elif isinstance(event, RegionSavedEvent):
-            self._switch_edit_view(_RegionEditorView(self, False, False, event.region()))
+            self._show_editor_view(False, False, event.region())
+
+
+    def _get_loading_view(self):
+        if self._loading_view is None:
+            self._loading_view = _RegionEditorLoadingView(self)
+
+        return self._loading_view
+
+
+    def _show_editor_view(self, is_new, is_editable, region):
+        if self._editor_view is None:
+            self._editor_view = _RegionEditorView(self)
+
+        self._editor_view.show(is_new, is_editable, region)
+        self._switch_edit_view(self._editor_view)
 
 
     def _switch_edit_view(self, edit_view):
+        if edit_view is self._edit_view:
+            return
+
         if self._edit_view:
-            self._edit_view.destroy()
+            self._edit_view.grid_remove()
             self._edit_view = None
 
         if edit_view:
@@ -99,16 +122,15 @@ class _RegionsSearchView(tkinter.LabelFrame, EventHandler):
         empty_area = tkinter.Label(self, text = '')
         empty_area.grid(row = 4, column = 1, sticky = tkinter.NSEW, padx = 5, pady = 5)
 
-        self._search_list = tkinter.Listbox(
-            self, height = 4,
-            activestyle = tkinter.NONE, selectmode = tkinter.SINGLE)
+        self._search_list = VirtualList(
+            self, self._request_search_labels, self._on_search_selection_changed, height = 4)
 
-        self._search_list.bind('<<ListboxSelect>>', self._on_search_selection_changed)
         self._search_list.grid(
             row = 0, column = 2, rowspan = 4, columnspan = 1, sticky = tkinter.NSEW,
             padx = 5, pady = 5)
 
-        self._search_region_ids = []
+        self._search_query = None
+        self._refined_ids = None
 
         button_frame = tkinter.Frame(self)
         button_frame.grid(row = 5, column = 2, sticky = tkinter.E, padx = 5, pady = 5)
@@ -135,12 +157,34 @@ class _RegionsSearchView(tkinter.LabelFrame, EventHandler):
         self.columnconfigure(1, weight = 1)
         self.columnconfigure(2, weight = 2)
 
+        self.subscribe(
+            ClearRegionsSearchListEvent, RegionSummarySearchResultEvent,
+            RegionSummarySearchCompletedEvent, RegionSummariesLoadedEvent,
+            RegionSavedEvent)
+
 
     def _on_search_button_clicked(self):
-        self.initiate_event(ClearRegionsSearchListEvent())
-        self.initiate_event(StartRegionSearchEvent(
+        query = (
             self._get_search_region_code(), self._get_search_local_code(),
-            self._get_search_name()))
+            self._get_search_name())
+
+        # A search that refines the one whose results are listed can only narrow them,
+        # so rather than clearing the list, its results are collected and the list is
+        # brought up to date with them once the search completes.
+        if self._is_refinement(query):
+            self._refined_ids = []
+        else:
+            self._refined_ids = None
+            self.initiate_event(ClearRegionsSearchListEvent())
+
+        self._search_query = query
+        self.initiate_event(StartRegionSummarySearchEvent(*query))
+
+
+    def _is_refinement(self, query):
+        return self._search_query is not None and all(
+            previous is None or previous == value
+            for previous, value in zip(self._search_query, query))
 
 
     def _get_search_region_code(self):
@@ -159,8 +203,13 @@ class _RegionsSearchView(tkinter.LabelFrame, EventHandler):
 
 
     def _get_selected_search_region_id(self):
-        selection, *_ = self._search_list.curselection()
-        return self._search_region_ids[selection]
+        return self._search_list.selected_id()
+
+
+    def _request_search_labels(self, item_ids):
+        # Only the listed IDs are kept, so the labels of the ones scrolled into view
+        # are loaded as they're needed.
+        self.initiate_event(LoadRegionSummariesEvent(item_ids))
 
 
     def _on_search_changed(self, *args):
@@ -175,8 +224,8 @@ class _RegionsSearchView(tkinter.LabelFrame, EventHandler):
         return True
 
 
-    def _on_search_selection_changed(self, event):
-        if event.widget.curselection():
+    def _on_search_selection_changed(self):
+        if self._search_list.selected_id() is not None:
             new_state = tkinter.NORMAL
         else:
             new_state = tkinter.DISABLED
@@ -197,13 +246,30 @@ class _RegionsSearchView(tkinter.LabelFrame, EventHandler):
 
     def on_event(self, event):
         if isinstance(event, ClearRegionsSearchListEvent):
-            self._search_list.delete(0, tkinter.END)
-            self._search_region_ids = []
+            self._search_list.clear()
             self._edit_button['state'] = tkinter.DISABLED
-        elif isinstance(event, RegionSearchResultEvent):
-            display_name = f'{event.region().region_code} - {event.region().name}'
-            self._search_list.insert(tkinter.END, display_name)
-            self._search_region_ids.append(event.region().region_id)
+        elif isinstance(event, RegionSummarySearchResultEvent):
+            if self._refined_ids is not None:
+                self._refined_ids.append(event.summary().region_id)
+            else:
+                self._search_list.append(event.summary().region_id, _search_label(event.summary()))
+        elif isinstance(event, RegionSummarySearchCompletedEvent):
+            if self._refined_ids is not None:
+                self._search_list.set_item_ids(self._refined_ids)
+                self._refined_ids = None
+                self._on_search_selection_changed()
+        elif isinstance(event, RegionSummariesLoadedEvent):
+            self._search_list.set_labels(
+                {summary.region_id: _search_label(summary) for summary in event.summaries()})
+        elif isinstance(event, RegionSavedEvent):
+            # A saved region may already be listed under its old code or name.
+            saved = event.region()
+            self._search_list.refresh_label(saved.region_id, _search_label(saved))
+
+
+
+def _search_label(summary):
+    return f'{summary.region_code} - {summary.name}'
 
 
 
@@ -217,130 +283,77 @@ class _RegionEditorLoadingView(tkinter.LabelFrame, EventHandler):
 
 
 class _RegionEditorView(tkinter.LabelFrame, EventHandler):
-    def __init__(self, parent, is_new, is_editable, region):
-        if is_new:
-            frame_text = 'New Region'
-        elif is_editable:
-            frame_text = 'Edit Region'
-        else:
-            frame_text = 'Region Saved'
-
-        super().__init__(parent, text = frame_text)
+    def __init__(self, parent):
+        super().__init__(parent)
 
-        self._is_new = is_new
-        self._region_id = region.region_id if region else None
-        region_code = region.region_code if region and region.region_code else ''
-        local_code = region.local_code if region and region.local_code else ''
-        name = region.name if region and region.name else ''
-        continent_id = region.continent_id if region and region.continent_id else 0
-        country_id = region.country_id if region and region.country_id else 0
-        wikipedia_link = region.wikipedia_link if region and region.wikipedia_link else ''
-        keywords = region.keywords if region and region.keywords else ''
+        self._is_new = False
+        self._region_id = None
 
         self._region_code = tkinter.StringVar()
-        self._region_code.set(region_code)
-
         self._local_code = tkinter.StringVar()
-        self._local_code.set(local_code)
-
         self._region_name = tkinter.StringVar()
-        self._region_name.set(name)
-
         self._continent_id = tkinter.StringVar()
-        self._continent_id.set(str(continent_id))
-
         self._country_id = tkinter.StringVar()
-        self._country_id.set(str(country_id))
-
         self._wikipedia_link = tkinter.StringVar()
-        self._wikipedia_link.set(wikipedia_link)
-
         self._keywords = tkinter.StringVar()
-        self._keywords.set(keywords)
 
         region_id_label = tkinter.Label(self, text = 'Region ID: ')
         region_id_label.grid(row = 0, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        region_id_value_label_text = f'{self._region_id if self._region_id else "(New)"}'
-        region_id_value_label = tkinter.Label(self, text = region_id_value_label_text)
-        region_id_value_label.grid(row = 0, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
+        self._region_id_value_label = tkinter.Label(self)
+        self._region_id_value_label.grid(row = 0, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
         region_code_label = tkinter.Label(self, text = 'Region Code: ')
         region_code_label.grid(row = 1, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        if is_editable:
-            region_code_entry = tkinter.Entry(self, textvariable = self._region_code, width = 10)
-        else:
-            region_code_entry = tkinter.Label(self, textvariable = self._region_code)
-
+        region_code_entry = tkinter.Entry(self, textvariable = self._region_code, width = 10)
         region_code_entry.grid(row = 1, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
         local_code_label = tkinter.Label(self, text = 'Local Code: ')
         local_code_label.grid(row = 2, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        if is_editable:
-            local_code_entry = tkinter.Entry(self, textvariable = self._local_code, width = 10)
-        else:
-            local_code_entry = tkinter.Label(self, textvariable = self._local_code)
-
+        local_code_entry = tkinter.Entry(self, textvariable = self._local_code, width = 10)
         local_code_entry.grid(row = 2, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
         name_label = tkinter.Label(self, text = 'Name: ')
         name_label.grid(row = 3, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        if is_editable:
-            name_entry = tkinter.Entry(self, textvariable = self._region_name, width = 30)
-        else:
-            name_entry = tkinter.Label(self, textvariable = self._region_name)
-
+        name_entry = tkinter.Entry(self, textvariable = self._region_name, width = 30)
         name_entry.grid(row = 3, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
         continent_id_label = tkinter.Label(self, text = 'Continent ID: ')
         continent_id_label.grid(row = 4, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        if is_editable:
-            continent_id_entry = tkinter.Entry(self, textvariable = self._continent_id, width = 10)
-        else:
-            continent_id_entry = tkinter.Label(self, textvariable = self._continent_id)
-
+        continent_id_entry = tkinter.Entry(self, textvariable = self._continent_id, width = 10)
         continent_id_entry.grid(row = 4, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
         country_id_label = tkinter.Label(self, text = 'Country ID: ')
         country_id_label.grid(row = 5, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        if is_editable:
-            country_id_entry = tkinter.Entry(self, textvariable = self._country_id, width = 10)
-        else:
-            country_id_entry = tkinter.Label(self, textvariable = self._country_id)
-
+        country_id_entry = tkinter.Entry(self, textvariable = self._country_id, width = 10)
         country_id_entry.grid(row = 5, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
         wikipedia_link_label = tkinter.Label(self, text = 'Wikipedia Link: ')
         wikipedia_link_label.grid(row = 6, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        if is_editable:
-            wikipedia_link_entry = tkinter.Entry(self, textvariable = self._wikipedia_link, width = 50)
-        else:
-            wikipedia_link_entry = tkinter.Label(self, textvariable = self._wikipedia_link)
-
+        wikipedia_link_entry = tkinter.Entry(self, textvariable = self._wikipedia_link, width = 50)
         wikipedia_link_entry.grid(row = 6, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
         keywords_label = tkinter.Label(self, text = 'Keywords: ')
         keywords_label.grid(row = 7, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
 
-        if is_editable:
-            keywords_entry = tkinter.Entry(self, textvariable = self._keywords, width = 50)
-        else:
-            keywords_entry = tkinter.Label(self, textvariable = self._keywords)
-
+        keywords_entry = tkinter.Entry(self, textvariable = self._keywords, width = 50)
         keywords_entry.grid(row = 7, column = 1, padx = 5, pady = 5, sticky = tkinter.W)
 
+        self._entries = [
+            region_code_entry, local_code_entry, name_entry, continent_id_entry,
+            country_id_entry, wikipedia_link_entry, keywords_entry]
+
         button_frame = tkinter.Frame(self)
         button_frame.grid(row = 9, column = 1, padx = 5, pady = 5, sticky = tkinter.SE)
 
-        if is_editable:
-            save_button = tkinter.Button(button_frame, text = 'Save', command = self._on_save)
-            save_button.grid(row = 0, column = 0, padx = 5, pady = 5)
+        self._save_button = tkinter.Button(button_frame, text = 'Save', command = self._on_save)
+        self._save_button.grid(row = 0, column = 0, padx = 5, pady = 5)
 
         discard_button = tkinter.Button(button_frame, text = 'Discard', command = self._on_discard)
         discard_button.grid(row = 0, column = 1, padx = 5, pady = 5)
@@ -359,6 +372,36 @@ class _RegionEditorView(tkinter.LabelFrame, EventHandler):
         self.columnconfigure(1, weight = 1)
 
 
+    def show(self, is_new, is_editable, region):
+        if is_new:
+            frame_text = 'New Region'
+        elif is_editable:
+            frame_text = 'Edit Region'
+        else:
+            frame_text = 'Region Saved'
+
+        self['text'] = frame_text
+        self._is_new = is_new
+        self._region_id = region.region_id if region else None
+        self._region_id_value_label['text'] = f'{self._region_id if self._region_id else "(New)"}'
+
+        self._region_code.set(region.region_code if region and region.region_code else '')
+        self._local_code.set(region.local_code if region and region.local_code else '')
+        self._region_name.set(region.name if region and region.name else '')
+        self._continent_id.set(str(region.continent_id if region and region.continent_id else 0))
+        self._country_id.set(str(region.country_id if region and region.country_id else 0))
+        self._wikipedia_link.set(region.wikipedia_link if region and region.wikipedia_link else '')
+        self._keywords.set(region.keywords if region and region.keywords else '')
+
+        for entry in self._entries:
+            entry['state'] = tkinter.NORMAL if is_editable else 'readonly'
+
+        if is_editable:
+            self._save_button.grid()
+        else:
+            self._save_button.grid_remove()
+
+
     def _on_save(self):
         region = self._make_region()
 
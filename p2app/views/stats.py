@@ -0,0 +1,95 @@
+# p2app/views/stats.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# A window, opened from the Debug menu, that shows how many of each type of event
+# have been sent to the engine, how many results they produced, and how long the
+# engine took to produce them.
+
+import tkinter
+import tkinter.ttk
+from p2app.events import *
+from .event_handling import EventHandler
+
+
+
+_COLUMNS = [
+    ('event', 'Event', 220),
+    ('count', 'Count', 60),
+    ('results', 'Results', 60),
+    ('first_p50', 'First p50', 80),
+    ('first_p99', 'First p99', 80),
+    ('total_p50', 'Total p50', 80),
+    ('total_p99', 'Total p99', 80),
+    ('total_max', 'Total max', 80)
+]
+
+
+
+def _format_seconds(seconds):
+    if seconds >= 1:
+        return f'{seconds:.2f} s'
+    elif seconds >= 0.001:
+        return f'{seconds * 1000:.1f} ms'
+    else:
+        return f'{seconds * 1_000_000:.0f} µs'
+
+
+
+class EventStatsWindow(tkinter.Toplevel, EventHandler):
+    def __init__(self, parent, stats, queue_metrics):
+        super().__init__(parent)
+        self.title('Event Statistics')
+
+        self._table = tkinter.ttk.Treeview(
+            self, columns = [name for name, _, _ in _COLUMNS], show = 'headings')
+
+        for name, heading, width in _COLUMNS:
+            self._table.heading(name, text = heading)
+            self._table.column(name, width = width, anchor = tkinter.W if name == 'event' else tkinter.E)
+
+        self._table.grid(row = 0, column = 0, columnspan = 2, sticky = tkinter.NSEW, padx = 5, pady = 5)
+
+        self._queue_label = tkinter.Label(self, text = '', anchor = tkinter.W)
+        self._queue_label.grid(row = 1, column = 0, sticky = tkinter.EW, padx = 5, pady = 5)
+
+        refresh_button = tkinter.Button(self, text = 'Refresh', command = self._on_refresh)
+        refresh_button.grid(row = 1, column = 1, sticky = tkinter.E, padx = 5, pady = 5)
+
+        self.rowconfigure(0, weight = 1)
+        self.rowconfigure(1, weight = 0)
+        self.columnconfigure(0, weight = 1)
+        self.columnconfigure(1, weight = 0)
+
+        self._show(stats, queue_metrics)
+
+        self.subscribe(EventStatsEvent)
+
+
+    def _on_refresh(self):
+        self.initiate_event(RequestEventStatsEvent())
+
+
+    def on_event(self, event):
+        if isinstance(event, EventStatsEvent):
+            self._show(event.stats(), event.queue_metrics())
+
+
+    def _show(self, stats, queue_metrics):
+        self._table.delete(*self._table.get_children())
+
+        for event_type_name, metrics in stats.items():
+            first = metrics['time_to_first_result']
+            total = metrics['total_time']
+
+            self._table.insert('', tkinter.END, values = [
+                event_type_name, metrics['count'], metrics['result_events'],
+                _format_seconds(first['p50']), _format_seconds(first['p99']),
+                _format_seconds(total['p50']), _format_seconds(total['p99']),
+                _format_seconds(total['max'])])
+
+        self._queue_label['text'] = \
+            f'Queue depth: {queue_metrics["depth"]} / {queue_metrics["max_depth"]}, ' + \
+            f'high water mark: {queue_metrics["high_water_mark"]}, ' + \
+            f'coalesced: {queue_metrics["coalesced"]}, dropped: {queue_metrics["dropped"]}'
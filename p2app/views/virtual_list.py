@@ -0,0 +1,364 @@
+# p2app/views/virtual_list.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# A scrollable list that can hold tens of thousands of items cheaply.  Only the
+# IDs of the items are stored, in a compact array; the underlying listbox only
+# ever contains the rows that are currently visible.  Their labels are kept in a
+# cache bounded by a small multiple of the number of visible rows, and the ones
+# that aren't cached are asked for (via a callback) as they scroll into view, then
+# handed back with set_labels, which may happen right away or once the engine has
+# answered.  Until then, a placeholder is shown in their place.
+#
+# What's listed, scrolled into view and selected is kept by a ListWindow, which
+# has no widgets of its own, so that it can be used (and tested) without a display;
+# VirtualList draws it.
+#
+# It's a tkinter widget, so its own methods are named so as not to override any
+# of the ones every widget inherits (update, for one), which tkinter and other
+# code call expecting them to behave as they always do.
+
+import tkinter
+import tkinter.font
+from array import array
+from collections import OrderedDict
+
+
+
+# What's shown in place of a label that has been asked for, but not handed back yet.
+PLACEHOLDER_LABEL = '...'
+
+# How many labels are cached, at least, however few rows are visible; the cache
+# holds a few windows' worth, so that scrolling back and forth needn't ask for the
+# same labels again.
+_MIN_CACHED_LABELS = 256
+_CACHED_WINDOWS = 4
+
+
+
+class ListWindow:
+    def __init__(self, request_labels, visible_rows = 4):
+        self._request_labels = request_labels
+        self._ids = array('q')
+        self._top = 0
+        self._visible_rows = visible_rows
+        self._selected = None
+        self._labels = OrderedDict()
+        self._requested = set()
+
+
+    def __len__(self):
+        return len(self._ids)
+
+
+    def top(self) -> int:
+        return self._top
+
+
+    def visible_rows(self) -> int:
+        return self._visible_rows
+
+
+    def selected_index(self):
+        return self._selected
+
+
+    def selected_id(self):
+        if self._selected is None:
+            return None
+        else:
+            return self._ids[self._selected]
+
+
+    def visible_ids(self):
+        return self._ids[self._top:self._top + self._visible_rows]
+
+
+    def append(self, item_id, label = None) -> bool:
+        """Appends an item, along with its label, if it's known.  The label is only
+        kept if the item is visible, since the labels of the others can be asked for
+        once they're scrolled into view.  Returns True if the item is visible."""
+        self._ids.append(item_id)
+        is_visible = len(self._ids) - self._top <= self._visible_rows
+
+        if is_visible and label is not None:
+            self._cache_label(item_id, label)
+
+        return is_visible
+
+
+    def set_item_ids(self, item_ids) -> bool:
+        """Removes the items not among item_ids and appends the ones not already in
+        the list, keeping the rest where they are (and selected, if one of them was).
+        Returns True if the list changed."""
+        kept = set(item_ids)
+        selected_id = self.selected_id()
+        remaining = array('q', (item_id for item_id in self._ids if item_id in kept))
+        present = set(remaining)
+        remaining.extend(item_id for item_id in item_ids if item_id not in present)
+
+        if remaining == self._ids:
+            return False
+
+        self._ids = remaining
+        self._top = max(0, min(self._top, len(self._ids) - self._visible_rows))
+        self._selected = self._ids.index(selected_id) if selected_id in kept else None
+        return True
+
+
+    def clear(self):
+        self._ids = array('q')
+        self._top = 0
+        self._selected = None
+        self._labels.clear()
+        self._requested.clear()
+
+
+    def scroll_to(self, top) -> bool:
+        """Scrolls so that the item at the given index is the first visible one, as
+        nearly as possible.  Returns True if the list scrolled."""
+        top = max(0, min(top, len(self._ids) - self._visible_rows))
+
+        if top == self._top:
+            return False
+
+        self._top = top
+        return True
+
+
+    def resize(self, visible_rows) -> bool:
+        """Changes how many rows are visible, returning True if that's a change."""
+        if visible_rows == self._visible_rows:
+            return False
+
+        self._visible_rows = visible_rows
+        return True
+
+
+    def select(self, index):
+        """Selects the item at the given index, or nothing if it's None, scrolling it
+        into view."""
+        self._selected = index
+
+        if index is not None:
+            if index < self._top:
+                self._top = index
+            elif index >= self._top + self._visible_rows:
+                self._top = index - self._visible_rows + 1
+
+
+    def visible_labels(self) -> list[str]:
+        """Returns the labels of the visible items.  Those that aren't cached are
+        asked for first, all at once, unless they all have been already, and any
+        still not handed back by then are returned as the placeholder."""
+        visible_ids = self.visible_ids()
+        missing = [item_id for item_id in visible_ids if item_id not in self._labels]
+
+        if missing and not self._requested.issuperset(missing):
+            # Only the latest request is remembered, so that labels asked for by one
+            # that was never answered are asked for again by the next.
+            self._requested = set(missing)
+            self._request_labels(missing)
+
+        labels = []
+
+        for item_id in visible_ids:
+            label = self._labels.get(item_id)
+
+            if label is None:
+                labels.append(PLACEHOLDER_LABEL)
+            else:
+                self._labels.move_to_end(item_id)
+                labels.append(label)
+
+        return labels
+
+
+    def set_labels(self, labels: dict) -> bool:
+        """Caches the labels of the given items, by ID, typically the ones asked for.
+        Returns True if any of them is visible."""
+        for item_id, label in labels.items():
+            self._requested.discard(item_id)
+            self._cache_label(item_id, label)
+
+        return any(item_id in labels for item_id in self.visible_ids())
+
+
+    def refresh_label(self, item_id, label) -> bool:
+        """Replaces the label of one item, such as one that's just been saved, leaving
+        the others alone.  It's only replaced if it's cached, since any other is asked
+        for once it's scrolled into view.  Returns True if the item is visible."""
+        if item_id not in self._labels:
+            return False
+
+        self._labels[item_id] = label
+        return item_id in self.visible_ids()
+
+
+    def _cache_label(self, item_id, label):
+        self._labels[item_id] = label
+        self._labels.move_to_end(item_id)
+
+        while len(self._labels) > max(_MIN_CACHED_LABELS, _CACHED_WINDOWS * self._visible_rows):
+            self._labels.popitem(last = False)
+
+
+
+class VirtualList(tkinter.Frame):
+    def __init__(self, parent, request_labels, on_select = None, height = 4):
+        super().__init__(parent)
+
+        self._window = ListWindow(request_labels, height)
+        self._on_select = on_select
+        self._redraw_pending = False
+
+        self._listbox = tkinter.Listbox(
+            self, height = height, exportselection = False,
+            activestyle = tkinter.NONE, selectmode = tkinter.SINGLE)
+
+        self._listbox.grid(row = 0, column = 0, sticky = tkinter.NSEW)
+
+        self._scrollbar = tkinter.Scrollbar(
+            self, orient = tkinter.VERTICAL, command = self._on_scroll)
+
+        self._scrollbar.grid(row = 0, column = 1, sticky = tkinter.NS)
+
+        self._line_height = tkinter.font.Font(font = self._listbox['font']).metrics('linespace') + 1
+
+        self._listbox.bind('<<ListboxSelect>>', self._on_listbox_select)
+        self._listbox.bind('<Configure>', self._on_configure)
+        self._listbox.bind('<MouseWheel>', self._on_mouse_wheel)
+        self._listbox.bind('<Button-4>', lambda event: self._scroll_to(self._window.top() - 1))
+        self._listbox.bind('<Button-5>', lambda event: self._scroll_to(self._window.top() + 1))
+        self._listbox.bind('<Up>', lambda event: self._move_selection(-1))
+        self._listbox.bind('<Down>', lambda event: self._move_selection(1))
+        self._listbox.bind('<Prior>', lambda event: self._move_selection(-self._window.visible_rows()))
+        self._listbox.bind('<Next>', lambda event: self._move_selection(self._window.visible_rows()))
+
+        self.rowconfigure(0, weight = 1)
+        self.columnconfigure(0, weight = 1)
+
+
+    def __len__(self):
+        return len(self._window)
+
+
+    def append(self, item_id, label = None):
+        if self._window.append(item_id, label):
+            self._schedule_redraw()
+        else:
+            self._update_scrollbar()
+
+
+    def set_item_ids(self, item_ids):
+        if self._window.set_item_ids(item_ids):
+            self._schedule_redraw()
+
+
+    def set_labels(self, labels):
+        if self._window.set_labels(labels):
+            self._schedule_redraw()
+
+
+    def refresh_label(self, item_id, label):
+        if self._window.refresh_label(item_id, label):
+            self._schedule_redraw()
+
+
+    def clear(self):
+        self._window.clear()
+        self._schedule_redraw()
+
+
+    def selected_id(self):
+        return self._window.selected_id()
+
+
+    def _schedule_redraw(self):
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self._redraw)
+
+
+    def _redraw(self):
+        self._redraw_pending = False
+
+        if not self.winfo_exists():
+            return
+
+        labels = self._window.visible_labels()
+        selected = self._window.selected_index()
+        top = self._window.top()
+
+        self._listbox.delete(0, tkinter.END)
+        self._listbox.insert(0, *labels)
+
+        if selected is not None and 0 <= selected - top < len(labels):
+            self._listbox.selection_set(selected - top)
+
+        self._update_scrollbar()
+
+
+    def _update_scrollbar(self):
+        count = len(self._window)
+
+        if count:
+            first = self._window.top() / count
+            last = min(1.0, (self._window.top() + self._window.visible_rows()) / count)
+            self._scrollbar.set(first, last)
+        else:
+            self._scrollbar.set(0.0, 1.0)
+
+
+    def _scroll_to(self, top):
+        if self._window.scroll_to(top):
+            self._redraw()
+
+
+    def _on_scroll(self, action, amount, unit = None):
+        if action == tkinter.MOVETO:
+            self._scroll_to(int(float(amount) * len(self._window)))
+        elif unit == tkinter.PAGES:
+            self._scroll_to(self._window.top() + int(amount) * self._window.visible_rows())
+        else:
+            self._scroll_to(self._window.top() + int(amount))
+
+
+    def _on_mouse_wheel(self, event):
+        self._scroll_to(self._window.top() - (event.delta // 120 if abs(event.delta) >= 120 else event.delta))
+        return 'break'
+
+
+    def _on_configure(self, event):
+        if self._window.resize(max(1, event.height // self._line_height)):
+            self._schedule_redraw()
+
+
+    def _on_listbox_select(self, event):
+        selection = self._listbox.curselection()
+        self._window.select(self._window.top() + selection[0] if selection else None)
+
+        if self._on_select:
+            self._on_select()
+
+
+    def _move_selection(self, offset):
+        count = len(self._window)
+
+        if not count:
+            return 'break'
+
+        selected = self._window.selected_index()
+
+        if selected is None:
+            self._window.select(self._window.top())
+        else:
+            self._window.select(max(0, min(selected + offset, count - 1)))
+
+        self._redraw()
+
+        if self._on_select:
+            self._on_select()
+
+        return 'break'
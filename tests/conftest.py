@@ -0,0 +1,77 @@
+# tests/conftest.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Fixtures shared by the tests: a small database laid out the way "airport.db" is
+# before the engine migrates it (see schema.sql), so that migrations and searches
+# can be tested without the full database.
+
+import pathlib
+import sqlite3
+
+import pytest
+
+
+_SCHEMA_PATH = pathlib.Path(__file__).parent.parent / 'schema.sql'
+
+
+_ROWS = '''
+INSERT INTO continent VALUES (1, 'EU', 'Europe'), (2, 'NA', 'North America');
+
+INSERT INTO country VALUES
+    (1, 'CH', 'Switzerland', 1, 'https://en.wikipedia.org/wiki/Switzerland', 'Schweiz, Suisse'),
+    (2, 'US', 'United States', 2, 'https://en.wikipedia.org/wiki/United_States', NULL);
+
+INSERT INTO region VALUES
+    (1, 'CH-ZH', 'ZH', 'Zürich', 1, 1, NULL, 'Zuerich'),
+    (2, 'US-CA', 'CA', 'California', 2, 2, NULL, NULL);
+
+INSERT INTO airport VALUES
+    (1, 'LSZH', 'large_airport', 'Zürich Airport', 47.46, 8.55, 1416, '1', 1, 1,
+        'Zürich', 1, 'LSZH', 'ZRH', NULL, NULL, NULL, 'Kloten'),
+    (2, 'LSZR', 'medium_airport', 'St. Gallen–Altenrhein Airport', 47.49, 9.56, 1306, '1', 1, 1,
+        'Altenrhein', 1, 'LSZR', 'ACH', NULL, NULL, NULL, NULL),
+    (3, 'KLAX', 'large_airport', 'Los Angeles International Airport', 33.94, -118.41, 125, '2', 2, 2,
+        'Los Angeles', 1, 'KLAX', 'LAX', NULL, NULL, NULL, NULL);
+
+INSERT INTO airport_frequency VALUES (1, 1, 'TWR', 'Tower', 118.1), (2, 3, 'TWR', 'Tower', 120.95);
+
+INSERT INTO runway (runway_id, airport_id, length_ft, lighted, closed) VALUES
+    (1, 1, 12139, 1, 0), (2, 3, 12923, 1, 0);
+
+INSERT INTO navigation_aid
+    (navigation_aid_id, filename, ident, name, type, frequency_khz, latitude_deg, longitude_deg,
+     iso_country, airport_id)
+VALUES
+    (1, 'Kloten_VOR-DME_CH', 'KLO', 'Kloten', 'VOR-DME', 114850, 47.46, 8.55, 'CH', 1),
+    (1, 'Kloten_VOR-DME_CH', 'KLO', 'Kloten', 'VOR-DME', 114850, 47.46, 8.55, 'CH', 1),
+    (2, 'Los_Angeles_VORTAC_US', 'LAX', 'Los Angeles', 'VORTAC', 113600, 33.93, -118.43, 'US', 3),
+    (2, 'Santa_Monica_VOR-DME_US', 'SMO', 'Santa Monica', 'VOR-DME', 110800, 34.01, -118.46, 'US', NULL),
+    (3, 'Trasadingen_VOR-DME_CH', 'TRA', 'Trasadingen', 'VOR-DME', 114300, 47.69, 8.43, 'CH', NULL);
+
+CREATE INDEX airport_municipality ON airport (municipality);
+
+CREATE TRIGGER airport_ident_upper AFTER INSERT ON airport
+BEGIN
+    UPDATE airport SET airport_ident = upper(NEW.airport_ident) WHERE airport_id = NEW.airport_id;
+END;
+'''
+
+
+
+@pytest.fixture
+def baseline_database(tmp_path) -> pathlib.Path:
+    """The path to a small database laid out as schema.sql describes it, along with an
+    index and a trigger of its own on the airport table."""
+    path = tmp_path / 'airport.db'
+    connection = sqlite3.connect(path)
+
+    try:
+        connection.executescript(_SCHEMA_PATH.read_text(encoding = 'utf-8'))
+        connection.executescript(_ROWS)
+        connection.commit()
+    finally:
+        connection.close()
+
+    return path
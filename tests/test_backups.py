@@ -0,0 +1,72 @@
+# tests/test_backups.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Tests of the read-only connections that backups, integrity checks and integrity
+# scans are made through, opened on databases whose paths have characters in them that mean
+# something in a URI.
+
+import shutil
+import sqlite3
+
+import pytest
+
+from p2app.engine import backups, integrity
+
+
+
+# Each of these would, unescaped, end the path early, or be decoded into another
+# character, so that the wrong file is opened.
+_DIRECTORY_NAMES = ['what?', 'number#1', '100%41', 'with space']
+
+
+
+@pytest.fixture(params = _DIRECTORY_NAMES)
+def awkward_database(request, baseline_database, tmp_path):
+    directory = tmp_path / request.param
+    directory.mkdir()
+    path = directory / 'airport.db'
+    shutil.copy(baseline_database, path)
+    return path
+
+
+def _rows(path, sql):
+    connection = sqlite3.connect(path)
+
+    try:
+        return connection.execute(sql).fetchall()
+    finally:
+        connection.close()
+
+
+def test_read_only_uri_opens_the_database_at_the_path(awkward_database):
+    connection = sqlite3.connect(backups.read_only_uri(awkward_database), uri = True)
+
+    try:
+        assert connection.execute('PRAGMA database_list;').fetchone()[2] == str(awkward_database)
+
+        with pytest.raises(sqlite3.OperationalError):
+            connection.execute('DELETE FROM continent;')
+    finally:
+        connection.close()
+
+
+def test_integrity_is_checked_at_the_path(awkward_database):
+    assert backups.check_integrity(awkward_database) == ['ok']
+
+
+def test_database_at_the_path_is_backed_up(awkward_database, tmp_path):
+    target_path = tmp_path / 'backup.db'
+
+    for _ in backups.copy(awkward_database, target_path, pages_per_step = 1):
+        pass
+
+    assert _rows(target_path, 'SELECT * FROM airport;') == _rows(awkward_database, 'SELECT * FROM airport;')
+
+
+def test_integrity_scan_reads_the_database_at_the_path(awkward_database):
+    report = integrity.scan(awkward_database, workers = 2)
+
+    assert report['database'] == str(awkward_database)
+    assert report['tasks'] > 0
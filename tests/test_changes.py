@@ -0,0 +1,78 @@
+# tests/test_changes.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Tests of the change log, which a database only gets if the engine is asked to
+# keep one and its user agrees to migrate the database.
+
+import sqlite3
+
+from p2app.events import *
+from p2app.engine import changes
+from p2app.engine.main import Engine
+
+
+
+def _run(engine, event):
+    return list(engine.process_event(event))
+
+
+def _schema(path):
+    connection = sqlite3.connect(path)
+
+    try:
+        return connection.execute('SELECT name, sql FROM sqlite_master ORDER BY name;').fetchall()
+    finally:
+        connection.close()
+
+
+def test_opening_a_database_adds_nothing_to_it(baseline_database):
+    schema = _schema(baseline_database)
+
+    for engine in (Engine(), Engine(change_log = True)):
+        _run(engine, OpenDatabaseEvent(baseline_database))
+        _run(engine, CloseDatabaseEvent())
+
+    assert _schema(baseline_database) == schema
+
+
+def test_change_log_is_only_offered_when_asked_for(baseline_database):
+    engine = Engine()
+    plain = _run(engine, OpenDatabaseEvent(baseline_database))[-1].descriptions()
+    _run(engine, MigrateDatabaseEvent())
+
+    assert not changes.has_log(engine._connection)
+    _run(engine, CloseDatabaseEvent())
+
+    logging = _run(Engine(change_log = True), OpenDatabaseEvent(baseline_database))[-1].descriptions()
+
+    assert len(logging) == 1 and logging[0] not in plain
+
+
+def test_changes_are_listed_once_logged(baseline_database):
+    engine = Engine(change_log = True)
+    _run(engine, OpenDatabaseEvent(baseline_database))
+    _run(engine, MigrateDatabaseEvent())
+    region = _run(engine, LoadRegionEvent(2))[-1].region()
+
+    _run(engine, SaveRegionEvent(region._replace(name = 'Golden State')))
+    events = _run(engine, ListChangesEvent(0))
+
+    assert [event.change()[1:] for event in events[:-1]] == [('region', 2, 'update')]
+    assert isinstance(events[-1], ChangesListedEvent)
+
+
+def test_listing_changes_without_a_log_is_an_error(baseline_database):
+    engine = Engine()
+    _run(engine, OpenDatabaseEvent(baseline_database))
+
+    assert [type(event) for event in _run(engine, ListChangesEvent(0))] == [ErrorEvent]
+    assert [type(event) for event in _run(engine, CompactChangeLogEvent())] == [ErrorEvent]
+
+
+def test_listing_changes_before_a_database_is_opened_is_an_error():
+    engine = Engine()
+
+    assert [type(event) for event in _run(engine, ListChangesEvent(0))] == [ErrorEvent]
+    assert [type(event) for event in _run(engine, CompactChangeLogEvent())] == [ErrorEvent]
@@ -0,0 +1,126 @@
+# tests/test_duplicates.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Tests of the grid that decides which airports are compared when looking for
+# duplicates, checking that every pair close enough to be duplicates is compared,
+# wherever the boundaries of the grid's cells fall between them.
+
+import math
+import random
+
+import pytest
+
+from p2app.engine import duplicates
+from p2app.engine.main import Engine
+from p2app.events import *
+
+
+
+_MAX_DISTANCE_M = 1000.0
+
+
+def _grid(sites, max_distance_m = _MAX_DISTANCE_M):
+    grid = duplicates._Grid(max_distance_m)
+
+    for site in sites:
+        grid.add(site)
+
+    return grid
+
+
+def _site(airport_id, latitude, longitude):
+    return (airport_id, f'X{airport_id}', f'Airport {airport_id}', latitude, longitude)
+
+
+def _compared(grid, site):
+    return {other[0] for other in grid.neighbours(site[3], site[4])}
+
+
+def _offset(latitude, longitude, north_m, east_m):
+    # A location the given distances north and east of another, near enough for the
+    # earth to be treated as flat there.
+    degrees_per_m = math.degrees(1 / duplicates.EARTH_RADIUS_M)
+    return (
+        latitude + north_m * degrees_per_m,
+        longitude + east_m * degrees_per_m / math.cos(math.radians(latitude)))
+
+
+def _assert_close_pairs_are_compared(sites, max_distance_m = _MAX_DISTANCE_M):
+    grid = _grid(sites, max_distance_m)
+
+    for site in sites:
+        for other in sites:
+            if duplicates.distance_m(site[3], site[4], other[3], other[4]) <= max_distance_m:
+                assert other[0] in _compared(grid, site), (site, other)
+
+
+def test_pair_across_a_band_boundary_is_compared():
+    grid = duplicates._Grid(_MAX_DISTANCE_M)
+    boundary = -90.0 + grid.band(47.0) * grid._band_height
+    south = _site(1, boundary - 1e-6, 8.5)
+    north = _site(2, boundary + 1e-6, 8.5)
+
+    assert grid.band(south[3]) != grid.band(north[3])
+    _assert_close_pairs_are_compared([south, north])
+
+
+def test_pair_across_a_column_boundary_is_compared():
+    grid = duplicates._Grid(_MAX_DISTANCE_M)
+    band = grid.band(47.0)
+    boundary = -180.0 + 360.0 / grid.column_count(band) * (grid.column(band, 8.5) + 1)
+    west = _site(1, 47.0, boundary - 1e-6)
+    east = _site(2, 47.0, boundary + 1e-6)
+
+    assert grid.column(band, west[4]) != grid.column(band, east[4])
+    _assert_close_pairs_are_compared([west, east])
+
+
+def test_pair_across_a_band_and_a_column_boundary_is_compared():
+    grid = duplicates._Grid(_MAX_DISTANCE_M)
+    band = grid.band(47.0)
+    latitude = -90.0 + band * grid._band_height
+    longitude = -180.0 + 360.0 / grid.column_count(band) * (grid.column(band, 8.5) + 1)
+
+    _assert_close_pairs_are_compared([
+        _site(1, latitude - 1e-6, longitude - 1e-6),
+        _site(2, latitude + 1e-6, longitude + 1e-6),
+        _site(3, latitude - 1e-6, longitude + 1e-6),
+        _site(4, latitude + 1e-6, longitude - 1e-6)])
+
+
+def test_pair_across_the_antimeridian_is_compared():
+    _assert_close_pairs_are_compared([_site(1, -16.5, 179.9999), _site(2, -16.5, -179.9999)])
+
+
+@pytest.mark.parametrize('latitude', [89.9999, -89.9999, 89.995])
+def test_pair_near_a_pole_is_compared(latitude):
+    _assert_close_pairs_are_compared([
+        _site(1, latitude, 0.0), _site(2, latitude, 90.0), _site(3, latitude, 180.0),
+        _site(4, math.copysign(89.99, latitude), 45.0)])
+
+
+@pytest.mark.parametrize('latitude', [0.0, 47.0, 60.0, 75.0, 85.0])
+def test_every_close_pair_around_a_location_is_compared(latitude):
+    generator = random.Random(latitude)
+    centre_latitude, centre_longitude = latitude, generator.uniform(-180.0, 180.0)
+    sites = [
+        _site(airport_id, *_offset(
+            centre_latitude, centre_longitude,
+            generator.uniform(-1500.0, 1500.0), generator.uniform(-1500.0, 1500.0)))
+        for airport_id in range(200)]
+
+    _assert_close_pairs_are_compared(sites)
+
+
+def test_distant_airports_are_in_cells_that_are_not_compared():
+    grid = _grid([_site(1, 47.0, 8.5), _site(2, 47.1, 8.5), _site(3, 47.0, 8.7)])
+
+    assert _compared(grid, _site(1, 47.0, 8.5)) == {1}
+
+
+def test_finding_duplicates_before_a_database_is_opened_is_an_error():
+    events = list(Engine().process_event(FindDuplicateAirportsEvent()))
+
+    assert [type(event) for event in events] == [ErrorEvent]
@@ -0,0 +1,191 @@
+# tests/test_event_bus.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Tests of the event bus's queued mode: the bound on its queue, the policies that
+# decide what's dropped when it's full, and cancelling a drain that's scheduled.
+
+import pytest
+
+from p2app.events import *
+from p2app.events import event_bus
+
+
+
+class _Engine:
+    def __init__(self):
+        self.processed = []
+        self.on_process = None
+
+
+    def process_event(self, event):
+        self.processed.append(event)
+
+        if self.on_process is not None:
+            on_process, self.on_process = self.on_process, None
+            on_process()
+
+        yield from ()
+
+
+
+class _View:
+    def handle_event(self, event):
+        pass
+
+
+
+class _Scheduler:
+    def __init__(self):
+        self.scheduled = {}
+        self.cancelled = []
+        self._next_id = 1
+
+
+    def __call__(self, function):
+        scheduled_id = f'after#{self._next_id}'
+        self._next_id += 1
+        self.scheduled[scheduled_id] = function
+        return scheduled_id
+
+
+    def cancel(self, scheduled_id):
+        self.cancelled.append(scheduled_id)
+        del self.scheduled[scheduled_id]
+
+
+    def run(self):
+        scheduled, self.scheduled = self.scheduled, {}
+
+        for function in scheduled.values():
+            function()
+
+
+
+def _bus(max_queue_depth, overflow_policy, scheduler = None):
+    bus = event_bus.EventBus()
+    engine = _Engine()
+    bus.register_engine(engine)
+    bus.register_view(_View())
+    bus.enable_queued_mode(
+        max_queue_depth, overflow_policy, scheduler,
+        scheduler.cancel if scheduler is not None else None)
+    return bus, engine
+
+
+def _load(country_id):
+    return LoadCountryEvent(country_id)
+
+
+def _save(country_id):
+    return SaveCountryEvent(Country(country_id, 'XX', 'X', 1, '', None))
+
+
+def _fill_during_drain(bus, engine, events):
+    # Initiates the given events while the engine is processing another one, which is
+    # when the queue can't be drained to make room for them.
+    engine.on_process = lambda: [bus.initiate_event(event) for event in events]
+    bus.initiate_event(_load(0))
+
+
+@pytest.mark.parametrize('overflow_policy', [event_bus.DROP_OLDEST, event_bus.DROP_NEWEST, event_bus.MERGE])
+def test_queue_stays_bounded_while_draining(overflow_policy):
+    bus, engine = _bus(3, overflow_policy)
+    observed_depths = []
+    events = [_load(country_id) for country_id in range(1, 10)]
+
+    def initiate_all():
+        for event in events:
+            bus.initiate_event(event)
+            observed_depths.append(bus.queue_metrics()['depth'])
+
+    engine.on_process = initiate_all
+    bus.initiate_event(_load(0))
+
+    assert max(observed_depths) <= 3
+    assert bus.queue_metrics()['high_water_mark'] <= 3
+    assert bus.queue_metrics()['dropped'] + bus.queue_metrics()['coalesced'] > 0
+
+
+def test_drop_oldest_keeps_the_newest_while_draining():
+    bus, engine = _bus(2, event_bus.DROP_OLDEST)
+    _fill_during_drain(bus, engine, [_load(1), _load(2), _load(3)])
+
+    assert [event.country_id() for event in engine.processed[1:]] == [2, 3]
+
+
+def test_drop_newest_keeps_the_oldest_while_draining():
+    bus, engine = _bus(2, event_bus.DROP_NEWEST)
+    _fill_during_drain(bus, engine, [_load(1), _load(2), _load(3)])
+
+    assert [event.country_id() for event in engine.processed[1:]] == [1, 2]
+
+
+def test_drop_newest_makes_room_for_saves_by_dropping_a_load():
+    bus, engine = _bus(2, event_bus.DROP_NEWEST)
+    _fill_during_drain(bus, engine, [_load(1), _load(2), _save(3)])
+
+    assert [type(event) for event in engine.processed[1:]] == [LoadCountryEvent, SaveCountryEvent]
+    assert bus.queue_metrics()['high_water_mark'] == 2
+
+
+def test_saves_are_never_dropped():
+    bus, engine = _bus(2, event_bus.DROP_OLDEST)
+    _fill_during_drain(bus, engine, [_save(1), _save(2), _save(3), _load(4)])
+
+    assert [event.country().country_id for event in engine.processed[1:]] == [1, 2, 3]
+
+
+def test_full_queue_is_drained_when_not_draining():
+    scheduler = _Scheduler()
+    bus, engine = _bus(2, event_bus.MERGE, scheduler)
+
+    for country_id in range(1, 4):
+        bus.initiate_event(_save(country_id))
+
+    assert len(engine.processed) == 2
+    assert bus.queue_metrics()['forced_drains'] == 1
+
+
+def test_searches_are_coalesced():
+    scheduler = _Scheduler()
+    bus, engine = _bus(8, event_bus.DROP_OLDEST, scheduler)
+    bus.initiate_event(StartCountrySearchEvent('first', None))
+    bus.initiate_event(StartCountrySearchEvent('second', None))
+    scheduler.run()
+
+    assert [event.country_code() for event in engine.processed] == ['second']
+
+
+def test_disabling_with_discard_cancels_the_scheduled_drain():
+    scheduler = _Scheduler()
+    bus, engine = _bus(8, event_bus.DROP_OLDEST, scheduler)
+    bus.initiate_event(_load(1))
+
+    bus.disable_queued_mode(discard = True)
+
+    assert scheduler.cancelled == ['after#1']
+    assert scheduler.scheduled == {}
+    assert engine.processed == []
+    assert bus.queue_metrics()['dropped'] == 1
+
+
+def test_disabling_without_discard_processes_what_was_queued():
+    scheduler = _Scheduler()
+    bus, engine = _bus(8, event_bus.DROP_OLDEST, scheduler)
+    bus.initiate_event(_load(1))
+
+    bus.disable_queued_mode()
+
+    assert scheduler.cancelled == ['after#1']
+    assert [event.country_id() for event in engine.processed] == [1]
+
+
+def test_disabling_while_draining_stops_the_drain():
+    bus, engine = _bus(8, event_bus.DROP_OLDEST)
+    engine.on_process = lambda: (
+        bus.initiate_event(_save(1)), bus.disable_queued_mode(discard = True))
+    bus.initiate_event(_load(0))
+
+    assert len(engine.processed) == 1
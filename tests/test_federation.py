@@ -0,0 +1,184 @@
+# tests/test_federation.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Tests of searching other databases attached alongside the open one, and of
+# copying records between them, with the open database served from disk and from
+# an in-memory replica.
+
+import shutil
+import sqlite3
+
+import pytest
+
+from p2app.engine import replicas
+from p2app.engine.main import Engine
+from p2app.events import *
+
+
+
+def _run(engine, event):
+    return list(engine.process_event(event))
+
+
+def _last(engine, event):
+    return _run(engine, event)[-1]
+
+
+def _query(path, sql, parameters = ()):
+    connection = sqlite3.connect(path)
+
+    try:
+        return connection.execute(sql, parameters).fetchall()
+    finally:
+        connection.close()
+
+
+@pytest.fixture(params = [False, True], ids = ['disk', 'replica'])
+def federated(request, baseline_database, tmp_path):
+    """An engine with the baseline database open and migrated, with a copy of it
+    holding staged edits attached as staging, served from disk or from a replica."""
+    staging_path = tmp_path / 'staging.db'
+    shutil.copy(baseline_database, staging_path)
+
+    connection = sqlite3.connect(staging_path)
+    connection.execute("UPDATE country SET name = 'Schweiz' WHERE country_id = 1;")
+    connection.execute(
+        "INSERT INTO country VALUES (3, 'ZZ', 'Zédland', 1, 'https://example.com/Zedland', 'zed, staged');")
+    connection.commit()
+    connection.close()
+
+    engine = Engine(replica = request.param, replica_max_bytes = None)
+    _run(engine, OpenDatabaseEvent(baseline_database))
+    _run(engine, MigrateDatabaseEvent())
+    assert isinstance(engine._connection, replicas.ReplicaConnection) == request.param
+    assert isinstance(_last(engine, AttachDatabaseEvent(staging_path, 'staging')), DatabaseAttachedEvent)
+
+    yield engine, baseline_database, staging_path
+    _run(engine, CloseDatabaseEvent())
+
+
+def _assert_replica_matches_disk(engine, path):
+    if isinstance(engine._connection, replicas.ReplicaConnection):
+        for table in ('country', 'region', 'keyword_index'):
+            in_memory = sqlite3.Connection.execute(
+                engine._connection, f'SELECT * FROM main.{table} ORDER BY 1, 2;').fetchall()
+            assert in_memory == _query(path, f'SELECT * FROM {table} ORDER BY 1, 2;')
+
+
+def test_search_covers_every_attached_database(federated):
+    engine, _, _ = federated
+    results = [
+        (event.source(), event.record().name)
+        for event in _run(engine, StartFederatedSearchEvent('country', 'CH', None))
+        if isinstance(event, FederatedSearchResultEvent)]
+
+    assert results == [('main', 'Switzerland'), ('staging', 'Schweiz')]
+
+
+def test_search_by_name_ignores_accents_in_unmigrated_databases(federated):
+    engine, _, _ = federated
+    results = [
+        (event.source(), event.record().country_id)
+        for event in _run(engine, StartFederatedSearchEvent('country', None, 'ZEDLAND'))
+        if isinstance(event, FederatedSearchResultEvent)]
+
+    assert results == [('staging', 3)]
+
+
+def test_copy_into_the_open_database(federated):
+    engine, main_path, _ = federated
+
+    copied = _last(engine, CopyRecordsEvent('country', [3], 'staging', 'main'))
+
+    assert isinstance(copied, RecordsCopiedEvent) and copied.count() == 1
+    assert _last(engine, LoadCountryEvent(3)).country().name == 'Zédland'
+    assert _query(main_path, 'SELECT name, normalized_name FROM country WHERE country_id = 3;') == [
+        ('Zédland', 'zedland')]
+    assert [
+        event.country().country_id
+        for event in _run(engine, StartCountryKeywordSearchEvent(['staged']))
+        if isinstance(event, CountrySearchResultEvent)] == [3]
+    _assert_replica_matches_disk(engine, main_path)
+
+
+def test_copy_of_an_existing_record_fails_unless_replacing(federated):
+    engine, main_path, _ = federated
+
+    assert isinstance(_last(engine, CopyRecordsEvent('country', [1], 'staging', 'main')), ErrorEvent)
+    assert _last(engine, LoadCountryEvent(1)).country().name == 'Switzerland'
+
+    _run(engine, CopyRecordsEvent('country', [1], 'staging', 'main', True))
+
+    assert _last(engine, LoadCountryEvent(1)).country().name == 'Schweiz'
+    assert _query(main_path, 'SELECT COUNT(*) FROM region WHERE country_id = 1;') == [(1,)]
+    _assert_replica_matches_disk(engine, main_path)
+
+
+def test_copy_into_an_attached_database_is_made_on_disk_alone(federated):
+    engine, main_path, staging_path = federated
+    region = _last(engine, LoadRegionEvent(1)).region()
+    _run(engine, SaveRegionEvent(region._replace(name = 'Zürichsee')))
+
+    copied = _last(engine, CopyRecordsEvent('region', [1], 'main', 'staging', True))
+
+    assert isinstance(copied, RecordsCopiedEvent)
+    assert _query(staging_path, 'SELECT name FROM region WHERE region_id = 1;') == [('Zürichsee',)]
+    assert _query(main_path, 'SELECT name FROM region WHERE region_id = 1;') == [('Zürichsee',)]
+    _assert_replica_matches_disk(engine, main_path)
+
+
+def test_failed_copy_copies_nothing(federated):
+    engine, main_path, staging_path = federated
+    connection = sqlite3.connect(staging_path)
+    connection.execute('PRAGMA foreign_keys = OFF;')
+    connection.execute(
+        "INSERT INTO country VALUES (4, 'QQ', 'Nowhere', 99, 'https://example.com/Nowhere', NULL);")
+    connection.commit()
+    connection.close()
+
+    assert isinstance(_last(engine, CopyRecordsEvent('country', [3, 4], 'staging', 'main')), ErrorEvent)
+    assert _query(main_path, 'SELECT COUNT(*) FROM country WHERE country_id IN (3, 4);') == [(0,)]
+    _assert_replica_matches_disk(engine, main_path)
+
+
+def test_detached_database_is_no_longer_searched(federated):
+    engine, _, _ = federated
+    _run(engine, DetachDatabaseEvent('staging'))
+
+    sources = {
+        event.source()
+        for event in _run(engine, StartFederatedSearchEvent('country', 'CH', None))
+        if isinstance(event, FederatedSearchResultEvent)}
+
+    assert sources == {'main'}
+    assert isinstance(_last(engine, DetachDatabaseEvent('staging')), ErrorEvent)
+
+
+def test_searching_before_a_database_is_opened_is_an_error():
+    events = _run(Engine(), StartFederatedSearchEvent('country', 'CH', None))
+
+    assert [type(event) for event in events] == [ErrorEvent]
+
+
+@pytest.mark.parametrize('sql, attached', [
+    ('INSERT INTO "staging".country (country_id) VALUES (1);', True),
+    ('INSERT OR REPLACE INTO staging.country (country_id) VALUES (1);', True),
+    ('UPDATE "staging".region SET name = NULL;', True),
+    ('UPDATE OR IGNORE staging.region SET name = NULL;', True),
+    ('DELETE FROM "staging".keyword_index WHERE entity_id = 1;', True),
+    ('PRAGMA "staging".table_info(country);', True),
+    ('INSERT INTO "main".country (country_id) SELECT country_id FROM "staging".country;', False),
+    ('UPDATE region SET name = NULL;', False),
+    ('DELETE FROM temp.scratch;', False),
+    ('PRAGMA main.table_info(country);', False),
+    ('PRAGMA foreign_keys = ON;', False)
+])
+def test_writes_to_attached_databases_are_told_apart(sql, attached):
+    replica = sqlite3.connect(':memory:', factory = replicas.ReplicaConnection)
+
+    try:
+        assert replica.writes_attached(sql) == attached
+    finally:
+        sqlite3.Connection.close(replica)
@@ -0,0 +1,56 @@
+# tests/test_imports.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Tests that every name the p2app modules use from their own module's namespace is
+# defined there, which catches a module that relied on another's star import for a
+# name that module no longer exports.  The modules are imported, but nothing in them
+# is run, so the views need no display.
+
+import builtins
+import importlib
+import pathlib
+import pkgutil
+import symtable
+
+import pytest
+
+import p2app
+
+
+
+def _module_names():
+    return [info.name for info in pkgutil.walk_packages(p2app.__path__, 'p2app.')]
+
+
+def _global_names(table):
+    # The names a scope uses that are looked up in its module's namespace: every name
+    # the module itself uses without defining it, and every name a function or class
+    # within it uses that none of the scopes enclosing it define.
+    for symbol in table.get_symbols():
+        if not symbol.is_referenced():
+            continue
+
+        if table.get_type() == 'module':
+            if not (symbol.is_assigned() or symbol.is_imported()):
+                yield symbol.get_name()
+        elif symbol.is_global() and not symbol.is_parameter():
+            # symtable can report a parameter as global (those of a function named
+            # top, which it mistakes for the module), but parameters never are.
+            yield symbol.get_name()
+
+    for child in table.get_children():
+        yield from _global_names(child)
+
+
+@pytest.mark.parametrize('module_name', _module_names())
+def test_every_name_a_module_uses_is_defined(module_name):
+    module = importlib.import_module(module_name)
+    source = pathlib.Path(module.__file__).read_text(encoding = 'utf-8')
+
+    undefined = {
+        name for name in _global_names(symtable.symtable(source, module.__file__, 'exec'))
+        if not hasattr(module, name) and not hasattr(builtins, name)}
+
+    assert undefined == set()
@@ -0,0 +1,110 @@
+# tests/test_keywords.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Tests of the keyword table behind keyword searches, which a database only gets
+# once it's migrated, and of keyword searches on databases that don't have it.
+
+import sqlite3
+
+from p2app.engine import keywords
+from p2app.engine.main import Engine
+from p2app.events import *
+
+
+
+def _run(engine, event):
+    return list(engine.process_event(event))
+
+
+def _found_countries(engine, keyword_list, match_all = True):
+    return [
+        event.country().country_id
+        for event in _run(engine, StartCountryKeywordSearchEvent(keyword_list, match_all))
+        if isinstance(event, CountrySearchResultEvent)]
+
+
+def _schema_objects(path):
+    connection = sqlite3.connect(path)
+
+    try:
+        return {name for (name,) in connection.execute('SELECT name FROM sqlite_master;')}
+    finally:
+        connection.close()
+
+
+def test_tokenize_normalizes_and_splits_on_commas():
+    assert keywords.tokenize(' Schweiz,SUISSE , ,Zürich') == {'schweiz', 'suisse', 'zurich'}
+    assert keywords.tokenize(None) == set()
+
+
+def test_opening_a_database_leaves_its_keywords_unindexed(baseline_database):
+    engine = Engine()
+    events = _run(engine, OpenDatabaseEvent(baseline_database))
+    _run(engine, CloseDatabaseEvent())
+
+    assert 'keyword_index' not in _schema_objects(baseline_database)
+    assert any('keyword' in description for description in events[-1].descriptions())
+
+
+def test_keywords_are_found_with_and_without_the_keyword_table(baseline_database):
+    engine = Engine()
+    _run(engine, OpenDatabaseEvent(baseline_database))
+
+    assert _found_countries(engine, ['suisse']) == [1]
+    assert _found_countries(engine, ['suisse', 'nowhere'], match_all = False) == [1]
+    assert _found_countries(engine, ['suisse', 'nowhere']) == []
+
+    _run(engine, MigrateDatabaseEvent())
+
+    assert keywords.has_index(engine._connection)
+    assert _found_countries(engine, ['SCHWEIZ']) == [1]
+    assert _found_countries(engine, ['suisse', 'nowhere']) == []
+
+
+def test_null_strings_are_replaced_by_migrating(baseline_database):
+    connection = sqlite3.connect(baseline_database)
+    connection.execute("UPDATE country SET keywords = 'NULL' WHERE country_id = 2;")
+    connection.execute("UPDATE region SET wikipedia_link = 'NULL' WHERE region_id = 2;")
+    connection.commit()
+    connection.close()
+
+    engine = Engine()
+    _run(engine, OpenDatabaseEvent(baseline_database))
+    assert keywords.has_null_strings(engine._connection)
+
+    _run(engine, MigrateDatabaseEvent())
+
+    assert not keywords.has_null_strings(engine._connection)
+    assert engine._connection.execute(
+        'SELECT keywords FROM country WHERE country_id = 2;').fetchone() == (None,)
+    assert _found_countries(engine, ['null']) == []
+
+
+def test_saved_keywords_are_indexed(baseline_database):
+    engine = Engine()
+    _run(engine, OpenDatabaseEvent(baseline_database))
+    _run(engine, MigrateDatabaseEvent())
+    country = _run(engine, LoadCountryEvent(2))[-1].country()
+
+    _run(engine, SaveCountryEvent(country._replace(keywords = 'USA, America')))
+
+    assert _found_countries(engine, ['usa']) == [2]
+
+
+def test_save_whose_keywords_cannot_be_indexed_is_undone(baseline_database):
+    engine = Engine()
+    _run(engine, OpenDatabaseEvent(baseline_database))
+    _run(engine, MigrateDatabaseEvent())
+    engine._connection.execute(
+        "CREATE TEMP TRIGGER refuse_keywords BEFORE INSERT ON main.keyword_index"
+        " BEGIN SELECT RAISE(ABORT, 'refused'); END;")
+    country = _run(engine, LoadCountryEvent(2))[-1].country()
+
+    failed = _run(engine, SaveCountryEvent(country._replace(name = 'USA', keywords = 'USA')))[-1]
+
+    assert isinstance(failed, SaveCountryFailedEvent)
+    assert 'keywords' in failed.reason()
+    assert not engine._connection.in_transaction
+    assert _run(engine, LoadCountryEvent(2))[-1].country() == country
@@ -0,0 +1,158 @@
+# tests/test_migrations.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Tests of the migrations that bring the layout of an older database up to date,
+# each applied to a copy of a database laid out as schema.sql describes it.
+
+import functools
+import sqlite3
+
+import pytest
+
+from p2app.engine import migrations, normalize
+
+
+
+_TABLES = [
+    'continent', 'country', 'region', 'airport', 'airport_frequency', 'runway', 'navigation_aid']
+
+
+
+@pytest.fixture
+def connection(baseline_database):
+    connection = sqlite3.connect(baseline_database, isolation_level = None)
+    connection.execute('PRAGMA foreign_keys = ON;')
+    yield connection
+    connection.close()
+
+
+def _migration(name):
+    return next(migration for migration in migrations.MIGRATIONS if migration.name == name)
+
+
+def _row_counts(connection):
+    return {
+        table: connection.execute(f'SELECT COUNT(*) FROM {table};').fetchone()[0]
+        for table in _TABLES}
+
+
+def _schema_names(connection, object_type, table):
+    return {
+        name for (name,) in connection.execute(
+            'SELECT name FROM sqlite_master WHERE type = ? AND tbl_name = ?;', (object_type, table))}
+
+
+def _column_types(connection, table):
+    return {name: column_type for _, name, column_type, *_ in connection.execute(f'PRAGMA table_info({table});')}
+
+
+def _foreign_keys(connection, table):
+    return sorted(
+        (referenced_table, from_column, to_column)
+        for _, _, referenced_table, from_column, to_column, *_ in connection.execute(
+            f'PRAGMA foreign_key_list({table});'))
+
+
+def test_airport_continent_id_becomes_an_integer(connection):
+    migration = _migration('airport_continent_id_integer')
+    counts = _row_counts(connection)
+    foreign_keys = _foreign_keys(connection, 'airport')
+    assert migration.is_needed(connection)
+
+    migrations.apply(connection, migration)
+
+    assert not migration.is_needed(connection)
+    assert _column_types(connection, 'airport')['continent_id'] == 'INTEGER'
+    assert connection.execute(
+        'SELECT DISTINCT typeof(continent_id) FROM airport;').fetchall() == [('integer',)]
+    assert _row_counts(connection) == counts
+    assert _foreign_keys(connection, 'airport') == foreign_keys
+    assert connection.execute('PRAGMA foreign_key_check;').fetchall() == []
+    assert connection.execute('PRAGMA foreign_keys;').fetchone() == (1,)
+
+
+def test_airport_indexes_and_triggers_survive_the_rebuild(connection):
+    migrations.apply(connection, _migration('airport_continent_id_integer'))
+
+    assert {'airport_municipality', 'airport_continent_id'} <= _schema_names(connection, 'index', 'airport')
+    assert _schema_names(connection, 'trigger', 'airport') == {'airport_ident_upper'}
+
+    connection.execute(
+        "INSERT INTO airport (airport_id, airport_ident, type, name, latitude_deg, longitude_deg,"
+        " continent_id, country_id, region_id, scheduled_service)"
+        " VALUES (4, 'lszb', 'medium_airport', 'Bern Airport', 46.91, 7.5, 1, 1, 1, 1);")
+
+    assert connection.execute('SELECT airport_ident FROM airport WHERE airport_id = 4;').fetchone() == ('LSZB',)
+
+
+def test_rows_are_copied_in_batches(connection, monkeypatch):
+    monkeypatch.setattr(
+        migrations, '_rebuild_table', functools.partial(migrations._rebuild_table, batch_size = 1))
+    rows = connection.execute('SELECT airport_id, name FROM airport ORDER BY airport_id;').fetchall()
+
+    migrations.apply(connection, _migration('airport_continent_id_integer'))
+
+    assert connection.execute('SELECT airport_id, name FROM airport ORDER BY airport_id;').fetchall() == rows
+
+
+def test_airport_with_a_continent_id_that_is_not_an_integer_leaves_the_database_as_it_was(connection):
+    connection.execute('PRAGMA foreign_keys = OFF;')
+    connection.execute("UPDATE airport SET continent_id = 'EU' WHERE airport_id = 1;")
+    connection.execute('PRAGMA foreign_keys = ON;')
+    schema = connection.execute('SELECT group_concat(sql) FROM sqlite_master;').fetchone()
+
+    with pytest.raises(migrations.MigrationError):
+        migrations.apply(connection, _migration('airport_continent_id_integer'))
+
+    assert connection.execute('SELECT group_concat(sql) FROM sqlite_master;').fetchone() == schema
+    assert not connection.in_transaction
+    assert connection.execute('PRAGMA foreign_keys;').fetchone() == (1,)
+
+
+def test_navigation_aid_ids_become_a_primary_key(connection):
+    migration = _migration('navigation_aid_primary_key')
+    counts = _row_counts(connection)
+    foreign_keys = _foreign_keys(connection, 'navigation_aid')
+    assert migration.is_needed(connection)
+
+    migrations.apply(connection, migration)
+
+    assert not migration.is_needed(connection)
+    assert connection.execute(
+        'SELECT navigation_aid_id, filename FROM navigation_aid ORDER BY navigation_aid_id;').fetchall() == [
+            (1, 'Kloten_VOR-DME_CH'),
+            (2, 'Los_Angeles_VORTAC_US'),
+            (3, 'Trasadingen_VOR-DME_CH'),
+            (4, 'Santa_Monica_VOR-DME_US')]
+    assert _row_counts(connection) == counts | {'navigation_aid': counts['navigation_aid'] - 1}
+    assert _foreign_keys(connection, 'navigation_aid') == foreign_keys
+    assert connection.execute('PRAGMA foreign_key_check;').fetchall() == []
+
+
+def test_navigation_aid_columns_are_indexed(connection):
+    migrations.apply(connection, _migration('navigation_aid_primary_key'))
+
+    assert _schema_names(connection, 'index', 'navigation_aid') == {
+        'navigation_aid_ident', 'navigation_aid_type', 'navigation_aid_frequency_khz',
+        'navigation_aid_airport_id'}
+    assert 'navigation_aid_ids' not in {
+        name for (name,) in connection.execute('SELECT name FROM temp.sqlite_master;')}
+
+    with pytest.raises(sqlite3.IntegrityError):
+        connection.execute(
+            "INSERT INTO navigation_aid (navigation_aid_id, filename, ident, name, type, frequency_khz,"
+            " latitude_deg, longitude_deg, iso_country)"
+            " VALUES (1, 'Other_NDB_CH', 'OTH', 'Other', 'NDB', 300, 47.0, 8.0, 'CH');")
+
+
+def test_all_migrations_apply_in_order(connection):
+    normalize.register_functions(connection)
+
+    for migration in migrations.pending(connection):
+        migrations.apply(connection, migration)
+
+    assert migrations.pending(connection) == []
+    assert connection.execute('PRAGMA integrity_check;').fetchone() == ('ok',)
+    assert connection.execute('PRAGMA foreign_key_check;').fetchall() == []
@@ -0,0 +1,44 @@
+# tests/test_navigation_aids.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Tests of the engine's navigation aid searches, before and after the database is
+# migrated to index the columns they search by.
+
+from p2app.engine.main import Engine
+from p2app.events import *
+
+
+
+def _run(engine, event):
+    return list(engine.process_event(event))
+
+
+def _found_idents(engine, **criteria):
+    event = StartNavigationAidSearchEvent(
+        criteria.get('ident'), criteria.get('navigation_aid_type'), criteria.get('frequency_khz'),
+        criteria.get('airport_id'))
+
+    return sorted(
+        result.navigation_aid().ident
+        for result in _run(engine, event) if isinstance(result, NavigationAidSearchResultEvent))
+
+
+def test_searching_before_a_database_is_opened_is_an_error():
+    events = _run(Engine(), StartNavigationAidSearchEvent('KLO', None, None, None))
+
+    assert [type(event) for event in events] == [ErrorEvent]
+
+
+def test_navigation_aids_are_found_before_and_after_migrating(baseline_database):
+    engine = Engine()
+    _run(engine, OpenDatabaseEvent(baseline_database))
+
+    assert _found_idents(engine, ident = 'KLO') == ['KLO', 'KLO']
+
+    _run(engine, MigrateDatabaseEvent())
+
+    assert _found_idents(engine, ident = 'KLO') == ['KLO']
+    assert _found_idents(engine, navigation_aid_type = 'VOR-DME', airport_id = None) == ['KLO', 'SMO', 'TRA']
+    assert _found_idents(engine, airport_id = 3) == ['LAX']
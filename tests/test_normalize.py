@@ -0,0 +1,100 @@
+# tests/test_normalize.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Tests of the stored normalized names that let searches by name ignore accents
+# and case, and of the database staying usable without the engine once they're
+# stored.
+
+import sqlite3
+
+from p2app.engine import migrations, normalize
+from p2app.engine.main import Engine
+from p2app.events import *
+
+
+
+def _run(engine, event):
+    return list(engine.process_event(event))
+
+
+def _migrated_engine(path):
+    engine = Engine()
+    _run(engine, OpenDatabaseEvent(path))
+    _run(engine, MigrateDatabaseEvent())
+    return engine
+
+
+def _found_regions(engine, name):
+    return [
+        event.region().region_id
+        for event in _run(engine, StartRegionSearchEvent(None, None, name))
+        if isinstance(event, RegionSearchResultEvent)]
+
+
+def test_normalize_name_folds_accents_case_and_spaces():
+    assert normalize.normalize_name('  Zürich   AIRPORT ') == 'zurich airport'
+
+
+def test_accented_names_are_found_before_and_after_migrating(baseline_database):
+    engine = Engine()
+    _run(engine, OpenDatabaseEvent(baseline_database))
+    assert _found_regions(engine, 'zurich') == [1]
+
+    _run(engine, MigrateDatabaseEvent())
+    assert _found_regions(engine, 'ZURICH') == [1]
+
+
+def test_migrated_database_needs_no_function_to_be_written(baseline_database):
+    _run(_migrated_engine(baseline_database), CloseDatabaseEvent())
+
+    connection = sqlite3.connect(baseline_database)
+
+    try:
+        schema = connection.execute('SELECT group_concat(sql) FROM sqlite_master;').fetchone()[0]
+        assert normalize.SQL_FUNCTION_NAME not in schema
+
+        connection.execute("UPDATE airport SET name = 'Zurich Kloten' WHERE airport_id = 1;")
+        connection.execute("UPDATE region SET name = 'Zürich Canton' WHERE region_id = 1;")
+        connection.execute("UPDATE continent SET name = 'Europa' WHERE continent_id = 1;")
+        assert connection.execute('PRAGMA integrity_check;').fetchone() == ('ok',)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def test_names_changed_elsewhere_are_marked_stale_and_still_found(baseline_database):
+    _run(_migrated_engine(baseline_database), CloseDatabaseEvent())
+
+    connection = sqlite3.connect(baseline_database)
+
+    try:
+        connection.execute("UPDATE region SET name = 'Zürich Canton' WHERE region_id = 1;")
+        connection.commit()
+        assert connection.execute(
+            'SELECT normalized_name FROM region WHERE region_id = 1;').fetchone() == (None,)
+    finally:
+        connection.close()
+
+    engine = Engine()
+    _run(engine, OpenDatabaseEvent(baseline_database))
+    assert _found_regions(engine, 'zurich canton') == [1]
+
+
+def test_saving_a_row_stores_its_normalized_name(baseline_database):
+    engine = _migrated_engine(baseline_database)
+    region = _run(engine, LoadRegionEvent(1))[-1].region()
+
+    _run(engine, SaveRegionEvent(region._replace(name = 'Zürichsee')))
+
+    assert engine._connection.execute(
+        'SELECT normalized_name FROM region WHERE region_id = 1;').fetchone() == ('zurichsee',)
+    assert _found_regions(engine, 'ZURICHSEE') == [1]
+
+
+def test_migration_is_no_longer_needed_once_applied(baseline_database):
+    engine = _migrated_engine(baseline_database)
+    pending = [migration.name for migration in migrations.pending(engine._connection)]
+
+    assert 'stored_normalized_names' not in pending
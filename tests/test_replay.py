@@ -0,0 +1,82 @@
+# tests/test_replay.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Tests of the headless replay harness: reading the engine configurations it's
+# given, and replaying recorded events against an engine made with them.
+
+import pytest
+
+from p2app.events import *
+from p2app import replay
+from p2app.engine import deadlines
+
+
+
+def test_config_values_are_python_literals():
+    assert replay.parse_config("slow_query_log='slow.log', slow_query_threshold=0.05, replica=True") == {
+        'slow_query_log': 'slow.log', 'slow_query_threshold': 0.05, 'replica': True}
+
+
+def test_config_values_may_hold_commas():
+    assert replay.parse_config("budgets={'A': 0.5, 'B': None}, slow_query_log='a,b.log'") == {
+        'budgets': {'A': 0.5, 'B': None}, 'slow_query_log': 'a,b.log'}
+
+
+def test_empty_config_has_no_options():
+    assert replay.parse_config('') == {}
+    assert replay.parse_config('  ') == {}
+
+
+@pytest.mark.parametrize('text', [
+    'slow_query_log=slow.log',
+    "budgets={'A': 0.5",
+    'replica',
+    'replica=True replica=False',
+    'replica=True, replica=False',
+    "'replica'=True",
+    '**options',
+    'budgets=dict(A=0.5)',
+    'replica=True), print(1',
+    'no_such_option=1'
+])
+def test_malformed_config_is_refused(text):
+    with pytest.raises(ValueError):
+        replay.parse_config(text)
+
+
+def test_malformed_config_is_refused_before_replaying(tmp_path, capsys):
+    log_path = tmp_path / 'session.jsonl'
+    log_path.write_text('')
+
+    with pytest.raises(SystemExit):
+        replay.main([str(log_path), '--config', "budgets={'A': 0.5"])
+
+    assert 'name=value' in capsys.readouterr().err
+
+
+def test_replay_enforces_every_budget_in_its_config(baseline_database, monkeypatch):
+    started_budgets = []
+    start = deadlines.Deadline.start
+
+    def record_start(deadline, budget):
+        started_budgets.append(budget)
+        start(deadline, budget)
+
+    monkeypatch.setattr(deadlines.Deadline, 'start', record_start)
+    config = replay.parse_config(
+        "budgets={'StartCountrySearchEvent': 0.5, 'LoadCountryEvent': None, 'SaveCountryEvent': 3.0}")
+    recorded_events = [
+        (0.0, OpenDatabaseEvent(baseline_database)),
+        (1.0, StartCountrySearchEvent('CH', None)),
+        (2.0, LoadCountryEvent(1)),
+        (3.0, SaveCountryEvent(Country(1, 'CH', 'Switzerland', 1, 'https://example.com/CH', None))),
+        (4.0, StartRegionSearchEvent('CH-ZH', None, None)),
+        (5.0, CloseDatabaseEvent())]
+
+    summaries = replay.replay(recorded_events, config)
+
+    assert started_budgets == [None, 0.5, None, 3.0, deadlines.SEARCH_BUDGET, None]
+    assert summaries['all']['count'] == 6
+    assert summaries['StartCountrySearchEvent']['count'] == 1
@@ -0,0 +1,108 @@
+# tests/test_replicas.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Tests of in-memory replicas, and of their agreeing with the database on disk
+# when a write fails on the replica alone.
+
+import sqlite3
+
+import pytest
+
+from p2app.engine import replicas
+
+
+
+_TABLES = ['continent', 'country', 'region', 'airport']
+
+
+
+@pytest.fixture
+def replica(baseline_database):
+    primary = sqlite3.connect(baseline_database, isolation_level = None)
+    replica, _ = replicas.replicate(primary, max_bytes = None)
+    yield replica
+    replica.close()
+
+
+def _contents(connection):
+    return {
+        table: sqlite3.Connection.execute(connection, f'SELECT * FROM {table} ORDER BY rowid;').fetchall()
+        for table in _TABLES}
+
+
+def _fail_on_replica_commit(replica):
+    # With foreign keys checked on the replica alone, and deferred until the end of
+    # the transaction, a write that breaks one is made on both, but can only be
+    # committed on the disk.
+    sqlite3.Connection.execute(replica, 'PRAGMA foreign_keys = ON;')
+    sqlite3.Connection.execute(replica, 'PRAGMA defer_foreign_keys = ON;')
+
+
+def test_reads_and_writes_are_made_on_both(replica):
+    replica.execute("UPDATE region SET name = 'Zurich' WHERE region_id = 1;")
+
+    assert replica.execute('SELECT name FROM region WHERE region_id = 1;').fetchone() == ('Zurich',)
+    assert _contents(replica) == _contents(replica.primary)
+
+
+def test_write_failing_on_the_replica_is_undone_on_both(replica):
+    sqlite3.Connection.execute(
+        replica,
+        "CREATE TEMP TRIGGER refuse_renames BEFORE UPDATE OF name ON main.region"
+        " BEGIN SELECT RAISE(ABORT, 'refused'); END;")
+    before = _contents(replica.primary)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        replica.execute("UPDATE region SET name = 'Zurich' WHERE region_id = 1;")
+
+    assert _contents(replica.primary) == before
+    assert _contents(replica) == before
+    assert not replica.in_transaction
+    assert not replica.is_set_aside
+
+
+def test_replica_failing_to_commit_is_set_aside_and_copied_again(replica):
+    _fail_on_replica_commit(replica)
+
+    replica.execute('UPDATE country SET continent_id = 99 WHERE country_id = 1;')
+
+    assert replica.is_set_aside
+    assert replica.primary.execute(
+        'SELECT continent_id FROM country WHERE country_id = 1;').fetchone() == (99,)
+
+    assert replica.execute('SELECT continent_id FROM country WHERE country_id = 1;').fetchone() == (99,)
+    assert not replica.is_set_aside
+    assert _contents(replica) == _contents(replica.primary)
+
+
+def test_replica_failing_to_commit_a_transaction_is_set_aside(replica):
+    _fail_on_replica_commit(replica)
+
+    replica.execute('BEGIN;')
+    replica.execute('UPDATE country SET continent_id = 99 WHERE country_id = 1;')
+    replica.execute("UPDATE region SET name = 'Zurich' WHERE region_id = 1;")
+    replica.execute('COMMIT;')
+
+    assert replica.is_set_aside
+    assert not replica.in_transaction
+    assert replica.execute('SELECT name FROM region WHERE region_id = 1;').fetchone() == ('Zurich',)
+    assert _contents(replica) == _contents(replica.primary)
+
+
+def test_set_aside_replica_is_copied_once_the_transaction_ends(replica):
+    replica.execute('BEGIN;')
+    replica.execute("UPDATE region SET name = 'Zurich' WHERE region_id = 1;")
+    replica.set_aside()
+    replica.execute("UPDATE region SET name = 'Zürich Canton' WHERE region_id = 1;")
+
+    assert replica.is_set_aside
+    assert replica.in_transaction
+
+    replica.execute('COMMIT;')
+    replica.execute('SELECT 1;')
+
+    assert not replica.is_set_aside
+    assert _contents(replica)['region'][0][3] == 'Zürich Canton'
+    assert _contents(replica) == _contents(replica.primary)
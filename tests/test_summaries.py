@@ -0,0 +1,96 @@
+# tests/test_summaries.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Tests of the covering indexes behind summary searches, of how the engine decides
+# which summary searches refine the previous one, and of loading the summaries that
+# search lists label their results with.
+
+import sqlite3
+
+from p2app.engine import normalize, summaries
+from p2app.engine.main import Engine
+from p2app.events import *
+
+
+
+def _migrated_connection(path):
+    engine = Engine()
+    list(engine.process_event(OpenDatabaseEvent(path)))
+    list(engine.process_event(MigrateDatabaseEvent()))
+    return engine._connection
+
+
+def _plan(connection, sql, parameters = ()):
+    return ' '.join(detail for *_, detail in connection.execute(f'EXPLAIN QUERY PLAN {sql}', parameters))
+
+
+def test_covering_indexes_are_created_by_migrating(baseline_database):
+    connection = _migrated_connection(baseline_database)
+
+    assert summaries.missing_indexes(connection) == []
+
+    for (sql,) in connection.execute("SELECT sql FROM sqlite_master WHERE type = 'index';"):
+        assert sql is None or normalize.SQL_FUNCTION_NAME not in sql
+
+
+def test_covering_indexes_are_not_created_by_opening(baseline_database):
+    engine = Engine()
+    list(engine.process_event(OpenDatabaseEvent(baseline_database)))
+
+    assert len(summaries.missing_indexes(engine._connection)) == len(summaries._COVERING_INDEXES)
+
+
+def test_summary_search_by_name_is_answered_from_a_covering_index(baseline_database):
+    connection = _migrated_connection(baseline_database)
+    plan = _plan(
+        connection,
+        f'SELECT region_id, region_code, local_code, name FROM region'
+        f' WHERE {normalize.name_condition(True)};',
+        ('zurich',))
+
+    assert 'COVERING INDEX region_summary_normalized_name' in plan
+
+
+def test_indexes_of_other_programs_are_left_alone(baseline_database):
+    connection = sqlite3.connect(baseline_database)
+    connection.execute('CREATE INDEX region_summary_name ON region (name);')
+    connection.commit()
+    connection.close()
+
+    connection = _migrated_connection(baseline_database)
+    names = {name for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index';")}
+
+    assert {'region_summary_name', 'airport_municipality'} <= names
+
+
+def test_refinement_asks_for_everything_the_previous_query_did():
+    previous = {'region_code': None, 'local_code': 'ZH', 'name': None}
+
+    assert summaries.is_refinement(previous, {'region_code': None, 'local_code': 'ZH', 'name': 'zurich'})
+    assert not summaries.is_refinement(previous, {'region_code': None, 'local_code': None, 'name': 'zurich'})
+
+
+def test_summary_names_are_matched_normalized():
+    summary = Region(1, 'CH-ZH', 'ZH', 'Zürich', None, None, None, None)
+
+    assert summaries.matches(summary, {'region_code': None, 'local_code': 'ZH', 'name': 'zurich'})
+    assert not summaries.matches(summary, {'region_code': None, 'local_code': 'BE', 'name': None})
+
+
+def test_summaries_are_loaded_by_id(baseline_database):
+    engine = Engine()
+    list(engine.process_event(OpenDatabaseEvent(baseline_database)))
+
+    continents = list(engine.process_event(LoadContinentSummariesEvent([2, 1, 99])))[-1].summaries()
+    regions = list(engine.process_event(LoadRegionSummariesEvent([2])))[-1].summaries()
+
+    assert sorted(continents) == [ContinentSummary(1, 'EU', 'Europe'), ContinentSummary(2, 'NA', 'North America')]
+    assert [region.local_code for region in regions] == ['CA']
+
+
+def test_summaries_cannot_be_loaded_before_a_database_is_opened():
+    events = list(Engine().process_event(LoadCountrySummariesEvent([1])))
+
+    assert [type(event) for event in events] == [ErrorEvent]
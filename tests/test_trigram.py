@@ -0,0 +1,109 @@
+# tests/test_trigram.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Tests of the trigram index behind the engine's fuzzy searches.
+
+from p2app.engine.trigram import TrigramIndex, edit_distance, trigrams
+
+
+
+def _index(*names):
+    index = TrigramIndex()
+
+    for row_id, name in enumerate(names, 1):
+        index.add(row_id, name)
+
+    return index
+
+
+def _ids(matches):
+    return [row_id for row_id, _, _ in matches]
+
+
+def test_short_words_are_padded_into_trigrams():
+    assert trigrams('ab') == {'  a', ' ab', 'ab '}
+    assert trigrams('a') == {'  a', ' a '}
+
+
+def test_empty_names_have_no_trigrams():
+    assert trigrams('') == set()
+    assert trigrams('   ') == set()
+
+
+def test_each_word_is_padded_separately():
+    assert trigrams('a b') == {'  a', ' a ', '  b', ' b '}
+
+
+def test_short_name_ranks_its_exact_match_first():
+    index = _index('Abu Dhabi', 'Ab', 'Xy')
+    matches = index.search('ab')
+
+    assert _ids(matches)[0] == 2
+    assert matches[0][1:] == (1.0, 0)
+
+
+def test_single_letter_name_is_found():
+    index = _index('X', 'Xavier')
+
+    assert _ids(index.search('x'))[0] == 1
+
+
+def test_blank_query_matches_nothing():
+    index = _index('Ab')
+
+    assert index.search('') == []
+    assert index.search('   ') == []
+
+
+def test_accents_and_case_are_ignored_in_names():
+    index = _index('Zürich', 'Zug')
+    matches = index.search('zurich')
+
+    assert _ids(matches)[0] == 1
+    assert matches[0][1:] == (1.0, 0)
+
+
+def test_accents_and_case_are_ignored_in_queries():
+    index = _index('Zurich', 'Zug')
+
+    assert _ids(index.search('ZÜRICH'))[0] == 1
+
+
+def test_misspelled_accented_name_ranks_by_edit_distance():
+    index = _index('Sao Paulo Guarulhos', 'São Paulo', 'Santa Paula')
+    matches = index.search('Sao Paolo')
+
+    assert _ids(matches)[:2] == [2, 1]
+    assert [distance for _, _, distance in matches[:2]] == [1, 1]
+
+
+def test_search_stops_at_the_limit():
+    index = _index('Ab', 'Abu', 'Abba', 'Abbey')
+
+    assert len(index.search('ab', limit = 2)) == 2
+    assert index.search('ab', limit = 0) == []
+
+
+def test_readded_row_replaces_its_old_name():
+    index = _index('Zürich')
+    index.add(1, 'Geneva')
+
+    assert index.search('zurich') == []
+    assert _ids(index.search('geneva')) == [1]
+    assert len(index) == 1
+
+
+def test_removed_row_is_no_longer_found():
+    index = _index('Zürich', 'Zug')
+    index.remove(1)
+
+    assert 1 not in _ids(index.search('zurich'))
+    assert len(index) == 1
+
+
+def test_edit_distance():
+    assert edit_distance('', 'ab') == 2
+    assert edit_distance('paolo', 'paulo') == 1
+    assert edit_distance('ab', 'ab') == 0
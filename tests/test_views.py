@@ -0,0 +1,270 @@
+# tests/test_views.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Tests of how the views are kept alive, rather than rebuilt (the main window's
+# views, and each view's editor and loading view), and of how the search views
+# label their results.  No display is needed, since the views are made without
+# initializing their widgets, and the widgets they'd create are replaced by
+# stand-ins that note how they're used.
+
+from pathlib import Path
+
+import pytest
+
+from p2app.events import *
+from p2app.engine.main import Engine
+from p2app.views import continents, countries, main, regions
+from p2app.views.events import *
+from p2app.views.virtual_list import ListWindow
+
+
+
+class _Widget:
+    created = []
+
+
+    def __init__(self, parent):
+        self.parent = parent
+        self.is_shown = False
+        self.is_destroyed = False
+        self.shown_with = []
+        _Widget.created.append(self)
+
+
+    def grid(self, **options):
+        self.is_shown = True
+
+
+    def grid_remove(self):
+        self.is_shown = False
+
+
+    def destroy(self):
+        self.is_destroyed = True
+
+
+    def show(self, is_new, is_editable, record):
+        self.shown_with.append((is_new, is_editable, record))
+
+
+
+@pytest.fixture(autouse = True)
+def _created():
+    _Widget.created = []
+
+
+
+def _main_view(monkeypatch):
+    for name in ('ContinentsView', 'CountriesView', 'RegionsView', 'EmptyView'):
+        monkeypatch.setattr(main, name, type(name, (_Widget,), {}))
+
+    view = main.MainView.__new__(main.MainView)
+    view._current_view = None
+    view._views = {}
+    view._database_path = None
+    view.title = lambda title: None
+    return view
+
+
+def test_main_view_keeps_each_view_it_shows(monkeypatch):
+    view = _main_view(monkeypatch)
+
+    view.on_event(ShowEditContinentsViewEvent())
+    continents_view = view._current_view
+    view.on_event(ShowEditRegionsViewEvent())
+    regions_view = view._current_view
+    view.on_event(ShowEditContinentsViewEvent())
+
+    assert view._current_view is continents_view
+    assert continents_view.is_shown and not regions_view.is_shown
+    assert not regions_view.is_destroyed
+    assert len(_Widget.created) == 2
+
+
+@pytest.mark.parametrize('event', [
+    DatabaseClosedEvent(),
+    DatabaseRestoredEvent(Path('backup.db'))
+])
+def test_main_view_discards_its_views_once_the_database_changes(monkeypatch, event):
+    view = _main_view(monkeypatch)
+    view.on_event(ShowEditContinentsViewEvent())
+    continents_view = view._current_view
+
+    view.on_event(event)
+    view.on_event(ShowEditContinentsViewEvent())
+
+    assert continents_view.is_destroyed
+    assert view._current_view is not continents_view
+    assert isinstance(view._views[main.EmptyView], main.EmptyView)
+
+
+def test_main_view_discards_its_views_when_a_database_fails_to_open(monkeypatch):
+    view = _main_view(monkeypatch)
+    monkeypatch.setattr(main.tkinter.messagebox, 'showerror', lambda title, message: None)
+    view.on_event(ShowEditCountriesViewEvent())
+    countries_view = view._current_view
+
+    view.on_event(DatabaseOpenFailedEvent('not a database'))
+
+    assert countries_view.is_destroyed
+    assert list(view._views) == [main.EmptyView]
+
+
+
+# For each kind of record: its module, the view holding its editor, the names of
+# its editor and loading view, and a record along with the events about it.
+_EDITED = [
+    (continents, 'ContinentsView', '_ContinentEditorView', '_ContinentEditorLoadingView',
+     Continent(1, 'EU', 'Europe'),
+     NewContinentEvent, StartEditingContinentEvent, DiscardContinentEvent,
+     ContinentLoadedEvent, ContinentSavedEvent),
+    (countries, 'CountriesView', '_CountryEditorView', '_CountryEditorLoadingView',
+     Country(1, 'CH', 'Switzerland', 1, '', None),
+     NewCountryEvent, StartEditingCountryEvent, DiscardCountryEvent,
+     CountryLoadedEvent, CountrySavedEvent),
+    (regions, 'RegionsView', '_RegionEditorView', '_RegionEditorLoadingView',
+     Region(1, 'CH-ZH', 'ZH', 'Zürich', 1, 1, '', None),
+     NewRegionEvent, StartEditingRegionEvent, DiscardRegionEvent,
+     RegionLoadedEvent, RegionSavedEvent)
+]
+
+
+@pytest.fixture(params = _EDITED, ids = lambda edited: edited[1])
+def edited(request, monkeypatch):
+    module, view_name, editor_name, loading_name, record, *events = request.param
+    monkeypatch.setattr(module, editor_name, type(editor_name, (_Widget,), {}))
+    monkeypatch.setattr(module, loading_name, type(loading_name, (_Widget,), {}))
+
+    view = getattr(module, view_name).__new__(getattr(module, view_name))
+    view._edit_view = None
+    view._loading_view = None
+    view._editor_view = None
+    return view, record, *events
+
+
+def test_editor_is_made_once_and_shown_again_for_each_record(edited):
+    view, record, new_event, start_editing_event, discard_event, loaded_event, _ = edited
+
+    view.on_event_post(new_event())
+    editor = view._edit_view
+    view.on_event_post(discard_event())
+    view.on_event_post(start_editing_event())
+    loading_view = view._edit_view
+    view.on_event_post(loaded_event(record))
+
+    assert view._edit_view is editor
+    assert editor.is_shown and not loading_view.is_shown
+    assert editor.shown_with == [(True, True, None), (False, True, record)]
+    assert len(_Widget.created) == 2
+
+
+def test_loading_view_is_made_once(edited):
+    view, record, _, start_editing_event, discard_event, loaded_event, _ = edited
+
+    for _ in range(3):
+        view.on_event_post(start_editing_event())
+        view.on_event_post(loaded_event(record))
+        view.on_event_post(discard_event())
+
+    assert view._edit_view is None
+    assert len(_Widget.created) == 2
+
+
+def test_editor_shows_the_saved_record_read_only(edited):
+    view, record, _, _, _, loaded_event, saved_event = edited
+    saved = record._replace(name = 'Renamed')
+
+    view.on_event_post(loaded_event(record))
+    editor = view._edit_view
+    view.on_event_post(saved_event(saved))
+
+    assert view._edit_view is editor
+    assert editor.shown_with[-1] == (False, False, saved)
+
+
+
+# For each kind of record: its module, its search view, the events that report a
+# search result, load summaries and report a save, the kind of record saved, and
+# the two records in the test database, summarized.
+_SEARCHED = [
+    (continents, '_ContinentsSearchView', ContinentSummarySearchResultEvent, LoadContinentSummariesEvent,
+     ContinentSavedEvent, Continent,
+     [ContinentSummary(1, 'EU', 'Europe'), ContinentSummary(2, 'NA', 'North America')]),
+    (countries, '_CountriesSearchView', CountrySummarySearchResultEvent, LoadCountrySummariesEvent,
+     CountrySavedEvent, Country,
+     [CountrySummary(1, 'CH', 'Switzerland'), CountrySummary(2, 'US', 'United States')]),
+    (regions, '_RegionsSearchView', RegionSummarySearchResultEvent, LoadRegionSummariesEvent,
+     RegionSavedEvent, Region,
+     [RegionSummary(1, 'CH-ZH', 'ZH', 'Zürich'), RegionSummary(2, 'US-CA', 'CA', 'California')])
+]
+
+
+def _search_label(summary):
+    # Each summary has its ID first and its code second.
+    return f'{summary[1]} - {summary.name}'
+
+
+@pytest.fixture(params = _SEARCHED, ids = lambda searched: searched[1])
+def searched(request, baseline_database):
+    module, view_name, result_event, load_event, saved_event, record_type, summaries = request.param
+    engine = Engine()
+    list(engine.process_event(OpenDatabaseEvent(baseline_database)))
+    sent = []
+
+    def initiate_event(event):
+        # Events are processed right away, as they are when the event bus isn't
+        # queueing them, and the engine's answers handed straight back to the view.
+        sent.append(event)
+
+        for answer in engine.process_event(event):
+            view.on_event(answer)
+
+    view = getattr(module, view_name).__new__(getattr(module, view_name))
+    view.initiate_event = initiate_event
+    view._search_query = None
+    view._refined_ids = None
+    view._edit_button = {}
+    view._search_list = ListWindow(view._request_search_labels, visible_rows = 1)
+    yield view, result_event, load_event, saved_event, record_type, summaries, sent
+    list(engine.process_event(CloseDatabaseEvent()))
+
+
+def test_search_view_keeps_the_labels_of_visible_results_alone(searched):
+    view, result_event, _, _, _, summaries, sent = searched
+
+    for summary in summaries:
+        view.on_event(result_event(summary))
+
+    assert list(view._search_list._labels) == [summaries[0][0]]
+    assert view._search_list.visible_labels() == [_search_label(summaries[0])]
+    assert sent == []
+
+
+def test_search_view_loads_the_labels_of_results_scrolled_into_view(searched):
+    view, result_event, load_event, _, _, summaries, sent = searched
+
+    for summary in summaries:
+        view.on_event(result_event(summary))
+
+    view._search_list.scroll_to(1)
+
+    assert view._search_list.visible_labels() == [_search_label(summaries[1])]
+    assert [type(event) for event in sent] == [load_event]
+
+
+
+def test_search_view_relabels_a_saved_result_alone(searched):
+    view, result_event, _, saved_event, record_type, summaries, sent = searched
+
+    for summary in summaries:
+        view.on_event(result_event(summary))
+
+    renamed = summaries[0]._replace(name = 'Renamed')
+    saved = record_type(**{field: getattr(renamed, field, None) for field in record_type._fields})
+    view.on_event(saved_event(saved))
+
+    assert dict(view._search_list._labels) == {summaries[0][0]: _search_label(renamed)}
+    assert view._search_list.visible_labels() == [_search_label(renamed)]
+    assert sent == []
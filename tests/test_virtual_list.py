@@ -0,0 +1,176 @@
+# tests/test_virtual_list.py
+#
+# ICS 33 Winter 2025
+# Project 2: Learning to Fly
+#
+# Tests of the virtualized search result list.  They need no display, since they
+# inspect the widget's class, rather than creating a window, and test what it
+# shows through its ListWindow, which has no widgets of its own.
+
+import tkinter
+
+import pytest
+
+from p2app.views import virtual_list
+from p2app.views.virtual_list import ListWindow, VirtualList
+
+
+
+class _Labels:
+    """Stands in for a search view, answering requests for labels right away, or
+    only once told to."""
+    def __init__(self, answers_at_once = True):
+        self.requests = []
+        self.window = None
+        self._answers_at_once = answers_at_once
+
+
+    def __call__(self, item_ids):
+        self.requests.append(list(item_ids))
+
+        if self._answers_at_once:
+            self.answer()
+
+
+    def answer(self):
+        return self.window.set_labels({item_id: _label(item_id) for item_id in self.requests[-1]})
+
+
+
+def _label(item_id):
+    return f'Item {item_id}'
+
+
+def _window(item_count, visible_rows = 4, answers_at_once = True, labelled = True):
+    labels = _Labels(answers_at_once)
+    window = labels.window = ListWindow(labels, visible_rows)
+
+    for item_id in range(item_count):
+        window.append(item_id, _label(item_id) if labelled else None)
+
+    return window, labels
+
+
+def test_no_tkinter_method_is_overridden():
+    own = {name for name in vars(VirtualList) if not name.startswith('__')}
+
+    assert own & set(dir(tkinter.Frame)) == set()
+
+
+def test_search_views_use_the_list_by_its_own_names():
+    assert callable(VirtualList.set_item_ids)
+    assert VirtualList.update is tkinter.Misc.update
+
+
+def test_only_the_labels_of_visible_items_are_kept():
+    window, labels = _window(10_000)
+
+    assert window.visible_labels() == [_label(item_id) for item_id in range(4)]
+    assert labels.requests == []
+    assert len(window._labels) == 4
+
+
+def test_labels_scrolled_into_view_are_asked_for_together():
+    window, labels = _window(10_000)
+
+    window.scroll_to(5000)
+
+    assert window.visible_labels() == [_label(item_id) for item_id in range(5000, 5004)]
+    assert labels.requests == [[5000, 5001, 5002, 5003]]
+
+
+def test_labels_not_handed_back_yet_are_placeholders():
+    window, labels = _window(100, answers_at_once = False)
+    window.scroll_to(50)
+
+    assert window.visible_labels() == [virtual_list.PLACEHOLDER_LABEL] * 4
+    assert window.visible_labels() == [virtual_list.PLACEHOLDER_LABEL] * 4
+    assert labels.requests == [[50, 51, 52, 53]]
+
+    assert labels.answer()
+    assert window.visible_labels() == [_label(item_id) for item_id in range(50, 54)]
+
+
+def test_unanswered_labels_are_asked_for_again_by_the_next_window():
+    window, labels = _window(100, answers_at_once = False)
+    window.scroll_to(50)
+    window.visible_labels()
+
+    window.scroll_to(52)
+    window.visible_labels()
+
+    assert labels.requests == [[50, 51, 52, 53], [52, 53, 54, 55]]
+
+
+def test_cached_labels_are_not_asked_for_again():
+    window, labels = _window(1000)
+    window.scroll_to(500)
+    window.visible_labels()
+    window.scroll_to(0)
+    window.visible_labels()
+    window.scroll_to(502)
+    window.visible_labels()
+
+    assert labels.requests == [[500, 501, 502, 503], [504, 505]]
+
+
+def test_refreshing_a_label_changes_that_label_alone():
+    window, labels = _window(10)
+    before = window.visible_labels()
+
+    assert window.refresh_label(2, 'Renamed')
+    assert window.visible_labels() == before[:2] + ['Renamed'] + before[3:]
+    assert labels.requests == []
+
+
+def test_refreshing_a_label_not_cached_leaves_it_to_be_asked_for():
+    window, labels = _window(10)
+
+    assert not window.refresh_label(8, 'Renamed')
+    assert 8 not in window._labels
+    window.scroll_to(6)
+
+    assert window.visible_labels() == [_label(item_id) for item_id in range(6, 10)]
+    assert labels.requests == [[6, 7, 8, 9]]
+
+
+def test_label_cache_is_bounded():
+    window, labels = _window(10_000, visible_rows = 10, labelled = False)
+
+    for top in range(0, 10_000, 10):
+        window.scroll_to(top)
+        window.visible_labels()
+
+    assert len(labels.requests) == 1000
+    assert len(window._labels) == virtual_list._MIN_CACHED_LABELS
+
+
+def test_scrolling_stays_within_the_list():
+    window, _ = _window(10)
+
+    assert not window.scroll_to(-5)
+    assert window.scroll_to(100)
+    assert window.top() == 6
+    assert window.visible_ids().tolist() == [6, 7, 8, 9]
+
+
+def test_selecting_scrolls_the_selection_into_view():
+    window, _ = _window(100)
+
+    window.select(50)
+
+    assert window.selected_id() == 50
+    assert window.visible_ids().tolist() == [47, 48, 49, 50]
+
+
+@pytest.mark.parametrize('item_ids, expected', [
+    ([3, 1, 7], [1, 3, 7]),
+    ([9, 8, 3], [3, 9, 8])
+])
+def test_refined_ids_keep_their_places_and_the_selection(item_ids, expected):
+    window, _ = _window(8)
+    window.select(3)
+
+    assert window.set_item_ids(item_ids)
+    assert window.visible_ids().tolist()[:len(expected)] == expected
+    assert window.selected_id() == 3